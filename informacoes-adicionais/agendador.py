@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Importação de grupos e informações adicionais em paralelo, respeitando a
+dependência entre eles.
+
+Cada item aponta para o seu grupo (codigo_conceito + codigo_informacao_adicional
+→ codigo_conceito + codigo da aba de grupos). Em vez de salvar todos os grupos
+e só então todos os itens, o agendador monta esse grafo a partir das duas abas
+e libera os itens de um grupo assim que o próprio grupo é salvo. Grupos e
+itens de conceitos diferentes andam ao mesmo tempo; o ritmo continua sendo o
+do limitador adaptativo do host.
+
+Itens cujo grupo não está na aba de grupos (já existe no destino) saem logo no
+início, intercalados com os grupos. Se o grupo falhar, seus itens não são enviados e ficam como falha no
+diário, prontos para uma nova execução com retomar=True.
+
+Uso:
+    resumo = importar(url_base, cookies, cliente)
+    resumo = importar(url_base, cookies, cliente, max_workers=8, retomar=True)
+"""
+
+import logging
+from collections import Counter, defaultdict, deque
+from itertools import zip_longest
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metricas
+import salvar_grupo_informacao_adicional as salvar_grupos
+import salvar_informacao_adicional as salvar_informacoes
+from diario import DiarioDeExecucao, STATUS_FALHA, chave_registro
+from planilhas import GravadorDeResultados, valor_como_texto
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+MAX_WORKERS = 4  # envios simultâneos (grupos + itens)
+
+MENSAGEM_GRUPO_FALHOU = "Não enviado: o grupo {codigo} não foi salvo"
+
+
+# ==============================
+# GRAFO DE DEPENDÊNCIAS
+# ==============================
+def chave_do_grupo(row: dict):
+    return valor_como_texto(row.get("codigo_conceito")), valor_como_texto(row.get("codigo"))
+
+
+def chave_do_grupo_do_item(row: dict):
+    return valor_como_texto(row.get("codigo_conceito")), valor_como_texto(row.get("codigo_informacao_adicional"))
+
+
+def montar_grafo(grupos, itens):
+    """
+    Devolve (dependentes, livres): os itens (idx, row) de cada grupo presente
+    em `grupos` e os itens cujo grupo não será importado nesta execução.
+    """
+    no_lote = {chave_do_grupo(row) for _, row in grupos}
+    dependentes, livres = defaultdict(list), []
+    for idx, row in itens:
+        chave = chave_do_grupo_do_item(row)
+        if chave in no_lote:
+            dependentes[chave].append((idx, row))
+        else:
+            livres.append((idx, row))
+    return dependentes, livres
+
+
+def fila_inicial(grupos, livres) -> deque:
+    """
+    Tarefas (tipo, idx, row) prontas no início: grupos e itens livres
+    intercalados, para que nenhum dos dois espere o outro terminar de sair.
+    """
+    fila = deque()
+    for grupo, item in zip_longest(grupos, livres):
+        if grupo is not None:
+            fila.append(("grupo", *grupo))
+        if item is not None:
+            fila.append(("item", *item))
+    return fila
+
+
+# ==============================
+# EXECUÇÃO PRINCIPAL
+# ==============================
+@metricas.execucao_medida("agendador")
+def importar(url_base: str, cookies: str, cliente: str, max_workers: int = MAX_WORKERS, retomar: bool = False,
+             coluna_resultado: str = salvar_informacoes.COLUNA_RESULTADO, cliente_origem: str = None,
+             verificar_destino: bool = True):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    logging.info(f"🔹 Importando grupos e informações adicionais em paralelo para {cliente}")
+
+    sessao_grupos = salvar_grupos.build_session(cookies, url_base, max_workers)
+    sessao_itens = salvar_informacoes.build_session(cookies, url_base, max_workers)
+    endpoint_grupos = url_base.rstrip("/") + salvar_grupos.ENDPOINT_PATH
+    endpoint_itens = url_base.rstrip("/") + salvar_informacoes.ENDPOINT_PATH
+
+    # Chaves do grafo a partir do texto da planilha: com numericise_all o grupo "001" viraria 1
+    # e não casaria com o "001" lido no item; a conversão só é aplicada no envio do grupo
+    ws_grupos, col_grupos, grupos = salvar_grupos.ler_registros(coluna_resultado, cliente_origem, como_texto=True)
+    converter_grupo = salvar_grupos.converter_registro if ws_grupos is not None else None
+    ws_itens, col_itens, itens = salvar_informacoes.ler_registros(coluna_resultado, cliente_origem)
+    # O grafo precisa de todos os itens: as páginas das duas abas são lidas por inteiro
+    grupos = list(enumerate(grupos, start=2))
+    itens = list(enumerate(itens, start=2))
+    dependentes, livres = montar_grafo(grupos, itens)
+    logging.info(f"📄 {len(grupos)} grupos e {len(itens)} itens lidos; {len(livres)} itens sem grupo no lote.")
+
+    indice_grupos = indice_itens = None
+    if verificar_destino:
+        indice_grupos = salvar_grupos.indice_do_destino(sessao_grupos, url_base, cliente)
+        indice_itens = salvar_informacoes.indice_do_destino(sessao_itens, url_base, cliente)
+
+    situacoes = Counter()
+    with DiarioDeExecucao(salvar_grupos.DIARIO_ETAPA) as diario_grupos, \
+            DiarioDeExecucao(salvar_informacoes.DIARIO_ETAPA) as diario_itens, \
+            GravadorDeResultados(ws_grupos, col_grupos) as gravador_grupos, \
+            GravadorDeResultados(ws_itens, col_itens) as gravador_itens:
+
+        def enviar_grupo(idx, row):
+            if converter_grupo is not None:
+                row = converter_grupo(row)
+            return salvar_grupos.salvar_registro(sessao_grupos, endpoint_grupos, cliente, idx, row,
+                                                 diario_grupos, gravador_grupos, retomar, indice_grupos)
+
+        def enviar_item(idx, row):
+            return salvar_informacoes.salvar_registro(sessao_itens, endpoint_itens, cliente, idx, row,
+                                                      diario_itens, gravador_itens, retomar, indice_itens)
+
+        def descartar_item(idx, row, codigo_grupo):
+            mensagem = MENSAGEM_GRUPO_FALHOU.format(codigo=codigo_grupo)
+            chave = chave_registro(row.get("codigo_conceito"), row.get("Codigo"))
+            diario_itens.registrar(cliente, chave, STATUS_FALHA, mensagem)
+            gravador_itens.registrar(idx, mensagem)
+
+        # Fila de tarefas prontas: itens liberados entram na frente dos grupos restantes
+        prontos = fila_inicial(grupos, livres)
+        em_andamento = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while prontos or em_andamento:
+                while prontos and len(em_andamento) < max_workers:
+                    tipo, idx, row = prontos.popleft()
+                    funcao = enviar_grupo if tipo == "grupo" else enviar_item
+                    em_andamento[pool.submit(metricas.propagar(funcao), idx, row)] = (tipo, row)
+
+                concluidos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    tipo, row = em_andamento.pop(futuro)
+                    status = futuro.result()
+                    situacoes[f"{tipo}:{status}"] += 1
+                    if tipo != "grupo":
+                        continue
+
+                    liberados = dependentes.pop(chave_do_grupo(row), [])
+                    if status == STATUS_FALHA:
+                        for idx, item in liberados:
+                            descartar_item(idx, item, row.get("codigo"))
+                        situacoes["item:grupo_falhou"] += len(liberados)
+                    else:
+                        prontos.extendleft(("item", idx, item) for idx, item in reversed(liberados))
+
+        logging.info(f"📊 Situações: {dict(situacoes)}")
+        resumo = {"grupos": diario_grupos.resumo(cliente), "informacoes": diario_itens.resumo(cliente)}
+        logging.info(f"📒 Diário: {resumo}")
+
+    logging.info("✅ Importação concluída!")
+    return resumo
@@ -0,0 +1,595 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark offline dos run() de exportação e importação.
+
+Nada sai da máquina:
+  - PortalLocal: servidor HTTP em 127.0.0.1 que responde aos endpoints
+    ObtenhaLista* e Salvar com latência, taxa de erro e tamanho de lista
+    configuráveis;
+  - ClienteEmMemoria: dublê do cliente gspread (registrado via
+    planilhas.definir_cliente) que guarda as abas em memória e conta cada
+    chamada à API do Sheets.
+
+Para cada cenário o relatório traz linhas/s, tempo total, chamadas HTTP e
+Sheets e o pico de memória (tracemalloc). Os arquivos SQLite (diário e
+repositório local) são gravados em um diretório temporário.
+
+Uso:
+    python benchmark.py
+    python benchmark.py --itens 500 --latencia 0.05 --erros 0.02 --workers 8
+    python benchmark.py --taxa 1000 --json resultado.json   # sem o ritmo do limitador
+    python benchmark.py --metricas metricas                 # + resumo e trace de cada run()
+
+Ou em código:
+    resultados = executar_benchmark(Cenario(itens_por_conceito=200))
+"""
+
+import os
+import re
+import sys
+import json
+import asyncio
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import buscar_grupo_de_informacao_adicional
+import agendador
+import cliente_http
+import buscar_informacoes_adicionais
+import salvar_grupo_informacao_adicional
+import salvar_informacao_adicional
+import metricas
+import planilhas
+import sessoes
+from controle_de_taxa import LimitadorAdaptativo, definir_limitador
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+COOKIES = "ASP.NET_SessionId=benchmark"
+CLIENTE = "benchmark"
+
+
+@dataclass
+class Cenario:
+    itens_por_conceito: int = 20   # tamanho de cada lista ObtenhaLista*
+    grupos_por_conceito: int = 5
+    campos_extras: int = 0         # colunas a mais em cada item (alarga a aba)
+    tamanho_valor: int = 10        # caracteres de cada campo extra
+    latencia: float = 0.0          # segundos por resposta
+    taxa_erro: float = 0.0         # fração das respostas devolvidas com HTTP 500
+    max_workers: int = buscar_informacoes_adicionais.MAX_WORKERS
+    taxa: float = None             # req/s fixos no limitador; None = limitador de produção
+    semente: int = 42
+
+
+# ==============================
+# PORTAL LG LOCAL
+# ==============================
+def _grupo(conceito: int, n: int) -> dict:
+    return {
+        "Codigo": f"G{conceito}-{n}",
+        "Descricao": f"Grupo {n} do conceito {conceito}",
+        "Ordem": n,
+        "DtoEntidadeInformacaoAdicional": {"Modulo": 1, "Conceito": conceito},
+    }
+
+
+def _informacao(conceito: int, n: int, cenario: Cenario) -> dict:
+    tipo = n % 6
+    item = {
+        "Id": conceito * 100000 + n,
+        "TipoEntidade": conceito,
+        "Codigo": f"I{conceito}-{n}",
+        "Descricao": f"Informação {n}",
+        "Status": 1,
+        "Observacao": "",
+        "Obrigatorio": n % 2 == 0,
+        "Tipo": tipo,
+        "DescricaoDoTipo": str(tipo),
+        "Mascara": "99.9" if tipo in (0, 2) else "",
+        "ValorPadrao": "",
+        "Ordem": n,
+        "Comprimento": 20,
+        "Opcoes": [{"Codigo": i, "Descricao": f"Opção {i}"} for i in range(3)] if tipo == 5 else None,
+        "DtoGrupoDeInformacoesAdicionais": _grupo(conceito, n % max(cenario.grupos_por_conceito, 1)),
+    }
+    for i in range(cenario.campos_extras):
+        item[f"CampoExtra{i:03d}"] = "x" * cenario.tamanho_valor
+    return item
+
+
+class PortalLocal:
+    """Servidor HTTP local que imita os endpoints usados pelos módulos buscar_* e salvar_*."""
+
+    def __init__(self, cenario: Cenario):
+        self.cenario = cenario
+        self.chamadas = Counter()  # "endpoint status" → quantidade
+        self._lock = threading.Lock()
+        self._aleatorio = random.Random(cenario.semente)
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), self._criar_handler())
+        self._servidor.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, porta = self._servidor.server_address
+        return f"http://{host}:{porta}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        return False
+
+    def responder(self, caminho: str, form: dict):
+        """Devolve (status, corpo) para um POST em `caminho` (ou (status, corpo, cabeçalhos))."""
+        cenario = self.cenario
+        with self._lock:
+            falhou = self._aleatorio.random() < cenario.taxa_erro
+        if cenario.latencia:
+            time.sleep(cenario.latencia)
+
+        nome = "/".join(caminho.split("/")[-2:])  # ex.: InformacaoAdicional/Salvar
+        if falhou:
+            status, corpo = 500, {"mensagem": "Erro simulado"}
+        elif caminho == buscar_grupo_de_informacao_adicional.ENDPOINT_PATH:
+            conceito = int(form.get("conceito", 0))
+            status, corpo = 200, [_grupo(conceito, n) for n in range(cenario.grupos_por_conceito)]
+        elif caminho == buscar_informacoes_adicionais.ENDPOINT_PATH:
+            conceito = int(form.get("conceito", 0))
+            status, corpo = 200, [_informacao(conceito, n, cenario) for n in range(cenario.itens_por_conceito)]
+        elif caminho == sessoes.PROBE_PATH:
+            status, corpo = 200, {}
+        elif caminho in (salvar_grupo_informacao_adicional.ENDPOINT_PATH,
+                         salvar_informacao_adicional.ENDPOINT_PATH):
+            status, corpo = 200, {"mensagem": "Registro salvo com sucesso."}
+        else:
+            status, corpo = 404, {"mensagem": "Endpoint desconhecido"}
+
+        with self._lock:
+            self.chamadas[f"{nome} {status}"] += 1
+        return status, corpo
+
+    def _criar_handler(self):
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, como o portal real
+            disable_nagle_algorithm = True  # sem o atraso de ACK de ~40 ms a cada resposta
+
+            def do_POST(self):
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(tamanho).decode("utf-8")).items()}
+                self._enviar(*portal.responder(self.path, form))
+
+            def do_GET(self):
+                self._enviar(*portal.responder(self.path, {}))
+
+            def _enviar(self, status, corpo, cabecalhos=None):
+                dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(dados)))
+                for nome, valor in (cabecalhos or {}).items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+# ==============================
+# SHEETS EM MEMÓRIA
+# ==============================
+def _a1_para_linha_coluna(a1: str):
+    letras, numero = re.match(r"([A-Z]*)(\d*)", a1.upper()).groups()
+    coluna = 0
+    for letra in letras:
+        coluna = coluna * 26 + ord(letra) - 64
+    return int(numero or 1), coluna or 1
+
+
+def _como_texto(v) -> str:
+    # Como o Sheets devolve valores gravados em modo RAW: números sem ".0", booleanos em maiúsculas
+    if v is None:
+        return ""
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+class AbaEmMemoria:
+    """Subconjunto da API de gspread.Worksheet usado pelos módulos."""
+
+    def __init__(self, planilha, title: str, rows: int = 1000, cols: int = 26, id: int = 0):
+        self.spreadsheet = planilha
+        self.title = title
+        self.id = id
+        # Como no gspread: row_count/col_count vêm das propriedades guardadas no objeto,
+        # que só os métodos da própria aba (add_rows, resize...) atualizam
+        self._properties = {"gridProperties": {"rowCount": rows, "columnCount": cols}}
+        self._linhas_na_grade = rows  # tamanho real da grade, do lado da API
+        self.celulas = []
+        self._lock = threading.Lock()
+
+    @property
+    def row_count(self):
+        return self._properties["gridProperties"]["rowCount"]
+
+    @property
+    def col_count(self):
+        return self._properties["gridProperties"]["columnCount"]
+
+    def _contar(self, metodo: str):
+        self.spreadsheet.cliente.contar(metodo)
+
+    def _redimensionar(self, linhas: int = None, colunas: int = None):
+        # Encolher a grade apaga o que ficou de fora, como na API
+        grade = self._properties["gridProperties"]
+        if linhas:
+            grade["rowCount"] = self._linhas_na_grade = linhas
+            del self.celulas[linhas:]
+        if colunas:
+            if colunas < grade["columnCount"]:
+                self.celulas = [l[:colunas] for l in self.celulas]
+            grade["columnCount"] = colunas
+
+    def _garantir_grade(self, linhas: int, colunas: int):
+        # Como a API real, escrever fora da grade acrescenta linhas/colunas
+        self._redimensionar(max(self._linhas_na_grade, linhas), max(self.col_count, colunas))
+
+    def _gravar(self, linha: int, coluna: int, valores):
+        for i, valores_linha in enumerate(valores):
+            destino = linha + i
+            while len(self.celulas) < destino:
+                self.celulas.append([])
+            atual = self.celulas[destino - 1]
+            fim = coluna - 1 + len(valores_linha)
+            if len(atual) < fim:
+                atual.extend([""] * (fim - len(atual)))
+            atual[coluna - 1:fim] = [_como_texto(v) for v in valores_linha]
+            self._garantir_grade(destino, fim)
+
+    # Leitura
+    def get_all_values(self):
+        self._contar("get_all_values")
+        with self._lock:
+            largura = max((len(l) for l in self.celulas), default=0)
+            return [l + [""] * (largura - len(l)) for l in self.celulas]
+
+    def get_all_records(self):
+        self._contar("get_all_records")
+        with self._lock:
+            if not self.celulas:
+                return []
+            cabecalho = self.celulas[0]
+            return [dict(zip(cabecalho, l + [""] * (len(cabecalho) - len(l)))) for l in self.celulas[1:]]
+
+    def get(self, range_name: str):
+        # Como a API: linhas vazias no fim do intervalo e células vazias no fim de cada linha são omitidas
+        self._contar("get")
+        inicio, fim = range_name.split(":")
+        linha_inicial, coluna_inicial = _a1_para_linha_coluna(inicio)
+        linha_final, coluna_final = _a1_para_linha_coluna(fim)
+        if linha_final > self._linhas_na_grade or coluna_final > self.col_count:
+            raise ValueError(f"Range ({self.title}!{range_name}) exceeds grid limits")
+        with self._lock:
+            linhas = [l[coluna_inicial - 1:coluna_final] for l in self.celulas[linha_inicial - 1:linha_final]]
+        linhas = [l[:max((i + 1 for i, v in enumerate(l) if v != ""), default=0)] for l in linhas]
+        while linhas and not linhas[-1]:
+            linhas.pop()
+        # gspread 6: intervalo sem dados vem como [[]]
+        return linhas or [[]]
+
+    def row_values(self, linha: int):
+        self._contar("row_values")
+        with self._lock:
+            valores = self.celulas[linha - 1] if linha <= len(self.celulas) else []
+            while valores and valores[-1] == "":
+                valores = valores[:-1]
+            return list(valores)
+
+    # Escrita
+    def update(self, values=None, range_name=None, **kwargs):
+        self._contar("update")
+        if isinstance(values, str):
+            # Assinatura antiga do gspread: update(range_name, values)
+            values, range_name = range_name, values
+        with self._lock:
+            self._gravar(*_a1_para_linha_coluna(range_name.split(":")[0]), values)
+
+    def update_cell(self, linha: int, coluna: int, valor):
+        self._contar("update_cell")
+        with self._lock:
+            self._gravar(linha, coluna, [[valor]])
+
+    def batch_update(self, dados, **kwargs):
+        self._contar("batch_update")
+        with self._lock:
+            for intervalo in dados:
+                self._gravar(*_a1_para_linha_coluna(intervalo["range"].split(":")[0]), intervalo["values"])
+
+    def append_rows(self, valores, **kwargs):
+        self._contar("append_rows")
+        with self._lock:
+            while self.celulas and not any(self.celulas[-1]):
+                self.celulas.pop()
+            self._gravar(len(self.celulas) + 1, 1, valores)
+
+    def clear(self):
+        self._contar("clear")
+        with self._lock:
+            self.celulas = []
+
+    def add_cols(self, quantidade: int):
+        self._contar("add_cols")
+        self._redimensionar(colunas=self.col_count + quantidade)
+
+    def add_rows(self, quantidade: int):
+        self._contar("add_rows")
+        self._redimensionar(linhas=self._linhas_na_grade + quantidade)
+
+    def resize(self, rows: int = None, cols: int = None):
+        self._contar("resize")
+        self._redimensionar(rows, cols)
+
+    def _apagar_linhas(self, inicio: int, fim: int):
+        # deleteDimension (via spreadsheet.batch_update) encolhe a grade, mas não o row_count desta aba
+        with self._lock:
+            del self.celulas[inicio:fim]
+            self._linhas_na_grade -= fim - inicio
+
+
+class PlanilhaEmMemoria:
+    def __init__(self, cliente, sheet_id: str):
+        self.cliente = cliente
+        self.id = sheet_id
+        self._abas = {}
+        self._proximo_id = 0
+
+    def worksheets(self):
+        self.cliente.contar("worksheets")
+        return list(self._abas.values())
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26):
+        self.cliente.contar("add_worksheet")
+        aba = AbaEmMemoria(self, title, rows, cols, id=self._proximo_id)
+        self._proximo_id += 1
+        self._abas[title] = aba
+        return aba
+
+    def del_worksheet(self, aba):
+        self.cliente.contar("del_worksheet")
+        del self._abas[aba.title]
+
+    def worksheet(self, title: str):
+        self.cliente.contar("worksheet")
+        return self._abas[title]
+
+    def batch_update(self, corpo: dict):
+        self.cliente.contar("spreadsheet.batch_update")
+        abas = {aba.id: aba for aba in self._abas.values()}
+        for pedido in corpo.get("requests", []):
+            if "deleteDimension" in pedido:
+                intervalo = pedido["deleteDimension"]["range"]
+                abas[intervalo["sheetId"]]._apagar_linhas(intervalo["startIndex"], intervalo["endIndex"])
+            elif "updateSheetProperties" in pedido:
+                propriedades = pedido["updateSheetProperties"]["properties"]
+                grade = propriedades["gridProperties"]
+                aba = abas[propriedades["sheetId"]]
+                with aba._lock:
+                    aba._redimensionar(grade.get("rowCount"), grade.get("columnCount"))
+            elif "updateCells" in pedido:
+                # Só o usado aqui: limpar os valores da aba inteira
+                aba = abas[pedido["updateCells"]["range"]["sheetId"]]
+                with aba._lock:
+                    aba.celulas = []
+            elif "copyPaste" in pedido:
+                # Só o usado aqui: valores de uma aba inteira para outra, a partir de A1
+                origem = abas[pedido["copyPaste"]["source"]["sheetId"]]
+                destino = abas[pedido["copyPaste"]["destination"]["sheetId"]]
+                with destino._lock:
+                    destino._gravar(1, 1, [list(l) for l in origem.celulas])
+            elif "deleteSheet" in pedido:
+                del self._abas[abas[pedido["deleteSheet"]["sheetId"]].title]
+
+    def values_batch_update(self, corpo: dict):
+        self.cliente.contar("values_batch_update")
+        for intervalo in corpo.get("data", []):
+            titulo, _, a1 = intervalo["range"].rpartition("!")
+            aba = self._abas[titulo.strip("'")]
+            with aba._lock:
+                aba._gravar(*_a1_para_linha_coluna(a1.split(":")[0]), intervalo["values"])
+
+
+class ClienteEmMemoria:
+    """Dublê de gspread.Client; `chamadas` conta cada método da API usado."""
+
+    def __init__(self):
+        self.chamadas = Counter()
+        self._planilhas = {}
+        self._lock = threading.Lock()
+
+    def contar(self, metodo: str):
+        with self._lock:
+            self.chamadas[metodo] += 1
+
+    def open_by_key(self, sheet_id: str):
+        self.contar("open_by_key")
+        with self._lock:
+            if sheet_id not in self._planilhas:
+                self._planilhas[sheet_id] = PlanilhaEmMemoria(self, sheet_id)
+            return self._planilhas[sheet_id]
+
+
+# ==============================
+# MEDIÇÃO
+# ==============================
+def _cenarios_de_execucao(url: str, cenario: Cenario):
+    """(nome, função) na ordem em que rodam; as importações leem as abas exportadas antes."""
+    workers = cenario.max_workers
+    cenarios = [
+        ("exportar_grupos", lambda: buscar_grupo_de_informacao_adicional.run(
+            url, COOKIES, CLIENTE, max_workers=workers)),
+        ("exportar_informacoes", lambda: buscar_informacoes_adicionais.run(
+            url, COOKIES, CLIENTE, max_workers=workers)),
+        ("exportar_informacoes_streaming", lambda: buscar_informacoes_adicionais.run(
+            url, COOKIES, CLIENTE, streaming=True)),
+        ("exportar_informacoes_delta", lambda: buscar_informacoes_adicionais.run(
+            url, COOKIES, CLIENTE, max_workers=workers, delta=True)),
+        ("exportar_informacoes_async", lambda: asyncio.run(buscar_informacoes_adicionais.run_async(
+            url, COOKIES, CLIENTE, max_concorrencia=workers))),
+        ("importar_grupos", lambda: salvar_grupo_informacao_adicional.run(
+            url, COOKIES, CLIENTE, verificar_destino=False)),
+        ("importar_informacoes", lambda: salvar_informacao_adicional.run(
+            url, COOKIES, CLIENTE, verificar_destino=False)),
+        ("importar_agendado", lambda: agendador.importar(
+            url, COOKIES, CLIENTE, max_workers=workers, verificar_destino=False)),
+        ("importar_informacoes_async", lambda: asyncio.run(salvar_informacao_adicional.run_async(
+            url, COOKIES, CLIENTE, verificar_destino=False, max_concorrencia=workers))),
+        # O portal local devolve os mesmos registros exportados: tudo já existe no destino
+        ("importar_grupos_verificando_destino", lambda: salvar_grupo_informacao_adicional.run(url, COOKIES, CLIENTE)),
+        ("importar_informacoes_verificando_destino", lambda: salvar_informacao_adicional.run(url, COOKIES, CLIENTE)),
+    ]
+    if cliente_http.aiohttp is None:  # modo async indisponível sem o pacote opcional
+        cenarios = [(nome, funcao) for nome, funcao in cenarios if not nome.endswith("_async")]
+    return cenarios
+
+
+def _linhas_processadas(retorno) -> int:
+    if isinstance(retorno, int):
+        return retorno
+    # Importações devolvem o resumo do diário, {status: quantidade}; o agendador, um por etapa
+    return sum(_linhas_processadas(v) if isinstance(v, dict) else v for v in retorno.values())
+
+
+def medir(nome: str, funcao, portal: PortalLocal, cliente: ClienteEmMemoria) -> dict:
+    """Executa `funcao` uma vez e devolve tempo, vazão, chamadas e pico de memória."""
+    http_antes, sheets_antes = Counter(portal.chamadas), Counter(cliente.chamadas)
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        retorno = funcao()
+    finally:
+        segundos = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    http = portal.chamadas - http_antes
+    sheets = cliente.chamadas - sheets_antes
+    linhas = _linhas_processadas(retorno)
+    return {
+        "cenario": nome,
+        "linhas": linhas,
+        "segundos": round(segundos, 3),
+        "linhas_por_s": round(linhas / segundos, 1) if segundos else None,
+        "chamadas_http": dict(sorted(http.items())),
+        "chamadas_sheets": dict(sorted(sheets.items())),
+        "pico_memoria_mb": round(pico / 2 ** 20, 2),
+    }
+
+
+def executar_benchmark(cenario: Cenario = None, somente=None) -> list:
+    """
+    Roda os cenários (todos, ou só os nomes em `somente`) contra o portal
+    local e o Sheets em memória e devolve a lista de medições.
+    """
+    cenario = cenario or Cenario()
+    diretorio_original = os.getcwd()
+    temporario = tempfile.mkdtemp(prefix="benchmark_lg_")
+    cliente = ClienteEmMemoria()
+    planilhas.definir_cliente(cliente)
+    resultados = []
+    try:
+        os.chdir(temporario)  # diário e repositório local não tocam nos arquivos reais
+        with PortalLocal(cenario) as portal:
+            for nome, funcao in _cenarios_de_execucao(portal.url, cenario):
+                if somente and nome not in somente:
+                    continue
+                # Cada cenário começa com o limitador zerado
+                limitador = None
+                if cenario.taxa:
+                    limitador = LimitadorAdaptativo(taxa_inicial=cenario.taxa, taxa_minima=cenario.taxa,
+                                                    taxa_maxima=cenario.taxa, capacidade=max(1.0, cenario.taxa / 10))
+                definir_limitador(portal.url, limitador)
+                resultados.append(medir(nome, funcao, portal, cliente))
+                definir_limitador(portal.url, None)
+    finally:
+        os.chdir(diretorio_original)
+        shutil.rmtree(temporario, ignore_errors=True)
+        planilhas.definir_cliente(None)
+    return resultados
+
+
+def imprimir_relatorio(resultados):
+    print(f"{'cenário':<42}{'linhas':>8}{'tempo (s)':>11}{'linhas/s':>11}{'pico (MB)':>11}")
+    for r in resultados:
+        print(f"{r['cenario']:<42}{r['linhas']:>8}{r['segundos']:>11}{r['linhas_por_s'] or 0:>11}"
+              f"{r['pico_memoria_mb']:>11}")
+        print(f"    http:   {r['chamadas_http']}")
+        print(f"    sheets: {r['chamadas_sheets']}")
+
+
+# ==============================
+# EXECUÇÃO PRINCIPAL
+# ==============================
+def main(argv=None):
+    padrao = Cenario()
+    parser = argparse.ArgumentParser(description="Benchmark offline dos scripts de informações adicionais.")
+    parser.add_argument("--itens", type=int, default=padrao.itens_por_conceito, help="itens por conceito")
+    parser.add_argument("--grupos", type=int, default=padrao.grupos_por_conceito, help="grupos por conceito")
+    parser.add_argument("--campos-extras", type=int, default=padrao.campos_extras)
+    parser.add_argument("--tamanho-valor", type=int, default=padrao.tamanho_valor)
+    parser.add_argument("--latencia", type=float, default=padrao.latencia, help="segundos por resposta")
+    parser.add_argument("--erros", type=float, default=padrao.taxa_erro, help="fração de respostas HTTP 500")
+    parser.add_argument("--workers", type=int, default=padrao.max_workers)
+    parser.add_argument("--taxa", type=float, default=padrao.taxa,
+                        help="req/s fixos no limitador (padrão: limitador adaptativo de produção)")
+    parser.add_argument("--cenario", action="append", help="roda só este cenário (pode repetir)")
+    parser.add_argument("--json", help="grava as medições neste arquivo")
+    parser.add_argument("--metricas", help="grava resumo e trace (metricas.py) de cada cenário neste diretório")
+    args = parser.parse_args(argv)
+
+    # Só avisos: os logs por linha distorceriam a medição
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    if args.metricas:
+        # Caminho absoluto: o benchmark roda dentro de um diretório temporário
+        metricas.ativar(os.path.abspath(args.metricas))
+
+    cenario = Cenario(
+        itens_por_conceito=args.itens, grupos_por_conceito=args.grupos,
+        campos_extras=args.campos_extras, tamanho_valor=args.tamanho_valor,
+        latencia=args.latencia, taxa_erro=args.erros, max_workers=args.workers, taxa=args.taxa,
+    )
+    resultados = executar_benchmark(cenario, somente=args.cenario)
+    imprimir_relatorio(resultados)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"cenario": asdict(cenario), "resultados": resultados}, f, ensure_ascii=False, indent=2)
+    return resultados
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -5,15 +5,26 @@ e grava os resultados no Google Sheets.
 
 Pode ser chamado com:
     run(url_base, cookies, cliente)
+    run(url_base, cookies, cliente, max_workers=1)  # consultas sequenciais
+    run(url_base, cookies, cliente, delta=True)     # grava só o que mudou
+    run(url_base, cookies, cliente, streaming=True) # memória constante em listas grandes
+    await run_async(url_base, cookies, cliente)     # modo async (aiohttp), no loop do chamador
 """
 
 import json
 import time
+import asyncio
 import logging
+from functools import partial
 from typing import Dict, List
 import requests
-import gspread
-from google.oauth2.service_account import Credentials
+
+import metricas
+import consulta_por_conceito
+from cliente_http import criar_sessao, criar_sessao_async
+from fluxo_json import em_blocos
+from planilhas import gravar_tabela, obter_aba, sincronizar_delta
+from repositorio_local import RepositorioLocal, TIPO_GRUPOS, repositorio_de_espera
 
 # ==============================
 # VARIÁVEIS GLOBAIS
@@ -25,11 +36,15 @@ IDENTIFICADOR_DA_ABA = "5039b8f1-6081-456d-8ef7-371b4fa3cdde"
 SPREADSHEET_ID = "1ijwb6D59j_3KQQaUnMifN88L79qvtuIEJ2Cq-yZv82E"
 WORKSHEET_TITLE = "grupo-informacoes-adicionais"
 
-# Credencial do Sheets (via link público)
-url = "https://drive.google.com/uc?export=download&id=15Pzgk8O1bgbIH3cfdiBz6qwrzEbdfQtF"
-r = requests.get(url)
-open("credencial_sheets.json", "wb").write(r.content)
-SERVICE_ACCOUNT_FILE = "credencial_sheets.json"
+# Credencial do Sheets: carregada só no primeiro uso (ver credenciais.py).
+# None → variável LG_SHEETS_CREDENCIAL, cópia em disco ou download do Drive.
+SERVICE_ACCOUNT_FILE = None
+
+REQUEST_TIMEOUT = (5, 30)  # segundos: (conexão, leitura)
+REQUEST_PAUSE = 0.5  # ritmo inicial do limitador adaptativo (1 / REQUEST_PAUSE req/s)
+RETRIES = 3
+MAX_WORKERS = 4  # consultas simultâneas por cliente (1 = sequencial)
+LOTE_ESCRITA = 1000  # itens por bloco no modo streaming
 
 # Conceitos a consultar
 CONCEITOS: Dict[int, str] = {
@@ -58,48 +73,57 @@ SHEET_HEADER = [
     "ordem",
 ]
 
+# Identificam uma linha na sincronização incremental (delta)
+COLUNAS_CHAVE = ["cliente", "codigo_conceito", "codigo"]
+
 # ==============================
 # Funções auxiliares
 # ==============================
-def build_session(cookie_str: str, base_url: str) -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Accept-Language": "pt-BR,pt;q=0.9",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Connection": "keep-alive",
-        "Origin": base_url,
-        "Referer": f"{base_url}/Gente/Produtos/Infraestrutura/InicioPorParametros/Index",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/141.0.0.0 Safari/537.36",
-        "X-Requested-With": "XMLHttpRequest",
-        "Cookie": cookie_str.strip(),
-    })
-    return s
-
-
-def fetch_grupos_por_conceito(session, url, identificador_da_aba, conceito, retries=3, timeout=30):
-    payload = {"identificadorDaAba": identificador_da_aba, "conceito": str(conceito)}
-    for attempt in range(1, retries + 1):
-        try:
-            resp = session.post(url, data=payload, timeout=timeout)
-            if resp.status_code == 200:
-                return resp.json()
-        except Exception as e:
-            logging.warning(f"Tentativa {attempt}/{retries} falhou para conceito {conceito}: {e}")
-            time.sleep(attempt)
-    return []
+def build_session(cookie_str: str, base_url: str, tamanho_do_pool: int = MAX_WORKERS) -> requests.Session:
+    return criar_sessao(cookie_str, base_url, tamanho_do_pool=tamanho_do_pool)
+
+
+def fetch_grupos_por_conceito(session, url, identificador_da_aba, conceito, retries=RETRIES, timeout=REQUEST_TIMEOUT):
+    """Lista JSON do conceito; ErroLG (cliente_http) se as tentativas se esgotarem."""
+    return consulta_por_conceito.consultar_lista(session, url, identificador_da_aba, conceito, retries, timeout,
+                                                 1 / REQUEST_PAUSE)
+
+
+def iterar_grupos_por_conceito(session, url, identificador_da_aba, conceito, retries=RETRIES, timeout=REQUEST_TIMEOUT):
+    """Como fetch_grupos_por_conceito, mas entrega os itens conforme chegam do socket."""
+    return consulta_por_conceito.iterar_lista(session, url, identificador_da_aba, conceito, retries, timeout,
+                                              1 / REQUEST_PAUSE)
+
+
+def build_session_async(cookie_str: str, base_url: str, limite: int = MAX_WORKERS):
+    return criar_sessao_async(cookie_str, base_url, limite=limite)
+
+
+async def coletar_conceitos_async(session, endpoint, max_concorrencia=MAX_WORKERS):
+    """Como coletar_conceitos (mesma ordem), com até `max_concorrencia` consultas em andamento no loop."""
+    consultar = partial(consulta_por_conceito.consultar_lista_async, session, endpoint, IDENTIFICADOR_DA_ABA,
+                        tentativas=RETRIES, timeout=REQUEST_TIMEOUT, taxa_inicial=1 / REQUEST_PAUSE)
+    return await consulta_por_conceito.coletar_conceitos_async(consultar, CONCEITOS, max_concorrencia)
+
+
+def coletar_conceitos_streaming(session, endpoint):
+    """Igual a coletar_conceitos, mas `dados` é um iterador lido sob demanda (um conceito por vez)."""
+    iterar = partial(iterar_grupos_por_conceito, session, endpoint, IDENTIFICADOR_DA_ABA)
+    return consulta_por_conceito.coletar_conceitos_streaming(iterar, CONCEITOS)
+
+
+def coletar_conceitos(session, endpoint, max_workers=MAX_WORKERS):
+    """
+    Consulta todos os conceitos e devolve (codigo_conceito, descricao_conceito, dados)
+    na mesma ordem de CONCEITOS. Com max_workers > 1 as consultas rodam em paralelo;
+    o ritmo é sempre controlado pelo limitador adaptativo do host.
+    """
+    consultar = partial(fetch_grupos_por_conceito, session, endpoint, IDENTIFICADOR_DA_ABA)
+    return consulta_por_conceito.coletar_conceitos(consultar, CONCEITOS, max_workers)
 
 
 def open_sheet(creds_path, sheet_id, worksheet_title):
-    scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    credentials = Credentials.from_service_account_file(creds_path, scopes=scopes)
-    gc = gspread.authorize(credentials)
-    sh = gc.open_by_key(sheet_id)
-    try:
-        ws = sh.worksheet(worksheet_title)
-    except gspread.WorksheetNotFound:
-        ws = sh.add_worksheet(title=worksheet_title, rows=1000, cols=len(SHEET_HEADER))
-    return ws
+    return obter_aba(sheet_id, worksheet_title, creds_path, criar={"rows": 1000, "cols": len(SHEET_HEADER)})
 
 
 def parse_rows(raw_list, cliente, codigo_conceito, descricao_conceito):
@@ -117,29 +141,92 @@ def parse_rows(raw_list, cliente, codigo_conceito, descricao_conceito):
         ])
     return rows
 
+def registros_de_lotes(lotes, cliente):
+    """Linhas como dicionários {coluna: valor}, no mesmo formato lido da planilha."""
+    for codigo_conceito, descricao_conceito, data in lotes:
+        for row in parse_rows(data, cliente, codigo_conceito, descricao_conceito):
+            yield dict(zip(SHEET_HEADER, row))
+
 # ==============================
 # Execução principal
 # ==============================
-def run(url_base: str, cookies: str, cliente: str):
+@metricas.execucao_medida('buscar_grupo_de_informacao_adicional')
+def run(url_base: str, cookies: str, cliente: str, max_workers: int = MAX_WORKERS, delta: bool = False,
+        worksheet_title: str = WORKSHEET_TITLE, salvar_local: bool = True, streaming: bool = False):
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
-    ws = open_sheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_ID, WORKSHEET_TITLE)
-    ws.clear()
-    ws.update(values=[SHEET_HEADER], range_name="A1")
+    session = build_session(cookies, url_base, max_workers)
+    endpoint = url_base.rstrip("/") + ENDPOINT_PATH
+
+    if streaming and not delta:
+        ws = open_sheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_ID, worksheet_title)
+        total = _run_streaming(ws, session, endpoint, cliente, salvar_local)
+        logging.info(f"✅ Concluído! {total} linhas gravadas no Google Sheets.")
+        return total
+
+    lotes = list(coletar_conceitos(session, endpoint, max_workers))
+    return gravar_lotes(lotes, cliente, delta, worksheet_title, salvar_local)
+
 
-    session = build_session(cookies, url_base)
+@metricas.execucao_medida('buscar_grupo_de_informacao_adicional')
+async def run_async(url_base: str, cookies: str, cliente: str, max_concorrencia: int = MAX_WORKERS,
+                    delta: bool = False, worksheet_title: str = WORKSHEET_TITLE, salvar_local: bool = True):
+    """Como run(), com as consultas em corrotinas (aiohttp); a escrita no Sheets roda numa thread."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
     endpoint = url_base.rstrip("/") + ENDPOINT_PATH
+    async with build_session_async(cookies, url_base, max_concorrencia) as session:
+        lotes = await coletar_conceitos_async(session, endpoint, max_concorrencia)
+    return await asyncio.to_thread(gravar_lotes, lotes, cliente, delta, worksheet_title, salvar_local)
+
+
+def gravar_lotes(lotes, cliente: str, delta: bool = False, worksheet_title: str = WORKSHEET_TITLE,
+                 salvar_local: bool = True):
+    """Grava os lotes já consultados no repositório local e na aba (inteira ou por delta)."""
+    ws = open_sheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_ID, worksheet_title)
+    if salvar_local:
+        with RepositorioLocal() as repo:
+            repo.gravar_coleta(TIPO_GRUPOS, cliente, lotes)
+
     total = 0
     buffer = []
-
-    for codigo_conceito, descricao_conceito in CONCEITOS.items():
-        logging.info(f"Consultando {descricao_conceito} ({codigo_conceito})")
-        data = fetch_grupos_por_conceito(session, endpoint, IDENTIFICADOR_DA_ABA, codigo_conceito)
+    for codigo_conceito, descricao_conceito, data in lotes:
         rows = parse_rows(data, cliente, codigo_conceito, descricao_conceito)
         buffer.extend(rows)
         total += len(rows)
-        time.sleep(0.5)
 
-    if buffer:
-        ws.append_rows(buffer, value_input_option="RAW")
+    if delta:
+        sincronizar_delta(ws, SHEET_HEADER, buffer, COLUNAS_CHAVE, {"cliente": cliente})
+    else:
+        gravar_tabela(ws, SHEET_HEADER, buffer)
 
     logging.info(f"✅ Concluído! {total} linhas gravadas no Google Sheets.")
+    return total
+
+
+def _run_streaming(ws, session, endpoint, cliente, salvar_local):
+    """
+    Itens → repositório local (área de espera em SQLite) em blocos de
+    LOTE_ESCRITA, conforme chegam. A aba só é substituída depois que todos os
+    conceitos foram lidos; só então a coleta é marcada como concluída no
+    repositório. Uma falha na coleta mantém a aba anterior e descarta a coleta
+    parcial.
+    """
+    with repositorio_de_espera(salvar_local) as repo:
+        buscado_em = time.time()
+        total = 0
+        try:
+            for codigo_conceito, descricao_conceito, itens in coletar_conceitos_streaming(session, endpoint):
+                for bloco in em_blocos(itens, LOTE_ESCRITA):
+                    repo.gravar_coleta(TIPO_GRUPOS, cliente, [(codigo_conceito, descricao_conceito, bloco)],
+                                       buscado_em, concluir=False)
+                    total += len(bloco)
+        except BaseException:
+            repo.descartar_coleta(TIPO_GRUPOS, cliente, buscado_em)
+            raise
+        repo.concluir_coleta(TIPO_GRUPOS, cliente, buscado_em)
+
+        linhas = (
+            row
+            for codigo_conceito, descricao_conceito, bloco in repo.iterar_lotes(TIPO_GRUPOS, cliente, buscado_em)
+            for row in parse_rows(bloco, cliente, codigo_conceito, descricao_conceito)
+        )
+        return gravar_tabela(ws, SHEET_HEADER, linhas, total=total)
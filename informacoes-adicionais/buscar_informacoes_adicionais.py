@@ -5,15 +5,26 @@ e grava os resultados no Google Sheets.
 
 Pode ser chamado com:
     run(url_base, cookies, cliente)
+    run(url_base, cookies, cliente, max_workers=1)  # consultas sequenciais
+    run(url_base, cookies, cliente, delta=True)     # grava só o que mudou
+    run(url_base, cookies, cliente, streaming=True) # memória constante em listas grandes
+    await run_async(url_base, cookies, cliente)     # modo async (aiohttp), no loop do chamador
 """
 
 import json
 import time
+import asyncio
 import logging
-from typing import Dict, List, Any
+from functools import partial
+from typing import Dict, Any
 import requests
-import gspread
-from google.oauth2.service_account import Credentials
+
+import metricas
+import consulta_por_conceito
+from cliente_http import criar_sessao, criar_sessao_async
+from fluxo_json import em_blocos
+from planilhas import gravar_tabela, obter_aba, sincronizar_delta
+from repositorio_local import RepositorioLocal, TIPO_INFORMACOES, repositorio_de_espera
 
 # ==============================
 # VARIÁVEIS GLOBAIS
@@ -24,15 +35,15 @@ IDENTIFICADOR_DA_ABA = "5039b8f1-6081-456d-8ef7-371b4fa3cdde"
 SPREADSHEET_ID = "1ijwb6D59j_3KQQaUnMifN88L79qvtuIEJ2Cq-yZv82E"
 WORKSHEET_TITLE = "informacoes-adicionais"
 
-# Credencial do Sheets
-url = "https://drive.google.com/uc?export=download&id=15Pzgk8O1bgbIH3cfdiBz6qwrzEbdfQtF"
-r = requests.get(url)
-open("credencial_sheets.json", "wb").write(r.content)
-SERVICE_ACCOUNT_FILE = "credencial_sheets.json"
+# Credencial do Sheets: carregada só no primeiro uso (ver credenciais.py).
+# None → variável LG_SHEETS_CREDENCIAL, cópia em disco ou download do Drive.
+SERVICE_ACCOUNT_FILE = None
 
-REQUEST_TIMEOUT = 30
-REQUEST_PAUSE = 0.5
+REQUEST_TIMEOUT = (5, 30)  # segundos: (conexão, leitura)
+REQUEST_PAUSE = 0.5  # ritmo inicial do limitador adaptativo (1 / REQUEST_PAUSE req/s)
 RETRIES = 3
+MAX_WORKERS = 4  # consultas simultâneas por cliente (1 = sequencial)
+LOTE_ESCRITA = 1000  # itens por bloco no modo streaming
 
 CONCEITOS: Dict[int, str] = {
     1000: "Centro de Custos",
@@ -50,141 +61,265 @@ CONCEITOS: Dict[int, str] = {
     1194: "Autônomo",
 }
 
+HEADER_PREFIX = [
+    "cliente",
+    "descricao_conceito",
+    "modulo",
+    "codigo_conceito",
+    "codigo_informacao_adicional",
+    "descricao_informacao_adicional",
+]
+
+# Identificam uma linha na sincronização incremental (delta)
+COLUNAS_CHAVE = ["cliente", "codigo_conceito", "Codigo"]
+
+# Usadas no cabeçalho quando nenhum conceito retorna itens
+COLUNAS_PADRAO = [
+    "Id", "TipoEntidade", "Codigo", "Descricao", "Status",
+    "Observacao", "Obrigatorio", "DescricaoDoTipo", "Mascara",
+    "FormaDeApresentacaoSelUnica", "FormaDeApresentacaoSelMultipla",
+    "ValorPadrao", "Ordem"
+]
+
 # ==============================
 # FUNÇÕES AUXILIARES
 # ==============================
-def build_session(cookie_str: str, base_url: str) -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Accept-Language": "pt-BR,pt;q=0.9",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Connection": "keep-alive",
-        "Origin": base_url,
-        "Referer": f"{base_url}/Gente/Produtos/Infraestrutura/InicioPorParametros/Index",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/141.0.0.0 Safari/537.36",
-        "X-Requested-With": "XMLHttpRequest",
-        "Cookie": cookie_str.strip(),
-    })
-    return s
-
-
-def fetch_informacoes(session, url, identificador_da_aba, conceito, retries=3, timeout=30):
-    payload = {"identificadorDaAba": identificador_da_aba, "conceito": str(conceito)}
-    for attempt in range(1, retries + 1):
-        try:
-            resp = session.post(url, data=payload, timeout=timeout)
-            if resp.status_code == 200:
-                return resp.json()
-        except Exception as e:
-            logging.warning(f"Tentativa {attempt}/{retries} falhou para conceito {conceito}: {e}")
-            time.sleep(attempt)
-    return []
+def build_session(cookie_str: str, base_url: str, tamanho_do_pool: int = MAX_WORKERS) -> requests.Session:
+    return criar_sessao(cookie_str, base_url, tamanho_do_pool=tamanho_do_pool)
+
+
+def fetch_informacoes(session, url, identificador_da_aba, conceito, retries=RETRIES, timeout=REQUEST_TIMEOUT):
+    """Lista JSON do conceito; ErroLG (cliente_http) se as tentativas se esgotarem."""
+    return consulta_por_conceito.consultar_lista(session, url, identificador_da_aba, conceito, retries, timeout,
+                                                 1 / REQUEST_PAUSE)
+
+
+def iterar_informacoes(session, url, identificador_da_aba, conceito, retries=RETRIES, timeout=REQUEST_TIMEOUT):
+    """Como fetch_informacoes, mas entrega os itens conforme chegam do socket."""
+    return consulta_por_conceito.iterar_lista(session, url, identificador_da_aba, conceito, retries, timeout,
+                                              1 / REQUEST_PAUSE)
+
+
+def build_session_async(cookie_str: str, base_url: str, limite: int = MAX_WORKERS):
+    return criar_sessao_async(cookie_str, base_url, limite=limite)
+
+
+async def coletar_conceitos_async(session, endpoint, max_concorrencia=MAX_WORKERS):
+    """Como coletar_conceitos (mesma ordem), com até `max_concorrencia` consultas em andamento no loop."""
+    consultar = partial(consulta_por_conceito.consultar_lista_async, session, endpoint, IDENTIFICADOR_DA_ABA,
+                        tentativas=RETRIES, timeout=REQUEST_TIMEOUT, taxa_inicial=1 / REQUEST_PAUSE)
+    return await consulta_por_conceito.coletar_conceitos_async(consultar, CONCEITOS, max_concorrencia)
+
+
+def coletar_conceitos_streaming(session, endpoint):
+    """Igual a coletar_conceitos, mas `dados` é um iterador lido sob demanda (um conceito por vez)."""
+    iterar = partial(iterar_informacoes, session, endpoint, IDENTIFICADOR_DA_ABA)
+    return consulta_por_conceito.coletar_conceitos_streaming(iterar, CONCEITOS)
+
+
+def coletar_conceitos(session, endpoint, max_workers=MAX_WORKERS):
+    """
+    Consulta todos os conceitos e devolve (codigo_conceito, descricao_conceito, dados)
+    na mesma ordem de CONCEITOS. Com max_workers > 1 as consultas rodam em paralelo;
+    o ritmo é sempre controlado pelo limitador adaptativo do host.
+    """
+    consultar = partial(fetch_informacoes, session, endpoint, IDENTIFICADOR_DA_ABA)
+    return consulta_por_conceito.coletar_conceitos(consultar, CONCEITOS, max_workers)
 
 
 def open_sheet(creds_path, sheet_id, worksheet_title):
-    scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    credentials = Credentials.from_service_account_file(creds_path, scopes=scopes)
-    gc = gspread.authorize(credentials)
-    sh = gc.open_by_key(sheet_id)
-    try:
-        ws = sh.worksheet(worksheet_title)
-    except gspread.WorksheetNotFound:
-        ws = sh.add_worksheet(title=worksheet_title, rows=2000, cols=60)
-    return ws
+    return obter_aba(sheet_id, worksheet_title, creds_path, criar={"rows": 2000, "cols": 60})
+
+
+# Mesmo texto de json.dumps(v, ensure_ascii=False), formato das exportações existentes
+# (o delta compara célula a célula); o encoder é criado uma vez, não a cada chamada
+_CODIFICADOR_JSON = json.JSONEncoder(ensure_ascii=False)
+
+
+def serializar_json(v) -> str:
+    """JSON de um valor aninhado, idêntico ao de json.dumps(v, ensure_ascii=False)."""
+    return _CODIFICADOR_JSON.encode(v)
 
 
 def normalize_value(v: Any) -> Any:
     """Converte dicts e listas para JSON string."""
     if isinstance(v, (dict, list)):
         try:
-            return json.dumps(v, ensure_ascii=False)
+            return serializar_json(v)
         except Exception:
             return str(v)
     return v
 
 
-def parse_rows(data, cliente, codigo_conceito, descricao_conceito):
+class CodificadorDeLinhas:
+    """
+    Codificador de linhas compilado uma vez por esquema: a ordem das colunas é
+    fixa e só as colunas que trazem dict/list passam pelo serializador JSON.
+    """
+
+    __slots__ = ("colunas", "_aninhadas")
+
+    def __init__(self, colunas, aninhadas=()):
+        self.colunas = tuple(colunas)
+        self._aninhadas = tuple(i for i, k in enumerate(self.colunas) if k in aninhadas)
+
+    def __call__(self, item, prefixo):
+        valores = list(map(item.get, self.colunas))
+        for i in self._aninhadas:
+            v = valores[i]
+            if isinstance(v, (dict, list)):
+                valores[i] = normalize_value(v)
+        return prefixo + valores
+
+
+def registros_de_lotes(lotes, cliente):
+    """Linhas como dicionários {coluna: valor}, no mesmo formato lido da planilha."""
+    all_keys, aninhadas = inferir_esquema(lotes)
+    all_keys = all_keys or list(COLUNAS_PADRAO)
+    codificador = CodificadorDeLinhas(all_keys, aninhadas)
+    header = HEADER_PREFIX + all_keys
+    for codigo_conceito, descricao_conceito, data in lotes:
+        for row in parse_rows(data, cliente, codigo_conceito, descricao_conceito, codificador=codificador):
+            yield dict(zip(header, row))
+
+
+def inferir_aninhadas(itens) -> set:
+    """Chaves que trazem dict/list em algum dos itens."""
+    return {k for item in itens for k, v in item.items() if isinstance(v, (dict, list))}
+
+
+def inferir_esquema(lotes):
+    """(colunas, aninhadas): união ordenada das chaves de todos os itens e as que precisam de JSON."""
+    chaves, aninhadas = set(), set()
+    for _, _, data in lotes:
+        for item in data:
+            chaves.update(item.keys())
+        aninhadas |= inferir_aninhadas(data)
+    return sorted(chaves), aninhadas
+
+
+def parse_rows(data, cliente, codigo_conceito, descricao_conceito, colunas=None, codificador=None):
+    """
+    Monta as linhas da planilha. `codificador` (ou `colunas`, compiladas na hora)
+    fixa a ordem das chaves de cada item; sem nenhum dos dois, cada linha usa as
+    próprias chaves ordenadas.
+    """
+    if codificador is None and colunas is not None:
+        codificador = CodificadorDeLinhas(colunas, inferir_aninhadas(data))
+
     rows = []
     for item in data:
         grupo = item.get("DtoGrupoDeInformacoesAdicionais", {}) or {}
         entidade = grupo.get("DtoEntidadeInformacaoAdicional", {}) or {}
-        codigo_inf = grupo.get("Codigo")
-        desc_inf = grupo.get("Descricao")
-        modulo = entidade.get("Modulo")
-
-        flat = {k: normalize_value(v) for k, v in item.items()}
 
         prefixo = [
             cliente,
             descricao_conceito,
-            modulo,
+            entidade.get("Modulo"),
             codigo_conceito,
-            codigo_inf,
-            desc_inf,
+            grupo.get("Codigo"),
+            grupo.get("Descricao"),
         ]
-        resto = [flat.get(k) for k in sorted(flat.keys())]
-        rows.append(prefixo + resto)
+        if codificador is not None:
+            rows.append(codificador(item, prefixo))
+        else:
+            rows.append(prefixo + [normalize_value(item.get(k)) for k in sorted(item.keys())])
     return rows
 
 # ==============================
 # EXECUÇÃO PRINCIPAL
 # ==============================
-def run(url_base: str, cookies: str, cliente: str):
+@metricas.execucao_medida('buscar_informacoes_adicionais')
+def run(url_base: str, cookies: str, cliente: str, max_workers: int = MAX_WORKERS, delta: bool = False,
+        worksheet_title: str = WORKSHEET_TITLE, salvar_local: bool = True, streaming: bool = False):
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
-    ws = open_sheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_ID, WORKSHEET_TITLE)
-    ws.clear()
+    session = build_session(cookies, url_base, max_workers)
+    endpoint = url_base.rstrip("/") + ENDPOINT_PATH
+
+    if streaming and not delta:
+        ws = open_sheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_ID, worksheet_title)
+        total = _run_streaming(ws, session, endpoint, cliente, salvar_local)
+        logging.info(f"✅ Concluído! {total} linhas gravadas na aba '{worksheet_title}'.")
+        return total
+
+    # Uma única passada pelos conceitos; o cabeçalho sai da união das chaves
+    lotes = list(coletar_conceitos(session, endpoint, max_workers))
+    return gravar_lotes(lotes, cliente, delta, worksheet_title, salvar_local)
+
+
+@metricas.execucao_medida('buscar_informacoes_adicionais')
+async def run_async(url_base: str, cookies: str, cliente: str, max_concorrencia: int = MAX_WORKERS,
+                    delta: bool = False, worksheet_title: str = WORKSHEET_TITLE, salvar_local: bool = True):
+    """Como run(), com as consultas em corrotinas (aiohttp); a escrita no Sheets roda numa thread."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
-    session = build_session(cookies, url_base)
     endpoint = url_base.rstrip("/") + ENDPOINT_PATH
+    async with build_session_async(cookies, url_base, max_concorrencia) as session:
+        lotes = await coletar_conceitos_async(session, endpoint, max_concorrencia)
+    return await asyncio.to_thread(gravar_lotes, lotes, cliente, delta, worksheet_title, salvar_local)
 
-    # Gera cabeçalho dinâmico
-    header_prefix = [
-        "cliente",
-        "descricao_conceito",
-        "modulo",
-        "codigo_conceito",
-        "codigo_informacao_adicional",
-        "descricao_informacao_adicional",
-    ]
-
-    exemplo = None
-    for c in CONCEITOS:
-        exemplo = fetch_informacoes(session, endpoint, IDENTIFICADOR_DA_ABA, c)
-        if exemplo:
-            break
-
-    if exemplo:
-        all_keys = sorted(exemplo[0].keys())
-    else:
-        all_keys = [
-            "Id", "TipoEntidade", "Codigo", "Descricao", "Status",
-            "Observacao", "Obrigatorio", "DescricaoDoTipo", "Mascara",
-            "FormaDeApresentacaoSelUnica", "FormaDeApresentacaoSelMultipla",
-            "ValorPadrao", "Ordem"
-        ]
 
-    header = header_prefix + all_keys
-    ws.update("A1", [header])
+def gravar_lotes(lotes, cliente: str, delta: bool = False, worksheet_title: str = WORKSHEET_TITLE,
+                 salvar_local: bool = True):
+    """Grava os lotes já consultados no repositório local e na aba (inteira ou por delta)."""
+    if salvar_local:
+        with RepositorioLocal() as repo:
+            repo.gravar_coleta(TIPO_INFORMACOES, cliente, lotes)
+    all_keys, aninhadas = inferir_esquema(lotes)
+    all_keys = all_keys or list(COLUNAS_PADRAO)
+    codificador = CodificadorDeLinhas(all_keys, aninhadas)
+    header = HEADER_PREFIX + all_keys
 
-    total = 0
-    buffer = []
+    ws = open_sheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_ID, worksheet_title)
 
-    for codigo_conceito, descricao_conceito in CONCEITOS.items():
-        logging.info(f"Consultando {descricao_conceito} ({codigo_conceito})")
-        data = fetch_informacoes(session, endpoint, IDENTIFICADOR_DA_ABA, codigo_conceito)
-        rows = parse_rows(data, cliente, codigo_conceito, descricao_conceito)
-        buffer.extend(rows)
-        total += len(rows)
+    if delta:
+        rows = []
+        for codigo_conceito, descricao_conceito, data in lotes:
+            rows.extend(parse_rows(data, cliente, codigo_conceito, descricao_conceito, codificador=codificador))
+        sincronizar_delta(ws, header, rows, COLUNAS_CHAVE, {"cliente": cliente})
+        logging.info(f"✅ Concluído! {len(rows)} linhas sincronizadas na aba '{worksheet_title}'.")
+        return len(rows)
 
-        if len(buffer) >= 1000:
-            ws.append_rows(buffer, value_input_option="RAW")
-            buffer.clear()
+    rows = []
+    for codigo_conceito, descricao_conceito, data in lotes:
+        rows.extend(parse_rows(data, cliente, codigo_conceito, descricao_conceito, codificador=codificador))
+    total = gravar_tabela(ws, header, rows)
 
-        time.sleep(REQUEST_PAUSE)
+    logging.info(f"✅ Concluído! {total} linhas gravadas na aba '{worksheet_title}'.")
+    return total
 
-    if buffer:
-        ws.append_rows(buffer, value_input_option="RAW")
 
-    logging.info(f"✅ Concluído! {total} linhas gravadas na aba '{WORKSHEET_TITLE}'.")
+def _run_streaming(ws, session, endpoint, cliente, salvar_local):
+    """
+    Itens → repositório local (área de espera em SQLite) em blocos de
+    LOTE_ESCRITA, conforme chegam. A aba só é substituída depois que todos os
+    conceitos foram lidos, com as colunas na mesma ordem de run() sem
+    streaming; só então a coleta é marcada como concluída no repositório.
+    Uma falha na coleta mantém a aba anterior e descarta a coleta parcial.
+    """
+    with repositorio_de_espera(salvar_local) as repo:
+        buscado_em = time.time()
+        chaves, aninhadas, total = set(), set(), 0
+        try:
+            for codigo_conceito, descricao_conceito, itens in coletar_conceitos_streaming(session, endpoint):
+                for bloco in em_blocos(itens, LOTE_ESCRITA):
+                    repo.gravar_coleta(TIPO_INFORMACOES, cliente, [(codigo_conceito, descricao_conceito, bloco)],
+                                       buscado_em, concluir=False)
+                    for item in bloco:
+                        chaves.update(item.keys())
+                    aninhadas |= inferir_aninhadas(bloco)
+                    total += len(bloco)
+        except BaseException:
+            repo.descartar_coleta(TIPO_INFORMACOES, cliente, buscado_em)
+            raise
+        repo.concluir_coleta(TIPO_INFORMACOES, cliente, buscado_em)
+
+        all_keys = sorted(chaves) or list(COLUNAS_PADRAO)
+        codificador = CodificadorDeLinhas(all_keys, aninhadas)
+        linhas = (
+            row
+            for codigo_conceito, descricao_conceito, bloco in repo.iterar_lotes(TIPO_INFORMACOES, cliente, buscado_em)
+            for row in parse_rows(bloco, cliente, codigo_conceito, descricao_conceito, codificador=codificador)
+        )
+        return gravar_tabela(ws, HEADER_PREFIX + all_keys, linhas, total=total)
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Cliente HTTP compartilhado por todas as chamadas ao portal LG.
+
+Reúne o que antes estava copiado em cada módulo (build_session, laço de
+tentativas, limitador e métricas):
+  - sessão com pool de conexões do tamanho da concorrência configurada;
+  - timeouts separados de conexão e de leitura;
+  - novas tentativas para falhas de rede, 429 e 5xx, com espera exponencial
+    com jitter (ou o Retry-After enviado pelo servidor);
+  - erros tipados quando as tentativas se esgotam, em vez de listas vazias.
+
+Uso:
+    session = criar_sessao(cookies, url_base, tamanho_do_pool=8)
+    resp = post(session, url, data=payload)           # 200 ou ErroLG
+    dados = json_da_resposta(resp)                    # RespostaInvalida se não for JSON
+
+Modo async (requer aiohttp), mesmas tentativas, limitador e erros:
+    async with criar_sessao_async(cookies, url_base, limite=50) as session:
+        dados = json_do_corpo(await post_async(session, url, data=payload), url)
+"""
+
+import json
+import time
+import random
+import asyncio
+import logging
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:  # dependência opcional; só o modo async (run_async) precisa dela
+    aiohttp = None
+
+import metricas
+from controle_de_taxa import obter_limitador
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+TIMEOUT_CONEXAO = 5    # segundos para abrir a conexão
+TIMEOUT_LEITURA = 30   # segundos sem receber dados da resposta
+TENTATIVAS = 3
+ESPERA_BASE = 1.0      # segundos; dobra a cada tentativa (com jitter)
+ESPERA_MAXIMA = 30.0
+TAMANHO_DO_POOL = 4    # conexões mantidas por host
+
+STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+
+ACCEPT_JSON = "application/json, text/javascript, */*; q=0.01"
+
+
+# ==============================
+# ERROS
+# ==============================
+class ErroLG(Exception):
+    """Falha definitiva de uma chamada ao portal (depois das tentativas)."""
+
+    def __init__(self, mensagem: str, url: str = None):
+        super().__init__(mensagem)
+        self.url = url
+
+
+class ErroDeConexao(ErroLG):
+    """Timeout ou falha de rede em todas as tentativas."""
+
+
+class ErroHTTP(ErroLG):
+    """Resposta com status diferente de 200."""
+
+    def __init__(self, status: int, url: str = None):
+        super().__init__(f"Erro HTTP {status}", url)
+        self.status = status
+
+
+class RespostaInvalida(ErroLG):
+    """Resposta 200 cujo corpo não é JSON (ex.: página de login de uma sessão expirada)."""
+
+
+# ==============================
+# SESSÃO
+# ==============================
+def _cabecalhos(cookie_str: str, base_url: str, accept: str) -> dict:
+    return {
+        "Accept": accept,
+        "Accept-Language": "pt-BR,pt;q=0.9",
+        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+        "Connection": "keep-alive",
+        "Origin": base_url,
+        "Referer": f"{base_url}/Gente/Produtos/Infraestrutura/InicioPorParametros/Index",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/141.0.0.0 Safari/537.36",
+        "X-Requested-With": "XMLHttpRequest",
+        "Cookie": cookie_str.strip(),
+    }
+
+
+def criar_sessao(cookie_str: str, base_url: str, accept: str = ACCEPT_JSON,
+                 tamanho_do_pool: int = TAMANHO_DO_POOL) -> requests.Session:
+    s = requests.Session()
+    s.headers.update(_cabecalhos(cookie_str, base_url, accept))
+    # Uma conexão por thread em uso; as tentativas são feitas por post(), não pelo urllib3
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, tamanho_do_pool), max_retries=0)
+    s.mount("https://", adaptador)
+    s.mount("http://", adaptador)
+    return s
+
+
+# ==============================
+# TENTATIVAS
+# ==============================
+def espera_retry_after(resp) -> float:
+    """Segundos pedidos pelo cabeçalho Retry-After (número ou data HTTP); None se ausente/inválido."""
+    valor = resp.headers.get("Retry-After") if resp is not None else None
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def espera_da_tentativa(tentativa: int, resp=None) -> float:
+    """Retry-After quando presente; senão backoff exponencial com jitter completo."""
+    pedida = espera_retry_after(resp)
+    if pedida is not None:
+        return min(pedida, ESPERA_MAXIMA)
+    return random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** (tentativa - 1)))
+
+
+def post(session: requests.Session, url: str, data=None, tentativas: int = TENTATIVAS,
+         timeout=(TIMEOUT_CONEXAO, TIMEOUT_LEITURA), stream: bool = False, taxa_inicial: float = 2.0,
+         allow_redirects: bool = True, **rotulos) -> requests.Response:
+    """
+    POST com limitador do host, métricas e novas tentativas. Devolve a resposta
+    200 (com stream=True, ainda não lida); levanta ErroDeConexao ou ErroHTTP.
+    Status fora de STATUS_RETENTAVEIS (ex.: 401, 404 e, com allow_redirects=False,
+    302) falham na hora.
+    """
+    limitador = obter_limitador(url, taxa_inicial=taxa_inicial)
+    endpoint = metricas.rotulo_endpoint(url)
+    contexto = endpoint + "".join(f" {k}={v}" for k, v in rotulos.items())
+    for tentativa in range(1, tentativas + 1):
+        if tentativa > 1:
+            metricas.contar("http.retentativa", endpoint=endpoint, **rotulos)
+        limitador.aguardar()
+        inicio = time.monotonic()
+        try:
+            with metricas.medir("http.post", "http", endpoint=endpoint, **rotulos) as medidos:
+                resp = session.post(url, data=data, timeout=timeout, stream=stream, allow_redirects=allow_redirects)
+                medidos["resultado"] = resp.status_code
+        except (requests.ConnectionError, requests.Timeout) as e:
+            limitador.registrar(None, time.monotonic() - inicio)
+            logging.warning(f"Tentativa {tentativa}/{tentativas} falhou em {contexto}: {e}")
+            if tentativa == tentativas:
+                metricas.contar("http.tentativas_esgotadas", endpoint=endpoint, **rotulos)
+                raise ErroDeConexao(f"Erro: {e}", url) from e
+            metricas.pausar(espera_da_tentativa(tentativa), "pausa.retentativa", endpoint=endpoint)
+            continue
+
+        limitador.registrar(resp.status_code, time.monotonic() - inicio)
+        if resp.status_code == 200:
+            return resp
+
+        resp.close()
+        if resp.status_code not in STATUS_RETENTAVEIS:
+            raise ErroHTTP(resp.status_code, url)
+        logging.warning(f"Tentativa {tentativa}/{tentativas} falhou em {contexto}: HTTP {resp.status_code}")
+        if tentativa == tentativas:
+            metricas.contar("http.tentativas_esgotadas", endpoint=endpoint, **rotulos)
+            raise ErroHTTP(resp.status_code, url)
+        metricas.pausar(espera_da_tentativa(tentativa, resp), "pausa.retentativa", endpoint=endpoint)
+
+
+def json_da_resposta(resp: requests.Response, **rotulos):
+    with metricas.medir("http.json", "http", endpoint=metricas.rotulo_endpoint(resp.url), **rotulos):
+        try:
+            return resp.json()
+        except ValueError as e:
+            raise RespostaInvalida("Resposta inválida (não-JSON)", resp.url) from e
+
+
+# ==============================
+# MODO ASYNC (aiohttp)
+# ==============================
+def criar_sessao_async(cookie_str: str, base_url: str, accept: str = ACCEPT_JSON, limite: int = TAMANHO_DO_POOL):
+    """
+    aiohttp.ClientSession com os mesmos cabeçalhos de criar_sessao e até `limite`
+    conexões com o host. Deve ser criada (e fechada, com async with) dentro do loop.
+    """
+    if aiohttp is None:
+        raise RuntimeError("O modo async requer o pacote aiohttp (pip install aiohttp).")
+    return aiohttp.ClientSession(
+        headers=_cabecalhos(cookie_str, base_url, accept),
+        connector=aiohttp.TCPConnector(limit=max(1, limite)),
+        cookie_jar=aiohttp.DummyCookieJar(),  # como no requests, vale só o cabeçalho Cookie
+    )
+
+
+async def post_async(session, url: str, data=None, tentativas: int = TENTATIVAS,
+                     timeout=(TIMEOUT_CONEXAO, TIMEOUT_LEITURA), taxa_inicial: float = 2.0, **rotulos) -> bytes:
+    """Como post(), numa sessão aiohttp; devolve o corpo da resposta 200 já lido."""
+    limitador = obter_limitador(url, taxa_inicial=taxa_inicial)
+    endpoint = metricas.rotulo_endpoint(url)
+    contexto = endpoint + "".join(f" {k}={v}" for k, v in rotulos.items())
+    conexao, leitura = timeout
+    limites = aiohttp.ClientTimeout(sock_connect=conexao, sock_read=leitura)
+    for tentativa in range(1, tentativas + 1):
+        if tentativa > 1:
+            metricas.contar("http.retentativa", endpoint=endpoint, **rotulos)
+        await limitador.aguardar_async()
+        inicio = time.monotonic()
+        try:
+            with metricas.medir("http.post", "http", endpoint=endpoint, **rotulos) as medidos:
+                async with session.post(url, data=data, timeout=limites) as resp:
+                    medidos["resultado"] = resp.status
+                    corpo = await resp.read() if resp.status == 200 else None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            limitador.registrar(None, time.monotonic() - inicio)
+            logging.warning(f"Tentativa {tentativa}/{tentativas} falhou em {contexto}: {e!r}")
+            if tentativa == tentativas:
+                metricas.contar("http.tentativas_esgotadas", endpoint=endpoint, **rotulos)
+                raise ErroDeConexao(f"Erro: {e!r}", url) from e
+            await metricas.pausar_async(espera_da_tentativa(tentativa), "pausa.retentativa", endpoint=endpoint)
+            continue
+
+        limitador.registrar(resp.status, time.monotonic() - inicio)
+        if resp.status == 200:
+            return corpo
+
+        if resp.status not in STATUS_RETENTAVEIS:
+            raise ErroHTTP(resp.status, url)
+        logging.warning(f"Tentativa {tentativa}/{tentativas} falhou em {contexto}: HTTP {resp.status}")
+        if tentativa == tentativas:
+            metricas.contar("http.tentativas_esgotadas", endpoint=endpoint, **rotulos)
+            raise ErroHTTP(resp.status, url)
+        await metricas.pausar_async(espera_da_tentativa(tentativa, resp), "pausa.retentativa", endpoint=endpoint)
+
+
+def json_do_corpo(corpo: bytes, url: str, **rotulos):
+    """Como json_da_resposta, para o corpo devolvido por post_async."""
+    with metricas.medir("http.json", "http", endpoint=metricas.rotulo_endpoint(url), **rotulos):
+        try:
+            return json.loads(corpo)
+        except ValueError as e:
+            raise RespostaInvalida("Resposta inválida (não-JSON)", url) from e
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Obtenção do código 2FA enviado pela LG por e-mail.
+
+O ProvedorDeCodigo2FA guarda uma marca d'água (os e-mails que já existiam)
+antes do envio da senha e depois consulta a caixa em intervalos curtos e
+crescentes, lendo só o snippet das mensagens novas. O login continua assim
+que o e-mail chega, sem esperar um intervalo fixo.
+
+O backend é plugável:
+  - BackendGmail: Gmail API (serviço construído uma única vez por processo);
+  - CaixaPostalLocal: caixa em memória para testes e execuções offline.
+
+Uso:
+    provedor = ProvedorDeCodigo2FA(BackendGmail(credentials_path, token_path))
+    provedor.preparar()            # antes de enviar a senha
+    ...
+    codigo = provedor.aguardar_codigo()
+"""
+
+import os
+import re
+import time
+import logging
+import itertools
+import threading
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
+CONSULTA_GMAIL = "from:cloud@lg.com.br newer_than:1d"
+PADRAO_CODIGO = re.compile(r"\b\d{6}\b")
+
+TEMPO_MAXIMO = 60.0      # segundos aguardando o e-mail
+INTERVALO_INICIAL = 0.5  # primeira espera entre consultas
+INTERVALO_MAXIMO = 3.0   # teto das esperas (crescem 1,5× a cada consulta)
+
+
+# ==============================
+# BACKEND GMAIL
+# ==============================
+_servicos = {}
+_servicos_lock = threading.Lock()
+
+
+def obter_servico_gmail(credentials_path: str, token_path: str, scopes=SCOPES):
+    """Autentica no Gmail e constrói o serviço uma única vez por token."""
+    with _servicos_lock:
+        if token_path in _servicos:
+            return _servicos[token_path]
+
+        from google.oauth2.credentials import Credentials
+        from googleapiclient.discovery import build
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+
+        creds = None
+        if os.path.exists(token_path):
+            creds = Credentials.from_authorized_user_file(token_path, scopes)
+
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(credentials_path, scopes)
+                creds = flow.run_local_server(port=0)
+
+            with open(token_path, "w") as token:
+                token.write(creds.to_json())
+
+        _servicos[token_path] = build("gmail", "v1", credentials=creds, cache_discovery=False)
+        return _servicos[token_path]
+
+
+class BackendGmail:
+    def __init__(self, credentials_path: str, token_path: str, consulta: str = CONSULTA_GMAIL):
+        self.servico = obter_servico_gmail(credentials_path, token_path)
+        self.consulta = consulta
+
+    def listar_ids(self):
+        """IDs das mensagens mais recentes que batem com a consulta."""
+        resultado = self.servico.users().messages().list(
+            userId="me", q=self.consulta, maxResults=5
+        ).execute()
+        return [m["id"] for m in resultado.get("messages", [])]
+
+    def ler_texto(self, id_mensagem: str) -> str:
+        # format="minimal" traz só id, labels e snippet — sem corpo nem anexos
+        msg = self.servico.users().messages().get(
+            userId="me", id=id_mensagem, format="minimal"
+        ).execute()
+        return msg.get("snippet", "")
+
+
+# ==============================
+# BACKEND LOCAL (FAKE)
+# ==============================
+class CaixaPostalLocal:
+    """Caixa de entrada em memória; use entregar() para simular o e-mail da LG."""
+
+    def __init__(self):
+        self._mensagens = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def entregar(self, texto: str):
+        with self._lock:
+            self._mensagens.insert(0, (str(next(self._ids)), texto))
+
+    def listar_ids(self):
+        with self._lock:
+            return [id_mensagem for id_mensagem, _ in self._mensagens]
+
+    def ler_texto(self, id_mensagem: str) -> str:
+        with self._lock:
+            return next(texto for i, texto in self._mensagens if i == id_mensagem)
+
+
+# ==============================
+# PROVEDOR
+# ==============================
+class ProvedorDeCodigo2FA:
+    def __init__(self, backend):
+        self.backend = backend
+        self._vistos = None
+
+    def preparar(self):
+        """Registra a marca d'água; chamar antes de enviar a senha."""
+        self._vistos = set(self.backend.listar_ids())
+
+    def aguardar_codigo(self, tempo_maximo: float = TEMPO_MAXIMO,
+                        intervalo_inicial: float = INTERVALO_INICIAL,
+                        intervalo_maximo: float = INTERVALO_MAXIMO):
+        """Devolve o código de 6 dígitos do primeiro e-mail novo, ou None ao estourar o tempo."""
+        if self._vistos is None:
+            self.preparar()
+
+        limite = time.monotonic() + tempo_maximo
+        intervalo = intervalo_inicial
+        while True:
+            try:
+                for id_mensagem in self.backend.listar_ids():
+                    if id_mensagem in self._vistos:
+                        continue
+                    self._vistos.add(id_mensagem)
+                    m = PADRAO_CODIGO.search(self.backend.ler_texto(id_mensagem))
+                    if m:
+                        return m.group(0)
+            except Exception as e:
+                logging.warning(f"⚠️ Erro ao buscar código 2FA: {e}")
+
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return None
+            time.sleep(min(intervalo, restante))
+            intervalo = min(intervalo * 1.5, intervalo_maximo)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Consulta das listas ObtenhaLista* conceito a conceito, compartilhada pelos
+módulos buscar_* (e, por eles, pela leitura do destino nos salvar_*).
+
+Cada módulo informa as próprias constantes (endpoint, identificador da aba,
+conceitos, tentativas, timeout e ritmo inicial); os modos sequencial, em
+threads, em streaming e async seguem o mesmo caminho: cliente_http para o
+POST e fluxo_json para exigir uma lista JSON.
+
+Uso:
+    consultar = functools.partial(consultar_lista, session, endpoint, identificador_da_aba,
+                                  tentativas=3, timeout=(5, 30), taxa_inicial=2.0)
+    for codigo_conceito, descricao_conceito, dados in coletar_conceitos(consultar, CONCEITOS, max_workers=4):
+        ...
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import metricas
+from cliente_http import json_da_resposta, json_do_corpo, post, post_async
+from fluxo_json import itens_da_resposta, lista_do_json
+
+
+# ==============================
+# UMA LISTA
+# ==============================
+def _payload(identificador_da_aba: str, conceito) -> dict:
+    return {"identificadorDaAba": identificador_da_aba, "conceito": str(conceito)}
+
+
+def consultar_lista(session, url: str, identificador_da_aba: str, conceito, tentativas: int, timeout,
+                    taxa_inicial: float) -> list:
+    """Lista JSON do conceito; ErroLG (cliente_http) se as tentativas se esgotarem."""
+    resp = post(session, url, _payload(identificador_da_aba, conceito), tentativas=tentativas, timeout=timeout,
+                taxa_inicial=taxa_inicial, conceito=conceito)
+    return lista_do_json(json_da_resposta(resp, conceito=conceito), url)
+
+
+def iterar_lista(session, url: str, identificador_da_aba: str, conceito, tentativas: int, timeout,
+                 taxa_inicial: float):
+    """
+    Como consultar_lista, mas entrega os itens conforme chegam do socket.
+    Só a conexão é refeita em caso de falha; um erro no meio da leitura é propagado
+    para não duplicar itens já entregues.
+    """
+    resp = post(session, url, _payload(identificador_da_aba, conceito), tentativas=tentativas, timeout=timeout,
+                stream=True, taxa_inicial=taxa_inicial, conceito=conceito)
+    with resp:
+        yield from itens_da_resposta(resp)
+
+
+async def consultar_lista_async(session, url: str, identificador_da_aba: str, conceito, tentativas: int, timeout,
+                                taxa_inicial: float) -> list:
+    """Como consultar_lista, numa sessão aiohttp."""
+    corpo = await post_async(session, url, _payload(identificador_da_aba, conceito), tentativas=tentativas,
+                             timeout=timeout, taxa_inicial=taxa_inicial, conceito=conceito)
+    return lista_do_json(json_do_corpo(corpo, url, conceito=conceito), url)
+
+
+# ==============================
+# TODOS OS CONCEITOS
+# ==============================
+def coletar_conceitos(consultar, conceitos: dict, max_workers: int):
+    """
+    Chama consultar(codigo_conceito) para cada conceito e devolve
+    (codigo_conceito, descricao_conceito, dados) na ordem de `conceitos`. Com
+    max_workers > 1 as consultas rodam em paralelo; o ritmo é sempre o do
+    limitador adaptativo do host.
+    """
+    def consultar_logando(codigo_conceito):
+        logging.info(f"Consultando {conceitos[codigo_conceito]} ({codigo_conceito})")
+        return consultar(codigo_conceito)
+
+    if max_workers <= 1:
+        for codigo_conceito, descricao_conceito in conceitos.items():
+            yield codigo_conceito, descricao_conceito, consultar_logando(codigo_conceito)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        resultados = pool.map(metricas.propagar(consultar_logando), conceitos)
+        for (codigo_conceito, descricao_conceito), data in zip(conceitos.items(), resultados):
+            yield codigo_conceito, descricao_conceito, data
+
+
+def coletar_conceitos_streaming(iterar, conceitos: dict):
+    """Como coletar_conceitos, mas `dados` é o iterador iterar(codigo_conceito), lido sob demanda."""
+    for codigo_conceito, descricao_conceito in conceitos.items():
+        logging.info(f"Consultando {descricao_conceito} ({codigo_conceito})")
+        yield codigo_conceito, descricao_conceito, iterar(codigo_conceito)
+
+
+async def coletar_conceitos_async(consultar_async, conceitos: dict, max_concorrencia: int) -> list:
+    """Como coletar_conceitos (mesma ordem), com até `max_concorrencia` consultas em andamento no loop."""
+    semaforo = asyncio.Semaphore(max(1, max_concorrencia))
+
+    async def consultar(codigo_conceito):
+        async with semaforo:
+            logging.info(f"Consultando {conceitos[codigo_conceito]} ({codigo_conceito})")
+            return await consultar_async(codigo_conceito)
+
+    resultados = await asyncio.gather(*(consultar(c) for c in conceitos))
+    return [(c, d, data) for (c, d), data in zip(conceitos.items(), resultados)]
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Controle adaptativo de taxa para as chamadas ao portal LG.
+
+Substitui as pausas fixas (REQUEST_PAUSE) por um token bucket cuja taxa
+segue o comportamento do servidor (AIMD):
+  - respostas 200 rápidas → a taxa sobe de forma aditiva;
+  - 429, 5xx, timeouts ou latência crescente → a taxa cai de forma multiplicativa.
+O balde acumula até CAPACIDADE tokens, para que alguns envios simultâneos
+saiam juntos sem mudar a taxa média.
+
+Há um limitador por host e taxa inicial: quem pede o mesmo ritmo divide o balde.
+
+Uso:
+    limitador = obter_limitador(url, taxa_inicial=1 / REQUEST_PAUSE)
+    limitador.aguardar()
+    ... faz a requisição ...
+    limitador.registrar(resp.status_code, latencia)   # ou registrar(None, latencia) em exceções
+
+    await limitador.aguardar_async()                  # em corrotinas (modo async)
+"""
+
+import time
+import asyncio
+import threading
+from urllib.parse import urlparse
+
+import metricas
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+TAXA_MINIMA = 0.2           # requisições/s
+TAXA_MAXIMA = 20.0
+INCREMENTO_ADITIVO = 0.1    # req/s somados a cada resposta saudável
+FATOR_REDUCAO = 0.5         # taxa multiplicada por este fator em caso de sobrecarga
+FATOR_LATENCIA = 2.0        # latência > FATOR_LATENCIA × média conta como sobrecarga
+ESPERA_ENTRE_REDUCOES = 2.0  # segundos; evita derrubar a taxa várias vezes pela mesma rajada
+CAPACIDADE = 4.0            # tokens acumuláveis: uma pequena rajada para os envios simultâneos
+
+
+# ==============================
+# TOKEN BUCKET AIMD
+# ==============================
+class LimitadorAdaptativo:
+    """Token bucket thread-safe com ajuste AIMD da taxa."""
+
+    def __init__(self, taxa_inicial: float = 2.0, taxa_minima: float = TAXA_MINIMA,
+                 taxa_maxima: float = TAXA_MAXIMA, capacidade: float = CAPACIDADE):
+        self.taxa_minima = taxa_minima
+        self.taxa_maxima = taxa_maxima
+        self.taxa = min(max(taxa_inicial, taxa_minima), taxa_maxima)
+        self.capacidade = capacidade
+        self.latencia_media = None
+        self._tokens = capacidade
+        self._ultimo_abastecimento = time.monotonic()
+        self._ultima_reducao = 0.0
+        self._lock = threading.Lock()
+
+    def _abastecer(self, agora: float):
+        decorrido = agora - self._ultimo_abastecimento
+        self._tokens = min(self.capacidade, self._tokens + decorrido * self.taxa)
+        self._ultimo_abastecimento = agora
+
+    def _consumir(self) -> float:
+        """Consome um token e devolve 0; sem token, devolve os segundos até o próximo."""
+        with self._lock:
+            self._abastecer(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.taxa
+
+    def aguardar(self):
+        """Bloqueia até haver um token disponível e o consome."""
+        inicio_espera = None
+        while True:
+            espera = self._consumir()
+            if not espera:
+                break
+            if inicio_espera is None:
+                inicio_espera = time.perf_counter()
+            time.sleep(espera)
+
+        if inicio_espera is not None:
+            metricas.registrar("aguardar_limitador", "pausa", inicio_espera, time.perf_counter() - inicio_espera)
+
+    async def aguardar_async(self):
+        """Como aguardar(), sem bloquear o loop de eventos."""
+        inicio_espera = None
+        while True:
+            espera = self._consumir()
+            if not espera:
+                break
+            if inicio_espera is None:
+                inicio_espera = time.perf_counter()
+            await asyncio.sleep(espera)
+
+        if inicio_espera is not None:
+            metricas.registrar("aguardar_limitador", "pausa", inicio_espera, time.perf_counter() - inicio_espera)
+
+    def registrar(self, status, latencia: float):
+        """
+        Informa o resultado de uma requisição.
+        status=None indica exceção (timeout, conexão recusada etc.).
+        """
+        with self._lock:
+            sobrecarga = status is None or status == 429 or status >= 500
+            if not sobrecarga and self.latencia_media is not None:
+                sobrecarga = latencia > FATOR_LATENCIA * self.latencia_media
+
+            if status is not None:
+                # Média móvel exponencial da latência
+                if self.latencia_media is None:
+                    self.latencia_media = latencia
+                else:
+                    self.latencia_media = 0.8 * self.latencia_media + 0.2 * latencia
+
+            agora = time.monotonic()
+            if sobrecarga:
+                if agora - self._ultima_reducao >= ESPERA_ENTRE_REDUCOES:
+                    self.taxa = max(self.taxa_minima, self.taxa * FATOR_REDUCAO)
+                    self._ultima_reducao = agora
+            elif status == 200:
+                self.taxa = min(self.taxa_maxima, self.taxa + INCREMENTO_ADITIVO)
+
+
+# ==============================
+# REGISTRO POR HOST
+# ==============================
+_limitadores = {}  # (host, taxa_inicial) → limitador
+_definidos = {}    # host → limitador de definir_limitador, usado para qualquer taxa inicial
+_limitadores_lock = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc or url
+
+
+def obter_limitador(url: str, taxa_inicial: float = 2.0) -> LimitadorAdaptativo:
+    """
+    Devolve o limitador compartilhado do host de `url` para `taxa_inicial`,
+    criando-o na primeira chamada. Os módulos que pedem a mesma taxa inicial
+    (ex.: os buscar_*, ou os salvar_*) dividem o mesmo ritmo; uma taxa inicial
+    diferente tem o seu próprio balde, em vez de herdar a de quem chegou antes.
+    """
+    host = _host(url)
+    with _limitadores_lock:
+        if host in _definidos:
+            return _definidos[host]
+        chave = (host, taxa_inicial)
+        if chave not in _limitadores:
+            _limitadores[chave] = LimitadorAdaptativo(taxa_inicial=taxa_inicial)
+        return _limitadores[chave]
+
+
+def definir_limitador(url: str, limitador: LimitadorAdaptativo = None):
+    """
+    Substitui os limitadores do host de `url` por `limitador`, qualquer que seja a
+    taxa inicial pedida (ex.: em benchmarks); None descarta o definido e os criados.
+    """
+    host = _host(url)
+    with _limitadores_lock:
+        if limitador is None:
+            _definidos.pop(host, None)
+            for chave in [c for c in _limitadores if c[0] == host]:
+                del _limitadores[chave]
+        else:
+            _definidos[host] = limitador
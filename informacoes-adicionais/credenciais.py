@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Carregamento preguiçoso da credencial (service account) do Google Sheets.
+
+Nada é baixado na importação. Na primeira chamada de carregar_credencial()
+a credencial é procurada, nesta ordem:
+  1. caminho passado explicitamente;
+  2. variável de ambiente LG_SHEETS_CREDENCIAL (caminho de um JSON);
+  3. cópia válida já salva em disco (CREDENCIAL_ARQUIVO), de execuções anteriores;
+  4. download do link público do Drive (gravado em CREDENCIAL_ARQUIVO).
+O resultado fica em cache para o resto do processo.
+"""
+
+import os
+import json
+import logging
+import threading
+import requests
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+CREDENCIAL_URL = "https://drive.google.com/uc?export=download&id=15Pzgk8O1bgbIH3cfdiBz6qwrzEbdfQtF"
+CREDENCIAL_ARQUIVO = "credencial_sheets.json"
+VARIAVEL_AMBIENTE = "LG_SHEETS_CREDENCIAL"
+DOWNLOAD_TIMEOUT = 30
+
+_cache = {}
+_lock = threading.Lock()
+
+
+# ==============================
+# FUNÇÕES AUXILIARES
+# ==============================
+def _ler_credencial(caminho: str):
+    """Lê o JSON e confere se é uma service account; devolve None se inválido."""
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # JSON válido que não é um objeto (lista, número...) também não é uma credencial
+    if not isinstance(info, dict) or info.get("type") != "service_account" or not info.get("private_key"):
+        return None
+    return info
+
+
+def _baixar_credencial(destino: str):
+    logging.info("🔑 Baixando credencial do Google Sheets...")
+    resp = requests.get(CREDENCIAL_URL, timeout=DOWNLOAD_TIMEOUT)
+    resp.raise_for_status()
+
+    # Grava em arquivo temporário e renomeia, para nunca deixar uma cópia pela metade
+    temporario = destino + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(resp.content)
+    info = _ler_credencial(temporario)
+    if info is None:
+        os.remove(temporario)
+        raise ValueError("Conteúdo baixado não é uma credencial de service account válida.")
+    os.replace(temporario, destino)
+    return info
+
+
+# ==============================
+# API
+# ==============================
+def carregar_credencial(caminho: str = None) -> dict:
+    """Devolve o dicionário da service account, carregando-o uma única vez por processo."""
+    with _lock:
+        chave = caminho or ""
+        if chave in _cache:
+            return _cache[chave]
+
+        if caminho:
+            info = _ler_credencial(caminho)
+            if info is None:
+                raise ValueError(f"Credencial inválida em {caminho}")
+        elif os.environ.get(VARIAVEL_AMBIENTE):
+            info = _ler_credencial(os.environ[VARIAVEL_AMBIENTE])
+            if info is None:
+                raise ValueError(f"Credencial inválida em ${VARIAVEL_AMBIENTE}")
+        else:
+            info = _ler_credencial(CREDENCIAL_ARQUIVO) or _baixar_credencial(CREDENCIAL_ARQUIVO)
+
+        _cache[chave] = info
+        return info
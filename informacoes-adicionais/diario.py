@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Diário local (SQLite) das execuções dos módulos salvar_*.
+
+Cada linha enviada é registrada por etapa, cliente e identidade do registro
+(conceito + código) com o status "pendente", "salvo" ou "falha". Com
+run(..., retomar=True) os módulos pulam o que já foi confirmado como salvo
+e reenviam só o que falhou ou ficou pela metade.
+
+Uso:
+    with DiarioDeExecucao("salvar_informacao_adicional") as diario:
+        if diario.ja_salvo(cliente, chave):
+            ...
+        diario.registrar(cliente, chave, STATUS_PENDENTE)
+"""
+
+import time
+import sqlite3
+import threading
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+DIARIO_ARQUIVO = "diario_salvar.sqlite"
+
+STATUS_PENDENTE = "pendente"
+STATUS_SALVO = "salvo"
+STATUS_FALHA = "falha"
+STATUS_PULADO = "pulado"  # só no retorno dos salvar_registro (retomar=True); não é gravado
+
+# Trechos de mensagem da LG que confirmam que o registro está no destino
+MENSAGENS_DE_SUCESSO = ("sucesso", "já existe", "ja existe", "já cadastrad", "ja cadastrad")
+
+
+def chave_registro(*partes) -> str:
+    """Identidade textual de um registro, ex.: chave_registro(1000, "ABC") → "1000|ABC"."""
+    return "|".join("" if p is None else str(p).strip() for p in partes)
+
+
+def classificar_mensagem(mensagem) -> str:
+    """Traduz a mensagem devolvida por enviar_registro em STATUS_SALVO ou STATUS_FALHA."""
+    texto = str(mensagem or "").lower()
+    if any(trecho in texto for trecho in MENSAGENS_DE_SUCESSO):
+        return STATUS_SALVO
+    return STATUS_FALHA
+
+
+# ==============================
+# DIÁRIO
+# ==============================
+class DiarioDeExecucao:
+    """Registro durável (SQLite em modo WAL) do resultado de cada linha."""
+
+    def __init__(self, etapa: str, caminho: str = DIARIO_ARQUIVO):
+        self.etapa = etapa
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS registros (
+                etapa TEXT NOT NULL,
+                cliente TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                status TEXT NOT NULL,
+                mensagem TEXT,
+                atualizado_em REAL NOT NULL,
+                PRIMARY KEY (etapa, cliente, chave)
+            )
+        """)
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+        return False
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+    def status(self, cliente: str, chave: str):
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT status FROM registros WHERE etapa = ? AND cliente = ? AND chave = ?",
+                (self.etapa, cliente, chave),
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def ja_salvo(self, cliente: str, chave: str) -> bool:
+        return self.status(cliente, chave) == STATUS_SALVO
+
+    def salvos(self, cliente: str, chaves) -> set:
+        """Das `chaves`, as já confirmadas como salvas (ja_salvo de várias chaves por consulta)."""
+        chaves, salvas = list(chaves), set()
+        with self._lock:
+            # Blocos abaixo do limite de parâmetros do SQLite
+            for inicio in range(0, len(chaves), 500):
+                bloco = chaves[inicio:inicio + 500]
+                salvas.update(chave for (chave,) in self._conn.execute(
+                    f"SELECT chave FROM registros WHERE etapa = ? AND cliente = ? AND status = ? "
+                    f"AND chave IN ({', '.join('?' * len(bloco))})",
+                    (self.etapa, cliente, STATUS_SALVO, *bloco),
+                ))
+        return salvas
+
+    def registrar(self, cliente: str, chave: str, status: str, mensagem: str = None):
+        self.registrar_varios(cliente, [(chave, status, mensagem)])
+
+    def registrar_varios(self, cliente: str, registros):
+        """Grava vários (chave, status, mensagem) numa única transação."""
+        agora = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO registros (etapa, cliente, chave, status, mensagem, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.etapa, cliente, chave, status, None if mensagem is None else str(mensagem), agora)
+                 for chave, status, mensagem in registros],
+            )
+            self._conn.commit()
+
+    def resumo(self, cliente: str) -> dict:
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT status, COUNT(*) FROM registros WHERE etapa = ? AND cliente = ? GROUP BY status",
+                (self.etapa, cliente),
+            ).fetchall()
+        return dict(linhas)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura incremental das listas JSON devolvidas pelos endpoints ObtenhaLista*.
+
+Com o pacote opcional `ijson` instalado, os itens são decodificados conforme
+chegam do socket (requisição feita com stream=True) e o corpo nunca fica
+inteiro em memória. Sem ele, cai para resp.json(). Nos dois casos um corpo
+que não seja uma lista JSON vira cliente_http.RespostaInvalida.
+"""
+
+from itertools import chain, islice
+
+try:
+    import ijson
+except ImportError:  # dependência opcional
+    ijson = None
+
+from cliente_http import RespostaInvalida, json_da_resposta
+
+
+def lista_do_json(dados, url: str = None) -> list:
+    """JSON já decodificado de um ObtenhaLista*: a lista (null → []); outro valor → RespostaInvalida."""
+    if dados is None:
+        return []
+    if not isinstance(dados, list):
+        raise RespostaInvalida("Resposta inválida (não é uma lista JSON)", url)
+    return dados
+
+
+def itens_da_resposta(resp):
+    """
+    Itera os itens da lista JSON do corpo de `resp` (null vale como lista vazia).
+    Corpo que não é JSON, JSON truncado ou que não é uma lista → RespostaInvalida,
+    como em cliente_http.json_da_resposta.
+    """
+    if ijson is None:
+        yield from lista_do_json(json_da_resposta(resp), resp.url)
+        return
+
+    resp.raw.decode_content = True  # descomprime gzip/deflate no caminho
+    try:
+        eventos = ijson.parse(resp.raw, use_float=True)
+        primeiro = next(eventos, None)
+        if primeiro is None or primeiro[1] not in ("start_array", "null"):
+            raise RespostaInvalida("Resposta inválida (não é uma lista JSON)", resp.url)
+        yield from ijson.items(chain([primeiro], eventos), "item")
+    except ijson.JSONError as e:
+        raise RespostaInvalida("Resposta inválida (não-JSON)", resp.url) from e
+
+
+def em_blocos(iteravel, tamanho: int):
+    """Agrupa um iterável em listas de até `tamanho` elementos, sem materializá-lo."""
+    iterador = iter(iteravel)
+    while True:
+        bloco = list(islice(iterador, tamanho))
+        if not bloco:
+            return
+        yield bloco
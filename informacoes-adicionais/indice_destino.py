@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Índice do que já existe no cliente de destino, montado antes de um salvar_*.
+
+Os registros atuais do destino são lidos uma única vez pelos endpoints
+ObtenhaLista* (um POST por conceito) e indexados por (conceito, código).
+Para cada linha a importar, o payload que seria enviado ao Salvar é comparado
+com o payload equivalente do registro existente; se forem iguais, o envio é
+dispensado e a linha é marcada como já existente.
+
+Uso:
+    indice = IndiceDeExistentes(registros_do_destino, "Codigo", montar_payload, IDENTIFICADOR_DA_ABA)
+    if indice.identico(row):
+        ...
+"""
+
+from planilhas import valor_como_texto
+
+MENSAGEM_IDENTICO = "Já existe no destino com os mesmos dados (envio dispensado)"
+
+SITUACAO_AUSENTE = "ausente"
+SITUACAO_IDENTICO = "identico"
+SITUACAO_DIFERENTE = "diferente"
+
+_INATIVO = frozenset({("Status", "INATIVO")})  # nunca igual à assinatura de um payload do Salvar
+
+
+def assinatura(payload: dict) -> frozenset:
+    """Conteúdo do payload em texto, independente da ordem e do tipo dos valores."""
+    return frozenset((k, valor_como_texto(v)) for k, v in payload.items())
+
+
+class IndiceDeExistentes:
+    """
+    (codigo_conceito, código) → assinatura do payload do registro existente no destino.
+
+    `normalizar(registro)` é aplicado aos dois lados (destino e linha a importar)
+    antes da chave e do payload, para que valores lidos por caminhos diferentes
+    (planilha, JSON) comparem igual. Só os campos do payload do Salvar entram na
+    comparação; `ativo(registro)`, se dado, diz se o registro do destino está
+    ativo: o Salvar envia Status=ATIVO, então um registro inativo conta como
+    diferente e é reenviado.
+    """
+
+    def __init__(self, registros, campo_codigo: str, montar_payload, identificador_da_aba: str,
+                 normalizar=None, ativo=None):
+        self.campo_codigo = campo_codigo
+        self._montar_payload = montar_payload
+        self._identificador_da_aba = identificador_da_aba
+        self._normalizar = normalizar or (lambda registro: registro)
+        self._assinaturas = {}
+        for registro in map(self._normalizar, registros):
+            if ativo is None or ativo(registro):
+                self._assinaturas[self.chave(registro)] = assinatura(montar_payload(registro, identificador_da_aba))
+            else:
+                self._assinaturas[self.chave(registro)] = _INATIVO
+
+    def __len__(self):
+        return len(self._assinaturas)
+
+    def chave(self, registro: dict):
+        return (valor_como_texto(registro.get("codigo_conceito")), valor_como_texto(registro.get(self.campo_codigo)))
+
+    def situacao(self, registro: dict, payload: dict = None) -> str:
+        registro = self._normalizar(registro)
+        existente = self._assinaturas.get(self.chave(registro))
+        if existente is None:
+            return SITUACAO_AUSENTE
+        payload = payload or self._montar_payload(registro, self._identificador_da_aba)
+        return SITUACAO_IDENTICO if assinatura(payload) == existente else SITUACAO_DIFERENTE
+
+    def identico(self, registro: dict, payload: dict = None) -> bool:
+        return self.situacao(registro, payload) == SITUACAO_IDENTICO
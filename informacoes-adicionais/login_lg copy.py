@@ -7,8 +7,6 @@ Executa login no portal LG (modo headless) e retorna cookies + URL base.
 import os
 import time
 import json
-import base64
-import re
 import logging
 from urllib.parse import urlparse
 
@@ -21,10 +19,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+from codigo_2fa import BackendGmail, ProvedorDeCodigo2FA
 
 
 # ============================================================
@@ -35,7 +30,6 @@ WORK_DIR = "/content"
 credentials_path = os.path.join(WORK_DIR, "credentials.json")
 token_path = os.path.join(WORK_DIR, "token.json")
 
-SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 usuario_portal = "avieira@bwg.com.br"
 senha_portal = "Kalisba987"
 
@@ -78,59 +72,15 @@ def iniciar_driver_colab():
 # ============================================================
 # GMAIL - AUTENTICAÇÃO E BUSCA DO CÓDIGO 2FA
 # ============================================================
-def autenticar_gmail():
-    creds = None
-    if os.path.exists(token_path):
-        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open(token_path, 'w') as token:
-            token.write(creds.to_json())
-    return build('gmail', 'v1', credentials=creds)
-
-
-def buscar_codigo_2fa(service):
-    try:
-        results = service.users().messages().list(
-            userId='me', q='from:cloud@lg.com.br is:unread'
-        ).execute()
-        msgs = results.get('messages', [])
-        if not msgs:
-            return None
-
-        msg = service.users().messages().get(userId='me', id=msgs[0]['id'], format='full').execute()
-        body = msg['payload']
-
-        def extrair_texto(part):
-            data = part.get('body', {}).get('data')
-            if data:
-                texto = base64.urlsafe_b64decode(data).decode('utf-8', errors='ignore')
-                match = re.search(r"\b\d{6}\b", texto)
-                if match:
-                    return match.group(0)
-            return None
-
-        if 'parts' in body:
-            for part in body['parts']:
-                codigo = extrair_texto(part)
-                if codigo:
-                    return codigo
-        else:
-            return extrair_texto(body)
-        return None
-    except Exception as e:
-        log(f"⚠️ Erro ao buscar código 2FA: {e}")
-        return None
+def criar_provedor_2fa():
+    return ProvedorDeCodigo2FA(BackendGmail(credentials_path, token_path))
 
 
 # ============================================================
 # LOGIN PRINCIPAL
 # ============================================================
-def executar_login(url_login="https://login.lg.com.br/login/gente/bwg_braza", modo_autenticacao="PADRAO"):
+def executar_login(url_login="https://login.lg.com.br/login/gente/bwg_braza", modo_autenticacao="PADRAO",
+                   provedor_2fa=None):
     log(f"🌐 Iniciando login para: {url_login}")
 
     driver = None
@@ -150,6 +100,11 @@ def executar_login(url_login="https://login.lg.com.br/login/gente/bwg_braza", mo
         except TimeoutException:
             raise Exception("Campo de login não encontrado.")
 
+        # Marca d'água do e-mail antes de enviar a senha
+        if modo_autenticacao.upper() == "2FA":
+            provedor_2fa = provedor_2fa or criar_provedor_2fa()
+            provedor_2fa.preparar()
+
         # Campo de senha
         try:
             input_senha = wait.until(EC.presence_of_element_located((By.ID, "Senha")))
@@ -164,19 +119,11 @@ def executar_login(url_login="https://login.lg.com.br/login/gente/bwg_braza", mo
             log("📲 Aguardando validação 2FA...")
             wait.until(EC.url_contains("ValideCodigo"))
             input_codigo = wait.until(EC.presence_of_element_located((By.ID, "Codigo")))
-            gmail_service = autenticar_gmail()
-
-            codigo = None
-            for tentativa in range(12):
-                codigo = buscar_codigo_2fa(gmail_service)
-                if codigo:
-                    log(f"✅ Código 2FA obtido: {codigo}")
-                    break
-                log(f"Tentativa {tentativa+1}/12: código ainda não recebido...")
-                time.sleep(5)
 
+            codigo = provedor_2fa.aguardar_codigo()
             if not codigo:
                 raise Exception("Não foi possível obter o código 2FA.")
+            log(f"✅ Código 2FA obtido: {codigo}")
             input_codigo.send_keys(codigo)
             input_codigo.send_keys(Keys.RETURN)
             log("📨 Código enviado com sucesso.")
@@ -2,12 +2,19 @@
 """
 login_lg.py — versão Playwright FINAL (SEM 2FA)
 Compatível com Google Colab + login direto no portal LG.
+
+Sessões já capturadas ficam em cache (sessoes.py); o navegador só é aberto
+quando não há sessão salva para o cliente ou quando ela foi recusada.
 """
 
 import json
 import os
+import asyncio
+from contextlib import asynccontextmanager
 from playwright.async_api import async_playwright
 
+import sessoes
+
 
 # ============================================================
 # 🔐 Ler credenciais locais
@@ -17,54 +24,130 @@ def carregar_credenciais():
         return json.load(f)
 
 
+# ============================================================
+# 🧭 POOL DE NAVEGADORES
+# ============================================================
+ARGS_CHROMIUM = ["--no-sandbox", "--disable-dev-shm-usage"]
+
+
+class PoolDeNavegadores:
+    """
+    Mantém poucos Chromium abertos e entrega um BrowserContext isolado
+    (cookies próprios) para cada login. Vários logins podem rodar ao mesmo
+    tempo no mesmo loop de eventos.
+
+        async with PoolDeNavegadores(tamanho=1) as pool:
+            sessoes = await asyncio.gather(*(login_lg(c, pool=pool) for c in clientes))
+    """
+
+    def __init__(self, tamanho=1, contextos_por_navegador=4):
+        self.tamanho = tamanho
+        self._semaforo = asyncio.Semaphore(tamanho * contextos_por_navegador)
+        self._playwright = None
+        self._navegadores = []
+        self._proximo = 0
+
+    async def __aenter__(self):
+        self._playwright = await async_playwright().start()
+        for _ in range(self.tamanho):
+            self._navegadores.append(
+                await self._playwright.chromium.launch(headless=True, args=ARGS_CHROMIUM)
+            )
+        print(f"🧭 Pool com {self.tamanho} navegador(es) iniciado.")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        for browser in self._navegadores:
+            await browser.close()
+        self._navegadores.clear()
+        await self._playwright.stop()
+        return False
+
+    @asynccontextmanager
+    async def contexto(self):
+        async with self._semaforo:
+            browser = self._navegadores[self._proximo % len(self._navegadores)]
+            self._proximo += 1
+            context = await browser.new_context()
+            try:
+                yield context
+            finally:
+                await context.close()
+
+
 # ============================================================
 # 🚀 LOGIN PRINCIPAL (SEM 2FA)
 # ============================================================
-async def login_lg(cliente):
+async def _login_na_pagina(page, url_login, usuario, senha):
+    # Abrir página
+    await page.goto(url_login, timeout=60000)
+    print("📄 Página de login aberta.")
 
-    cred = carregar_credenciais()
-    usuario = cred["usuario"]
-    senha = cred["senha"]
+    # Informar usuário
+    await page.fill("#Login", usuario)
+    await page.keyboard.press("Enter")
+    print("📧 Usuário informado.")
 
-    url_login = f"https://login.lg.com.br/login/gente/{cliente}"
-    print(f"🌐 Iniciando login Playwright → {url_login}")
+    # Informar senha
+    await page.fill("#Senha", senha)
+    await page.keyboard.press("Enter")
+    print("🔑 Senha enviada.")
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=["--no-sandbox", "--disable-dev-shm-usage"]
-        )
-        page = await browser.new_page()
+    # Aguardar navegação final
+    print("⏳ Aguardando portal carregar...")
+    await page.wait_for_load_state("networkidle", timeout=60000)
 
-        # Abrir página
-        await page.goto(url_login, timeout=60000)
-        print("📄 Página de login aberta.")
+    # Capturar cookies
+    cookies_list = await page.context.cookies()
+    cookies = "; ".join([f"{c['name']}={c['value']}" for c in cookies_list])
 
-        # Informar usuário
-        await page.fill("#Login", usuario)
-        await page.keyboard.press("Enter")
-        print("📧 Usuário informado.")
+    # Base da URL do portal
+    base_url = page.url.split("/Gente")[0]
 
-        # Informar senha
-        await page.fill("#Senha", senha)
-        await page.keyboard.press("Enter")
-        print("🔑 Senha enviada.")
+    return {
+        "url": base_url,
+        "cookies": cookies
+    }
 
-        # Aguardar navegação final
-        print("⏳ Aguardando portal carregar...")
-        await page.wait_for_load_state("networkidle", timeout=60000)
 
-        # Capturar cookies
-        cookies_list = await page.context.cookies()
-        cookies = "; ".join([f"{c['name']}={c['value']}" for c in cookies_list])
+async def login_lg(cliente, usar_cache=True, pool=None):
 
-        # Base da URL do portal
-        base_url = page.url.split("/Gente")[0]
+    if usar_cache:
+        sessao = await asyncio.to_thread(sessoes.obter_sessao_valida, cliente)
+        if sessao:
+            print("⚡ Sessão em cache ainda válida — login dispensado.")
+            return sessao
 
-        await browser.close()
+    cred = carregar_credenciais()
+    usuario = cred["usuario"]
+    senha = cred["senha"]
 
-        print("✅ Login concluído!")
-        return {
-            "url": base_url,
-            "cookies": cookies
-        }
+    url_login = f"https://login.lg.com.br/login/gente/{cliente}"
+    print(f"🌐 Iniciando login Playwright → {url_login}")
+
+    if pool is not None:
+        # Só cria um contexto novo; o navegador já está aberto
+        async with pool.contexto() as context:
+            page = await context.new_page()
+            sessao = await _login_na_pagina(page, url_login, usuario, senha)
+    else:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True, args=ARGS_CHROMIUM)
+            page = await browser.new_page()
+            sessao = await _login_na_pagina(page, url_login, usuario, senha)
+            await browser.close()
+
+    print("✅ Login concluído!")
+    if usar_cache:
+        sessoes.salvar_sessao(cliente, sessao)
+    return sessao
+
+
+async def login_varios(clientes, tamanho_pool=1, usar_cache=True):
+    """Faz login de vários clientes em paralelo compartilhando um pool de navegadores."""
+    async with PoolDeNavegadores(tamanho=tamanho_pool) as pool:
+        resultados = await asyncio.gather(
+            *(login_lg(c, usar_cache=usar_cache, pool=pool) for c in clientes),
+            return_exceptions=True,
+        )
+    return dict(zip(clientes, resultados))
@@ -5,17 +5,13 @@ Retorna cookies + URL base do portal LG.
 Compatível com Google Colab, Docker, Airflow, etc.
 """
 
-import time
 import re
-import base64
 import requests
 from urllib.parse import urlparse
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 import os
 
+from codigo_2fa import BackendGmail, ProvedorDeCodigo2FA
+
 # ===============================
 # CONFIGURAÇÕES
 # ===============================
@@ -25,79 +21,19 @@ senha_portal   = "Kalisba987"
 WORK_DIR = "/content"
 credentials_path = os.path.join(WORK_DIR, "credentials.json")
 token_path = os.path.join(WORK_DIR, "token.json")
-SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
 
 
 # ===============================
 # LOGIN 2FA – GMAIL
 # ===============================
-def autenticar_gmail():
-    creds = None
-    if os.path.exists(token_path):
-        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-            creds = flow.run_local_server(port=0)
-
-        with open(token_path, "w") as token:
-            token.write(creds.to_json())
-
-    return build("gmail", "v1", credentials=creds)
-
-
-def buscar_codigo_2fa(gmail_service):
-    """
-    Busca email da LG com código 2FA
-    """
-    try:
-        results = gmail_service.users().messages().list(
-            userId="me",
-            q="from:cloud@lg.com.br is:unread"
-        ).execute()
-
-        msgs = results.get("messages", [])
-        if not msgs:
-            return None
-
-        msg = gmail_service.users().messages().get(
-            userId='me',
-            id=msgs[0]["id"],
-            format="full"
-        ).execute()
-
-        payload = msg["payload"]
-
-        def extrair_texto(part):
-            data = part.get("body", {}).get("data")
-            if data:
-                texto = base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
-                m = re.search(r"\b\d{6}\b", texto)
-                if m:
-                    return m.group(0)
-            return None
-
-        if "parts" in payload:
-            for p in payload["parts"]:
-                c = extrair_texto(p)
-                if c:
-                    return c
-        else:
-            return extrair_texto(payload)
-
-    except Exception as e:
-        print("Erro ao buscar código 2FA:", e)
-
-    return None
+def criar_provedor_2fa():
+    return ProvedorDeCodigo2FA(BackendGmail(credentials_path, token_path))
 
 
 # ===============================
 # LOGIN PADRÃO (SEM SELENIUM)
 # ===============================
-def executar_login(url_login, modo_autenticacao="PADRAO"):
+def executar_login(url_login, modo_autenticacao="PADRAO", provedor_2fa=None):
     print("🌐 Iniciando login sem Selenium:", url_login)
 
     s = requests.Session()
@@ -122,6 +58,12 @@ def executar_login(url_login, modo_autenticacao="PADRAO"):
     if csrf:
         payload["__RequestVerificationToken"] = csrf
 
+    # Marca d'água da caixa de e-mail antes de enviar a senha:
+    # só e-mails que chegarem depois contam como código deste login
+    if modo_autenticacao.upper() == "2FA":
+        provedor_2fa = provedor_2fa or criar_provedor_2fa()
+        provedor_2fa.preparar()
+
     # 3) POST credenciais
     r2 = s.post(url_login, data=payload, allow_redirects=True)
 
@@ -132,18 +74,10 @@ def executar_login(url_login, modo_autenticacao="PADRAO"):
 
         print("📲 Autenticando via 2FA...")
 
-        gmail_service = autenticar_gmail()
-        codigo = None
-
-        for i in range(12):
-            codigo = buscar_codigo_2fa(gmail_service)
-            if codigo:
-                print("🔐 Código:", codigo)
-                break
-            time.sleep(5)
-
+        codigo = provedor_2fa.aguardar_codigo()
         if not codigo:
             return {"erro": "Código 2FA não recebido."}
+        print("🔐 Código:", codigo)
 
         # Enviar o código
         post_2fa = {
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas por execução: tempo de cada requisição HTTP à LG, de cada chamada à
+API do Sheets e das pausas (limitador, espera entre tentativas), além de
+contadores como o de retentativas.
+
+Desligado por padrão, custo praticamente zero. Para ligar, defina a variável
+LG_METRICAS com um diretório ou chame ativar(diretorio). Cada run() passa a
+gravar, ao terminar:
+  - <nome>-<data>.json        resumo agregado por operação e rótulos;
+  - <nome>-<data>.trace.json  trace no formato do Chrome (chrome://tracing ou
+                              https://ui.perfetto.dev), uma faixa por thread.
+
+Execuções aninhadas (ex.: os run() chamados pelo orquestrador) registram no
+coletor da execução mais externa, que grava um único par de arquivos. O
+coletor vive num ContextVar: execuções simultâneas mas não aninhadas (outras
+threads, outras tarefas do loop) têm cada uma o seu. Threads criadas pela
+execução (ThreadPoolExecutor, threading.Thread) recebem o coletor via
+propagar(); asyncio.to_thread já copia o contexto.
+
+Uso:
+    metricas.ativar("metricas")
+    buscar_informacoes_adicionais.run(url_base, cookies, cliente)
+
+    with metricas.medir("http.post", "http", endpoint="Salvar") as rotulos:
+        resp = session.post(...)
+        rotulos["resultado"] = resp.status_code
+"""
+
+import os
+import json
+import time
+import asyncio
+import inspect
+import logging
+import threading
+import functools
+import contextvars
+from datetime import datetime
+from contextlib import contextmanager
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+DIRETORIO = os.environ.get("LG_METRICAS")  # None = métricas desligadas
+
+# Rótulos usados para agrupar o resumo; os demais só aparecem no trace
+ROTULOS_DO_RESUMO = ("endpoint", "resultado", "aba")
+
+
+def ativar(diretorio: str = "metricas"):
+    global DIRETORIO
+    DIRETORIO = diretorio
+
+
+def desativar():
+    global DIRETORIO
+    DIRETORIO = None
+
+
+# ==============================
+# COLETOR
+# ==============================
+class ColetorDeMetricas:
+    """Guarda os intervalos medidos e os contadores de uma execução (thread-safe)."""
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.criado_em = datetime.now()
+        self.inicio = time.perf_counter()
+        self.eventos = []  # (nome, categoria, inicio, duracao, thread, rotulos)
+        self.contadores = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, nome: str, categoria: str, inicio: float, duracao: float, rotulos: dict):
+        evento = (nome, categoria, inicio, duracao, threading.get_ident(), dict(rotulos))
+        with self._lock:
+            self.eventos.append(evento)
+
+    def contar(self, nome: str, quantidade: int = 1, rotulos: dict = None):
+        chave = _chave(nome, rotulos or {})
+        with self._lock:
+            self.contadores[chave] = self.contadores.get(chave, 0) + quantidade
+            self.eventos.append((nome, "contador", time.perf_counter(), 0.0, threading.get_ident(), dict(rotulos or {})))
+
+    # ------------------------------
+    # Saídas
+    # ------------------------------
+    def resumo(self) -> dict:
+        with self._lock:
+            eventos = list(self.eventos)
+            contadores = dict(self.contadores)
+
+        operacoes, pausas = {}, 0.0
+        for nome, categoria, _, duracao, _, rotulos in eventos:
+            if categoria == "contador":
+                continue
+            if categoria == "pausa":
+                pausas += duracao
+            operacoes.setdefault(_chave(nome, rotulos), []).append(duracao)
+
+        return {
+            "execucao": self.nome,
+            "inicio": self.criado_em.isoformat(timespec="seconds"),
+            "duracao_s": round(time.perf_counter() - self.inicio, 3),
+            "pausas_s": round(pausas, 3),
+            "operacoes": {chave: _estatisticas(duracoes) for chave, duracoes in sorted(operacoes.items())},
+            "contadores": dict(sorted(contadores.items())),
+        }
+
+    def trace_chrome(self) -> dict:
+        """Eventos no Trace Event Format (ph "X" para intervalos, "i" para contadores)."""
+        with self._lock:
+            eventos = list(self.eventos)
+
+        pid = os.getpid()
+        trace = []
+        for nome, categoria, inicio, duracao, thread, rotulos in eventos:
+            evento = {
+                "name": nome, "cat": categoria, "pid": pid, "tid": thread,
+                "ts": round((inicio - self.inicio) * 1e6, 1), "args": rotulos,
+            }
+            if categoria == "contador":
+                evento.update({"ph": "i", "s": "t"})
+            else:
+                evento.update({"ph": "X", "dur": round(duracao * 1e6, 1)})
+            trace.append(evento)
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def gravar(self, diretorio: str):
+        os.makedirs(diretorio, exist_ok=True)
+        base = os.path.join(diretorio, f"{self.nome}-{self.criado_em:%Y%m%d-%H%M%S-%f}")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(self.resumo(), f, ensure_ascii=False, indent=2)
+        with open(base + ".trace.json", "w", encoding="utf-8") as f:
+            json.dump(self.trace_chrome(), f, ensure_ascii=False)
+        logging.info(f"📊 Métricas gravadas em {base}.json / .trace.json")
+        return base
+
+
+def _chave(nome: str, rotulos: dict) -> str:
+    """'http.post endpoint=InformacaoAdicional/Salvar resultado=200'"""
+    partes = [f"{r}={rotulos[r]}" for r in ROTULOS_DO_RESUMO if r in rotulos]
+    return " ".join([nome] + partes)
+
+
+def _estatisticas(duracoes) -> dict:
+    ordenadas = sorted(duracoes)
+    total = sum(ordenadas)
+    return {
+        "quantidade": len(ordenadas),
+        "total_s": round(total, 3),
+        "media_ms": round(total / len(ordenadas) * 1000, 2),
+        "p95_ms": round(ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))] * 1000, 2),
+        "max_ms": round(ordenadas[-1] * 1000, 2),
+    }
+
+
+# ==============================
+# API DE INSTRUMENTAÇÃO
+# ==============================
+_ativo = contextvars.ContextVar("coletor_de_metricas", default=None)  # coletor da execução em andamento
+
+
+@contextmanager
+def execucao(nome: str):
+    """Abre o coletor de uma execução; só a mais externa (neste contexto) grava os arquivos."""
+    coletor = _ativo.get()
+    externa = coletor is None and DIRETORIO is not None
+    if externa:
+        coletor = ColetorDeMetricas(nome)
+        token = _ativo.set(coletor)
+
+    if coletor is None:
+        yield None
+        return
+
+    try:
+        with medir(nome, "execucao"):
+            yield coletor
+    finally:
+        if externa:
+            _ativo.reset(token)
+            try:
+                coletor.gravar(DIRETORIO)
+            except Exception as e:
+                logging.warning(f"⚠️ Falha ao gravar métricas: {e}")
+
+
+def propagar(funcao):
+    """
+    Envolve `funcao` para rodar com o coletor da execução atual em outra thread
+    (ex.: pool.submit(metricas.propagar(enviar), dados)).
+    """
+    coletor = _ativo.get()
+
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        token = _ativo.set(coletor)
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            _ativo.reset(token)
+    return envolvida
+
+
+def execucao_medida(nome: str):
+    """Decorador: executa a função (ou corrotina) dentro de execucao(nome)."""
+    def decorador(funcao):
+        if inspect.iscoroutinefunction(funcao):
+            @functools.wraps(funcao)
+            async def envolvida_async(*args, **kwargs):
+                with execucao(nome):
+                    return await funcao(*args, **kwargs)
+            return envolvida_async
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with execucao(nome):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+@contextmanager
+def medir(nome: str, categoria: str = "geral", **rotulos):
+    """
+    Mede o bloco. O dicionário devolvido aceita rótulos definidos durante o
+    bloco (ex.: rotulos["resultado"] = resp.status_code); uma exceção vira o
+    rótulo resultado=<NomeDaExceção>.
+    """
+    coletor = _ativo.get()
+    if coletor is None:
+        yield rotulos
+        return
+
+    inicio = time.perf_counter()
+    try:
+        yield rotulos
+    except BaseException as e:
+        rotulos.setdefault("resultado", type(e).__name__)
+        raise
+    finally:
+        coletor.registrar(nome, categoria, inicio, time.perf_counter() - inicio, rotulos)
+
+
+def registrar(nome: str, categoria: str, inicio: float, duracao: float, **rotulos):
+    """Registra um intervalo já medido (inicio em time.perf_counter())."""
+    coletor = _ativo.get()
+    if coletor is not None:
+        coletor.registrar(nome, categoria, inicio, duracao, rotulos)
+
+
+def contar(nome: str, quantidade: int = 1, **rotulos):
+    coletor = _ativo.get()
+    if coletor is not None:
+        coletor.contar(nome, quantidade, rotulos)
+
+
+def pausar(segundos: float, motivo: str = "pausa", **rotulos):
+    """time.sleep medido como pausa."""
+    with medir(motivo, "pausa", **rotulos):
+        time.sleep(segundos)
+
+
+async def pausar_async(segundos: float, motivo: str = "pausa", **rotulos):
+    """asyncio.sleep medido como pausa."""
+    with medir(motivo, "pausa", **rotulos):
+        await asyncio.sleep(segundos)
+
+
+def rotulo_endpoint(url: str) -> str:
+    """'.../InformacaoAdicional/Salvar' → 'InformacaoAdicional/Salvar'"""
+    return "/".join(url.rstrip("/").split("/")[-2:])
+
+
+# ==============================
+# SHEETS
+# ==============================
+class _ObjetoMedido:
+    """Repassa atributos ao objeto gspread, medindo cada método chamado."""
+
+    def __init__(self, alvo, prefixo: str, aba: str):
+        self._alvo = alvo
+        self._prefixo = prefixo
+        self._aba = aba
+
+    def __getattr__(self, nome):
+        valor = getattr(self._alvo, nome)
+        if nome == "spreadsheet":
+            return _ObjetoMedido(valor, "sheets.spreadsheet", self._aba)
+        if not callable(valor):
+            return valor
+
+        @functools.wraps(valor)
+        def medido(*args, **kwargs):
+            with medir(f"{self._prefixo}.{nome}", "sheets", aba=self._aba):
+                return valor(*args, **kwargs)
+        return medido
+
+
+def instrumentar_aba(ws):
+    """Devolve `ws` com as chamadas medidas enquanto houver execução ativa; senão, a própria aba."""
+    if _ativo.get() is None or ws is None or isinstance(ws, _ObjetoMedido):
+        return ws
+    return _ObjetoMedido(ws, "sheets", getattr(ws, "title", ""))
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Migração direta de "Informações Adicionais" entre clientes, sem passar pelo Sheets.
+
+Os registros lidos nos endpoints ObtenhaLista* do cliente de origem seguem,
+em memória e conceito a conceito, para os endpoints Salvar do cliente de
+destino. Os grupos vão antes dos itens que os referenciam. O resultado de
+cada registro fica no diário local, numa etapa própria de cada origem
+(ex.: "migracao:cliente_a:salvar_informacao_adicional"), então a migração
+pode ser retomada (retomar=True) sem pular o que outra origem ou importação
+salvou no destino. Como no agendador, itens de um grupo que falhou não são
+enviados e ficam como falha no diário.
+
+Uso:
+    migrar(origem["url"], origem["cookies"], "cliente_a",
+           destino["url"], destino["cookies"], "cliente_b")
+    migrar(..., retomar=True)  # pula o que uma execução anterior já salvou
+"""
+
+import logging
+
+import buscar_grupo_de_informacao_adicional as buscar_grupos
+import buscar_informacoes_adicionais as buscar_informacoes
+import salvar_grupo_informacao_adicional as salvar_grupos
+import salvar_informacao_adicional as salvar_informacoes
+import metricas
+from agendador import MENSAGEM_GRUPO_FALHOU
+from diario import DiarioDeExecucao, STATUS_FALHA, STATUS_PENDENTE, chave_registro, classificar_mensagem
+
+
+# ==============================
+# FUNÇÕES AUXILIARES
+# ==============================
+def _sem_nulos(registro: dict) -> dict:
+    # Campos None sumiriam do form (requests ignora None); a planilha mandaria ""
+    return {k: "" if v is None else v for k, v in registro.items()}
+
+
+def _etapa_do_diario(modulo_salvar, cliente_origem: str) -> str:
+    """Etapa do diário de uma migração: a origem faz parte da chave de cada registro."""
+    return f"migracao:{cliente_origem}:{modulo_salvar.DIARIO_ETAPA}"
+
+
+def _enviar_registros(registros, modulo_salvar, session, endpoint, cliente_origem, cliente, campo_codigo, retomar,
+                      bloqueio=None):
+    """
+    Envia cada registro ao Salvar do destino e devolve (resumo do diário, chaves que falharam).
+    bloqueio(registro), se informado, devolve a mensagem de um registro que não deve ser enviado
+    (fica como falha no diário) ou None.
+    """
+    falhas = set()
+    with DiarioDeExecucao(_etapa_do_diario(modulo_salvar, cliente_origem)) as diario:
+        for registro in registros:
+            chave = chave_registro(registro.get("codigo_conceito"), registro.get(campo_codigo))
+            if retomar and diario.ja_salvo(cliente, chave):
+                continue
+
+            mensagem = bloqueio(registro) if bloqueio is not None else None
+            if mensagem is not None:
+                diario.registrar(cliente, chave, STATUS_FALHA, mensagem)
+                falhas.add(chave)
+                logging.warning(f"[{cliente}] {chave} → {mensagem}")
+                continue
+
+            diario.registrar(cliente, chave, STATUS_PENDENTE)
+            corpo = modulo_salvar.codificar_payload(registro, modulo_salvar.IDENTIFICADOR_DA_ABA)
+            mensagem = modulo_salvar.enviar_registro(session, endpoint, corpo)
+            status = classificar_mensagem(mensagem)
+            diario.registrar(cliente, chave, status, mensagem)
+            if status == STATUS_FALHA:
+                falhas.add(chave)
+            logging.info(f"[{cliente}] {chave} → {mensagem}")
+        return diario.resumo(cliente), falhas
+
+
+def _bloqueio_por_grupo(grupos_com_falha):
+    """Como no agendador: itens de um grupo que não foi salvo não são enviados."""
+    def bloqueio(item):
+        chave = chave_registro(item.get("codigo_conceito"), item.get("codigo_informacao_adicional"))
+        if chave in grupos_com_falha:
+            return MENSAGEM_GRUPO_FALHOU.format(codigo=item.get("codigo_informacao_adicional"))
+        return None
+    return bloqueio
+
+
+# ==============================
+# EXECUÇÃO PRINCIPAL
+# ==============================
+@metricas.execucao_medida("migracao")
+def migrar(origem_url: str, origem_cookies: str, cliente_origem: str,
+           destino_url: str, destino_cookies: str, cliente_destino: str,
+           retomar: bool = False, max_workers: int = buscar_informacoes.MAX_WORKERS):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    logging.info(f"🔀 Migrando informações adicionais: {cliente_origem} → {cliente_destino}")
+
+    sessao_origem = buscar_informacoes.build_session(origem_cookies, origem_url, max_workers)
+    sessao_destino = salvar_informacoes.build_session(destino_cookies, destino_url)
+
+    # 1) Grupos primeiro: os itens apontam para DtoGrupoDeInformacoesAdicionais.Codigo
+    lotes_grupos = buscar_grupos.coletar_conceitos(
+        sessao_origem, origem_url.rstrip("/") + buscar_grupos.ENDPOINT_PATH, max_workers
+    )
+    registros_grupos = (
+        _sem_nulos(r) for r in buscar_grupos.registros_de_lotes(lotes_grupos, cliente_origem)
+    )
+    resumo_grupos, grupos_com_falha = _enviar_registros(
+        registros_grupos, salvar_grupos, sessao_destino,
+        destino_url.rstrip("/") + salvar_grupos.ENDPOINT_PATH, cliente_origem, cliente_destino, "codigo", retomar,
+    )
+    logging.info(f"📒 Grupos: {resumo_grupos}")
+    if grupos_com_falha:
+        logging.warning(f"⚠️ {len(grupos_com_falha)} grupos não foram salvos; os seus itens não serão enviados.")
+
+    # 2) Itens, conceito a conceito, assim que cada lista chega
+    lotes_itens = buscar_informacoes.coletar_conceitos(
+        sessao_origem, origem_url.rstrip("/") + buscar_informacoes.ENDPOINT_PATH, max_workers
+    )
+    resumo_itens = {}
+    endpoint_itens = destino_url.rstrip("/") + salvar_informacoes.ENDPOINT_PATH
+    for lote in lotes_itens:
+        registros = (_sem_nulos(r) for r in buscar_informacoes.registros_de_lotes([lote], cliente_origem))
+        resumo_itens, _ = _enviar_registros(
+            registros, salvar_informacoes, sessao_destino, endpoint_itens, cliente_origem, cliente_destino, "Codigo",
+            retomar, bloqueio=_bloqueio_por_grupo(grupos_com_falha),
+        )
+    logging.info(f"📒 Informações: {resumo_itens}")
+
+    logging.info("✅ Migração concluída!")
+    return {"grupos": resumo_grupos, "informacoes": resumo_itens}
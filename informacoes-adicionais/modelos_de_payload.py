@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Modelos de payload dos endpoints Salvar, compilados uma única vez.
+
+Um modelo é a lista ordenada de campos do formulário. Campos constantes
+(chaveParaExcluirItem, Status, identificadorDaAba...) já ficam codificados
+como "nome=valor"; por linha só os campos variáveis são extraídos e passam
+por quote_plus. O corpo gerado é idêntico ao que o requests produziria a
+partir do dicionário equivalente (campos None são omitidos).
+
+Uso:
+    modelo = ModeloDePayload([("Status", "ATIVO"), ("Codigo", lambda row: row.get("Codigo", ""))])
+    valores = modelo.valores(row)
+    corpo = modelo.codificar(valores)        # str application/x-www-form-urlencoded
+    payload = modelo.como_dict(valores)      # mesmo conteúdo, como dicionário
+"""
+
+from urllib.parse import quote_plus
+
+
+def _codificar_valor(valor) -> str:
+    return quote_plus(valor if isinstance(valor, (str, bytes)) else str(valor))
+
+
+class ModeloDePayload:
+    """Campos (nome, constante) ou (nome, extrator(row)), na ordem do formulário."""
+
+    __slots__ = ("campos", "_constantes", "_extratores", "_fragmentos", "_posicoes", "_prefixos")
+
+    def __init__(self, campos):
+        self.campos = tuple(nome for nome, _ in campos)
+        self._constantes = {}
+        self._extratores = []
+        self._fragmentos, self._posicoes, self._prefixos = [], [], []
+        for nome, fonte in campos:
+            if callable(fonte):
+                self._extratores.append((nome, fonte))
+                self._posicoes.append(len(self._fragmentos))
+                self._prefixos.append(_codificar_valor(nome) + "=")
+                self._fragmentos.append(None)
+            else:
+                self._constantes[nome] = fonte
+                self._fragmentos.append(f"{_codificar_valor(nome)}={_codificar_valor(fonte)}")
+
+    def valores(self, row: dict) -> list:
+        """Só os campos variáveis, na ordem do modelo."""
+        return [extrair(row) for _, extrair in self._extratores]
+
+    def codificar(self, valores) -> str:
+        partes = list(self._fragmentos)
+        for posicao, prefixo, valor in zip(self._posicoes, self._prefixos, valores):
+            if valor is not None:
+                partes[posicao] = prefixo + _codificar_valor(valor)
+        return "&".join(p for p in partes if p is not None)
+
+    def como_dict(self, valores) -> dict:
+        variaveis = dict(zip((nome for nome, _ in self._extratores), valores))
+        return {nome: self._constantes[nome] if nome in self._constantes else variaveis[nome]
+                for nome in self.campos}
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Orquestra login + exportação/importação para vários clientes em paralelo.
+
+Cada cliente faz o próprio login (sessão isolada) e depois executa as etapas
+em sequência; clientes diferentes rodam ao mesmo tempo, limitados por um
+teto global de concorrência. Os resultados são agregados por cliente.
+
+No Colab (loop de eventos já ativo):
+    resultados = await executar_clientes(["cliente_a", "cliente_b"], ETAPAS_IMPORTAR)
+
+Fora do Colab:
+    resultados = asyncio.run(executar_clientes(clientes, ETAPAS_EXPORTAR))
+
+Etapas async (ETAPAS_*_ASYNC, requerem aiohttp) rodam no mesmo loop do login
+Playwright, sem uma thread por cliente:
+    resultados = await executar_clientes(clientes, ETAPAS_EXPORTAR_ASYNC + ETAPAS_IMPORTAR_ASYNC)
+"""
+
+import time
+import asyncio
+import inspect
+import logging
+
+import buscar_grupo_de_informacao_adicional
+import buscar_informacoes_adicionais
+import salvar_grupo_informacao_adicional
+import salvar_informacao_adicional
+import agendador
+import metricas
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+MAX_CONCORRENCIA = 4  # clientes processados ao mesmo tempo
+
+
+# ==============================
+# ETAPAS PRONTAS
+# ==============================
+# Cada etapa recebe (url_base, cookies, cliente), como os run() dos módulos.
+# Clientes diferentes gravam em abas/colunas próprias para não se sobreporem.
+def exportar_grupos(url_base, cookies, cliente):
+    titulo = f"{buscar_grupo_de_informacao_adicional.WORKSHEET_TITLE}-{cliente}"
+    return buscar_grupo_de_informacao_adicional.run(url_base, cookies, cliente, worksheet_title=titulo)
+
+
+def exportar_informacoes(url_base, cookies, cliente):
+    titulo = f"{buscar_informacoes_adicionais.WORKSHEET_TITLE}-{cliente}"
+    return buscar_informacoes_adicionais.run(url_base, cookies, cliente, worksheet_title=titulo)
+
+
+def importar_grupos(url_base, cookies, cliente):
+    coluna = f"{salvar_grupo_informacao_adicional.COLUNA_RESULTADO}-{cliente}"
+    return salvar_grupo_informacao_adicional.run(url_base, cookies, cliente, retomar=True, coluna_resultado=coluna)
+
+
+def importar_informacoes(url_base, cookies, cliente):
+    coluna = f"{salvar_informacao_adicional.COLUNA_RESULTADO}-{cliente}"
+    return salvar_informacao_adicional.run(url_base, cookies, cliente, retomar=True, coluna_resultado=coluna)
+
+
+def importar_em_paralelo(url_base, cookies, cliente):
+    coluna = f"{salvar_informacao_adicional.COLUNA_RESULTADO}-{cliente}"
+    return agendador.importar(url_base, cookies, cliente, retomar=True, coluna_resultado=coluna)
+
+
+async def exportar_grupos_async(url_base, cookies, cliente):
+    titulo = f"{buscar_grupo_de_informacao_adicional.WORKSHEET_TITLE}-{cliente}"
+    return await buscar_grupo_de_informacao_adicional.run_async(url_base, cookies, cliente, worksheet_title=titulo)
+
+
+async def exportar_informacoes_async(url_base, cookies, cliente):
+    titulo = f"{buscar_informacoes_adicionais.WORKSHEET_TITLE}-{cliente}"
+    return await buscar_informacoes_adicionais.run_async(url_base, cookies, cliente, worksheet_title=titulo)
+
+
+async def importar_grupos_async(url_base, cookies, cliente):
+    coluna = f"{salvar_grupo_informacao_adicional.COLUNA_RESULTADO}-{cliente}"
+    return await salvar_grupo_informacao_adicional.run_async(url_base, cookies, cliente, retomar=True,
+                                                             coluna_resultado=coluna)
+
+
+async def importar_informacoes_async(url_base, cookies, cliente):
+    coluna = f"{salvar_informacao_adicional.COLUNA_RESULTADO}-{cliente}"
+    return await salvar_informacao_adicional.run_async(url_base, cookies, cliente, retomar=True,
+                                                       coluna_resultado=coluna)
+
+
+ETAPAS_EXPORTAR = [("exportar_grupos", exportar_grupos), ("exportar_informacoes", exportar_informacoes)]
+# Grupos antes dos itens, que referenciam o código do grupo
+ETAPAS_IMPORTAR = [("importar_grupos", importar_grupos), ("importar_informacoes", importar_informacoes)]
+# Mesma importação, com os itens de cada grupo liberados assim que o grupo é salvo
+ETAPAS_IMPORTAR_EM_PARALELO = [("importar_em_paralelo", importar_em_paralelo)]
+# Mesmas etapas em corrotinas (aiohttp), no loop do orquestrador
+ETAPAS_EXPORTAR_ASYNC = [("exportar_grupos", exportar_grupos_async), ("exportar_informacoes", exportar_informacoes_async)]
+ETAPAS_IMPORTAR_ASYNC = [("importar_grupos", importar_grupos_async), ("importar_informacoes", importar_informacoes_async)]
+
+
+# ==============================
+# EXECUÇÃO
+# ==============================
+async def _login(login, cliente):
+    if inspect.iscoroutinefunction(login):
+        sessao = await login(cliente)
+    else:
+        sessao = await asyncio.to_thread(login, cliente)
+    if not sessao or "erro" in sessao:
+        raise RuntimeError((sessao or {}).get("erro", "login sem retorno"))
+    return sessao
+
+
+async def executar_clientes(clientes, etapas, max_concorrencia: int = MAX_CONCORRENCIA, login=None):
+    """
+    Executa login + `etapas` para cada cliente, com no máximo `max_concorrencia`
+    clientes em andamento. `login(cliente)` pode ser async ou síncrono e deve
+    devolver {"url": ..., "cookies": ...}; o padrão é login_lg.login_lg sobre
+    um PoolDeNavegadores compartilhado.
+
+    Etapas síncronas rodam numa thread (asyncio.to_thread); etapas async são
+    aguardadas direto no loop.
+
+    Devolve {cliente: {"status", "etapas", "erro", "duracao"}}. A falha de um
+    cliente não interrompe os demais.
+    """
+    if login is None:
+        # Padrão: login Playwright com um único navegador compartilhado entre os clientes
+        from login_lg import PoolDeNavegadores, login_lg
+        async with PoolDeNavegadores() as pool:
+            async def login_no_pool(cliente):
+                return await login_lg(cliente, pool=pool)
+            return await executar_clientes(clientes, etapas, max_concorrencia, login_no_pool)
+
+    semaforo = asyncio.Semaphore(max_concorrencia)
+
+    async def processar(cliente):
+        resultado = {"status": "ok", "etapas": {}, "erro": None, "duracao": 0.0}
+        inicio = time.monotonic()
+        async with semaforo:
+            try:
+                sessao = await _login(login, cliente)
+                for nome, etapa in etapas:
+                    logging.info(f"▶️ [{cliente}] {nome}")
+                    if inspect.iscoroutinefunction(etapa):
+                        resultado["etapas"][nome] = await etapa(sessao["url"], sessao["cookies"], cliente)
+                    else:
+                        resultado["etapas"][nome] = await asyncio.to_thread(
+                            etapa, sessao["url"], sessao["cookies"], cliente
+                        )
+            except Exception as e:
+                logging.error(f"❌ [{cliente}] {e}")
+                resultado["status"] = "erro"
+                resultado["erro"] = str(e)
+        resultado["duracao"] = round(time.monotonic() - inicio, 2)
+        return cliente, resultado
+
+    # Os run() de todos os clientes registram nas métricas desta execução
+    with metricas.execucao("orquestrador"):
+        resultados = dict(await asyncio.gather(*(processar(c) for c in clientes)))
+    ok = sum(1 for r in resultados.values() if r["status"] == "ok")
+    logging.info(f"✅ {ok}/{len(resultados)} clientes concluídos sem erro.")
+    return resultados
@@ -0,0 +1,502 @@
+# -*- coding: utf-8 -*-
+"""
+Utilitários de Google Sheets compartilhados pelos scripts de informações adicionais.
+
+obter_aba() mantém um único cliente gspread autorizado por processo e guarda
+em cache o Spreadsheet e os metadados das abas, evitando refazer a troca de
+token OAuth e o open_by_key a cada etapa.
+
+GravadorDeResultados acumula as mensagens da coluna 'resultado' e grava tudo
+em lote (um batch_update com vários intervalos), em vez de uma chamada
+update_cell por linha.
+
+gravar_tabela() substitui o conteúdo de uma aba: envia os valores em blocos
+limitados por número de células e tamanho estimado, vários blocos em paralelo
+(values_batch_update), para uma aba temporária que só no fim toma o lugar do
+conteúdo da aba.
+
+sincronizar_delta() compara as linhas novas com o conteúdo atual da aba e
+grava apenas o que foi inserido, alterado ou removido.
+
+LeitorDeRegistros lê uma aba de importação em páginas de tamanho fixo, numa
+thread, e entrega os registros por uma fila limitada: o primeiro envio não
+espera a aba inteira e a memória não cresce com o tamanho da aba.
+
+Uso:
+    ws = obter_aba(SPREADSHEET_ID, WORKSHEET_TITLE)
+    with GravadorDeResultados(ws, col_resultado) as gravador:
+        gravador.registrar(idx, mensagem)
+"""
+
+import time
+import queue
+import logging
+import threading
+from itertools import chain
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import gspread
+from gspread.utils import rowcol_to_a1
+from google.oauth2.service_account import Credentials
+
+import metricas
+from credenciais import carregar_credencial
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+ESCOPOS = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+LOTE_RESULTADOS = 50        # grava a cada N linhas...
+INTERVALO_RESULTADOS = 10.0  # ...ou a cada T segundos, o que vier primeiro
+
+# Limites de cada requisição de escrita em massa
+MAX_CELULAS_POR_ENVIO = 50_000
+MAX_BYTES_POR_ENVIO = 1_500_000  # abaixo dos ~2 MB recomendados pela API do Sheets
+ENVIOS_PARALELOS = 4
+
+# Leitura paginada das abas de importação
+LINHAS_POR_PAGINA = 1000
+PAGINAS_EM_FILA = 2  # páginas lidas à frente de quem consome os registros
+
+
+# ==============================
+# CLIENTE E ABAS COMPARTILHADOS
+# ==============================
+_cliente = None
+_planilhas = {}  # sheet_id → Spreadsheet
+_abas = {}       # sheet_id → {título: Worksheet}
+_lock = threading.RLock()
+
+
+def definir_cliente(cliente):
+    """Substitui o cliente gspread do processo (ex.: um dublê em memória) e limpa o cache."""
+    global _cliente
+    with _lock:
+        _cliente = cliente
+        _planilhas.clear()
+        _abas.clear()
+
+
+def obter_cliente(creds_path: str = None):
+    """Autoriza uma única vez e devolve o cliente gspread compartilhado."""
+    global _cliente
+    with _lock:
+        if _cliente is None:
+            credentials = Credentials.from_service_account_info(carregar_credencial(creds_path), scopes=ESCOPOS)
+            _cliente = gspread.authorize(credentials)
+        return _cliente
+
+
+def obter_planilha(sheet_id: str, creds_path: str = None):
+    with _lock:
+        if sheet_id not in _planilhas:
+            _planilhas[sheet_id] = obter_cliente(creds_path).open_by_key(sheet_id)
+        return _planilhas[sheet_id]
+
+
+def obter_aba(sheet_id: str, worksheet_title: str, creds_path: str = None, criar: dict = None):
+    """
+    Devolve a aba pedida usando os metadados em cache.
+    Com criar={"rows": ..., "cols": ...} a aba é criada se não existir;
+    sem criar, gspread.WorksheetNotFound é propagada.
+    """
+    with _lock:
+        sh = obter_planilha(sheet_id, creds_path)
+        if sheet_id not in _abas:
+            _abas[sheet_id] = {ws.title: ws for ws in sh.worksheets()}
+        abas = _abas[sheet_id]
+
+        if worksheet_title not in abas:
+            if criar is None:
+                raise gspread.WorksheetNotFound(worksheet_title)
+            abas[worksheet_title] = sh.add_worksheet(title=worksheet_title, **criar)
+        # Com métricas ligadas, cada chamada à aba é cronometrada
+        return metricas.instrumentar_aba(abas[worksheet_title])
+
+
+def garantir_coluna(ws, nome: str) -> int:
+    """Cria a coluna `nome` no cabeçalho caso não exista e retorna seu índice (1-based)."""
+    with _lock:
+        cabecalho = ws.row_values(1)
+        if nome in cabecalho:
+            return cabecalho.index(nome) + 1
+        nova_coluna = len(cabecalho) + 1
+        if nova_coluna > ws.col_count:
+            ws.add_cols(nova_coluna - ws.col_count)
+        ws.update_cell(1, nova_coluna, nome)
+        return nova_coluna
+
+
+# ==============================
+# GRAVAÇÃO DE RESULTADOS EM LOTE
+# ==============================
+class GravadorDeResultados:
+    """Buffer de mensagens por linha, descarregado via ws.batch_update."""
+
+    def __init__(self, ws, coluna: int, lote: int = LOTE_RESULTADOS, intervalo: float = INTERVALO_RESULTADOS):
+        self.ws = ws
+        self.coluna = coluna
+        self.lote = lote
+        self.intervalo = intervalo
+        self._pendentes = {}
+        self._ultimo_envio = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Descarrega o que restou mesmo quando o loop terminou com exceção
+        self.flush()
+        return False
+
+    def registrar(self, linha: int, mensagem):
+        self.registrar_varios({linha: mensagem})
+
+    def registrar_varios(self, mensagens: dict):
+        """Mensagens de várias linhas ({linha: mensagem}) de uma vez."""
+        with self._lock:
+            self._pendentes.update(mensagens)
+            vencido = time.monotonic() - self._ultimo_envio >= self.intervalo
+            if len(self._pendentes) >= self.lote or vencido:
+                self._descarregar()
+
+    def flush(self):
+        with self._lock:
+            self._descarregar()
+
+    def _descarregar(self):
+        if not self._pendentes:
+            return
+        if self.ws is None:
+            # Execução sem planilha (ex.: registros vindos do repositório local)
+            self._pendentes.clear()
+            return
+
+        dados = [
+            {"range": intervalo, "values": [[m] for m in mensagens]}
+            for intervalo, mensagens in self._agrupar_intervalos()
+        ]
+        linhas = sorted(self._pendentes)
+        try:
+            self.ws.batch_update(dados, value_input_option="RAW")
+        except Exception as e:
+            logging.warning(f"⚠️ Falha ao gravar resultados das linhas {linhas[0]}–{linhas[-1]}: {e}")
+
+        self._pendentes.clear()
+        self._ultimo_envio = time.monotonic()
+
+    def _agrupar_intervalos(self):
+        """Junta linhas consecutivas em um único intervalo (ex.: H2:H51)."""
+        linhas = sorted(self._pendentes)
+        inicio = anterior = linhas[0]
+        for linha in linhas[1:] + [None]:
+            if linha is not None and linha == anterior + 1:
+                anterior = linha
+                continue
+            a1 = rowcol_to_a1(inicio, self.coluna)
+            if anterior != inicio:
+                a1 += ":" + rowcol_to_a1(anterior, self.coluna)
+            yield a1, [self._pendentes[l] for l in range(inicio, anterior + 1)]
+            if linha is not None:
+                inicio = anterior = linha
+
+
+# ==============================
+# LEITURA PAGINADA
+# ==============================
+class LeitorDeRegistros:
+    """
+    Registros {coluna: valor} da aba, lidos por uma thread em páginas de
+    `linhas_por_pagina` linhas (um ws.get por página) e entregues por uma fila
+    de até `paginas_em_fila` páginas. A leitura começa na primeira iteração.
+
+    Como no get_all_values, linhas em branco no meio da aba viram registros
+    vazios (a posição de cada registro continua sendo a da planilha), mesmo
+    depois de páginas inteiras em branco; a leitura vai até o fim da grade
+    (ws.row_count) e as linhas em branco do fim não viram registros. `converter(valores)` trata
+    cada linha antes de virar registro (ex.: numericise_all, como no get_all_records).
+    """
+
+    def __init__(self, ws, linhas_por_pagina: int = LINHAS_POR_PAGINA, paginas_em_fila: int = PAGINAS_EM_FILA,
+                 converter=None):
+        self.ws = ws
+        self.linhas_por_pagina = linhas_por_pagina
+        self.paginas_em_fila = paginas_em_fila
+        self.converter = converter
+
+    def __iter__(self):
+        for pagina in self.paginas():
+            yield from pagina
+
+    def paginas(self):
+        """Itera as páginas (listas de registros) conforme chegam da API."""
+        fila = queue.Queue(maxsize=max(1, self.paginas_em_fila))
+        parar = threading.Event()
+        threading.Thread(target=metricas.propagar(self._produzir), args=(fila, parar), daemon=True).start()
+        try:
+            while True:
+                pagina = fila.get()
+                if pagina is None:
+                    return
+                if isinstance(pagina, BaseException):
+                    raise pagina
+                yield pagina
+        finally:
+            parar.set()  # consumidor parou antes do fim: libera a thread
+
+    def _produzir(self, fila, parar):
+        def entregar(item):
+            while not parar.is_set():
+                try:
+                    fila.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        try:
+            cabecalho = self.ws.row_values(1)
+            largura = len(cabecalho)
+            total = self.ws.row_count
+            inicio, em_branco = 2, 0
+            # Intervalos além da grade são rejeitados pela API (400)
+            while largura and inicio <= total and not parar.is_set():
+                fim = min(inicio + self.linhas_por_pagina - 1, total)
+                valores = self.ws.get(f"A{inicio}:{rowcol_to_a1(fim, largura)}")
+                tamanho, inicio = fim - inicio + 1, fim + 1
+                # gspread 6 devolve [[]] (não []) para um intervalo sem dados. Como no
+                # get_all_values, uma página em branco não encerra a leitura
+                if not any(valores):
+                    em_branco += tamanho
+                    continue
+                # A API omite as linhas vazias do fim do intervalo; se houver dados
+                # depois delas, voltam como registros vazios
+                pagina = [self._registro(cabecalho, []) for _ in range(em_branco)]
+                pagina.extend(self._registro(cabecalho, linha) for linha in valores)
+                em_branco = tamanho - len(valores)
+                entregar(pagina)
+        except Exception as e:
+            entregar(e)
+        entregar(None)
+
+    def _registro(self, cabecalho, linha) -> dict:
+        linha = list(linha) + [""] * (len(cabecalho) - len(linha))
+        if self.converter is not None:
+            linha = self.converter(linha)
+        return dict(zip(cabecalho, linha))
+
+
+# ==============================
+# ESCRITA EM MASSA
+# ==============================
+def _bytes_estimados(linha) -> int:
+    # Texto de cada célula + aspas/vírgula no JSON da requisição
+    return sum(len(str(v).encode("utf-8")) + 3 for v in linha) + 2
+
+
+def blocos_por_carga(linhas, max_celulas: int = MAX_CELULAS_POR_ENVIO, max_bytes: int = MAX_BYTES_POR_ENVIO):
+    """Divide `linhas` em blocos consecutivos limitados por células e bytes estimados."""
+    bloco, celulas, tamanho = [], 0, 0
+    for linha in linhas:
+        c, b = len(linha), _bytes_estimados(linha)
+        if bloco and (celulas + c > max_celulas or tamanho + b > max_bytes):
+            yield bloco
+            bloco, celulas, tamanho = [], 0, 0
+        bloco.append(linha)
+        celulas += c
+        tamanho += b
+    if bloco:
+        yield bloco
+
+
+def garantir_grade(ws, linhas: int = 0, colunas: int = 0):
+    """Aumenta a grade (nunca diminui) para caber `linhas` × `colunas`; usa os metadados locais."""
+    if colunas > ws.col_count:
+        ws.add_cols(colunas - ws.col_count)
+    if linhas > ws.row_count:
+        ws.add_rows(linhas - ws.row_count)
+
+
+def anexar_linhas(ws, linhas):
+    """append_rows em blocos limitados por células e bytes."""
+    for bloco in blocos_por_carga(linhas):
+        ws.append_rows(bloco, value_input_option="RAW")
+
+
+def _intervalo(ws, linha: int) -> str:
+    titulo = ws.title.replace("'", "''")
+    return f"'{titulo}'!A{linha}"
+
+
+def _nome_temporario(ws) -> str:
+    # Títulos de aba têm no máximo 100 caracteres
+    return f"{ws.title[:70]} (gravando {time.strftime('%Y%m%d%H%M%S')})"
+
+
+def gravar_tabela(ws, header, linhas, envios_paralelos: int = ENVIOS_PARALELOS, total: int = None) -> int:
+    """
+    Substitui o conteúdo da aba por `header` + `linhas`.
+
+    Os valores seguem em blocos (MAX_CELULAS_POR_ENVIO / MAX_BYTES_POR_ENVIO),
+    cada um em seu próprio intervalo, enviados em paralelo via
+    values_batch_update para uma aba temporária já no formato final. Só com
+    todos os blocos gravados um único batch_update (atômico no Sheets)
+    redimensiona a aba, troca os valores pelos da temporária e a apaga; se um
+    envio falhar, a temporária é apagada e a aba fica como estava.
+    `linhas` pode ser um iterador se `total` (quantidade de linhas) for
+    informado; só os blocos em envio ficam em memória.
+    Devolve a quantidade de linhas de dados gravadas.
+    """
+    total = len(linhas) if total is None else total
+    altura, largura = total + 1, len(header)
+    sh = ws.spreadsheet
+    temporaria = sh.add_worksheet(title=_nome_temporario(ws), rows=altura, cols=largura)
+    try:
+        gravadas, quantidade = _enviar_blocos(temporaria, chain([header], linhas), envios_paralelos)
+    except BaseException:
+        sh.del_worksheet(temporaria)
+        raise
+
+    sh.batch_update({"requests": [
+        {"updateSheetProperties": {
+            "properties": {"sheetId": ws.id, "gridProperties": {"rowCount": altura, "columnCount": largura}},
+            "fields": "gridProperties(rowCount,columnCount)",
+        }},
+        {"updateCells": {"range": {"sheetId": ws.id}, "fields": "userEnteredValue"}},
+        {"copyPaste": {"source": {"sheetId": temporaria.id}, "destination": {"sheetId": ws.id},
+                       "pasteType": "PASTE_VALUES"}},
+        {"deleteSheet": {"sheetId": temporaria.id}},
+    ]})
+    # Como em sincronizar_delta: o batch_update não atualiza as propriedades guardadas na aba
+    ws._properties["gridProperties"].update(rowCount=altura, columnCount=largura)
+
+    gravadas -= 1  # o cabeçalho
+    logging.info(f"🧱 {gravadas} linhas gravadas na aba '{ws.title}' em {quantidade} envio(s).")
+    return gravadas
+
+
+def _enviar_blocos(ws, linhas, envios_paralelos: int):
+    """Grava `linhas` a partir de A1 em blocos paralelos; devolve (linhas gravadas, envios)."""
+    def envios():
+        proxima = 1
+        for bloco in blocos_por_carga(linhas):
+            yield {"range": _intervalo(ws, proxima), "values": bloco}
+            proxima += len(bloco)
+
+    def enviar(dados):
+        ws.spreadsheet.values_batch_update({"valueInputOption": "RAW", "data": [dados]})
+        return len(dados["values"])
+
+    gravadas, quantidade = 0, 0
+    if envios_paralelos <= 1:
+        for dados in envios():
+            gravadas += enviar(dados)
+            quantidade += 1
+    else:
+        with ThreadPoolExecutor(max_workers=envios_paralelos) as pool:
+            enviar = metricas.propagar(enviar)
+            pendentes = set()
+            for dados in envios():
+                if len(pendentes) >= envios_paralelos:
+                    feitos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                    gravadas += sum(f.result() for f in feitos)  # propaga a primeira falha
+                pendentes.add(pool.submit(enviar, dados))
+                quantidade += 1
+            gravadas += sum(f.result() for f in pendentes)
+    return gravadas, quantidade
+
+
+# ==============================
+# SINCRONIZAÇÃO INCREMENTAL (DELTA)
+# ==============================
+def valor_como_texto(v) -> str:
+    """Representação usada pelo Sheets ao devolver valores gravados em modo RAW."""
+    if v is None:
+        return ""
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))  # o Sheets devolve 1.0 como "1"
+    return str(v)
+
+
+def _intervalos_consecutivos(numeros):
+    """[2, 3, 4, 9] → [(2, 4), (9, 9)]"""
+    intervalos = []
+    for n in sorted(numeros):
+        if intervalos and n == intervalos[-1][1] + 1:
+            intervalos[-1] = (intervalos[-1][0], n)
+        else:
+            intervalos.append((n, n))
+    return intervalos
+
+
+def sincronizar_delta(ws, header, linhas, colunas_chave, escopo: dict):
+    """
+    Sincroniza `linhas` (alinhadas a `header`) com a aba lendo-a uma única vez.
+
+    As linhas são identificadas pelas `colunas_chave`. Só linhas existentes que
+    batem com `escopo` (ex.: {"cliente": cliente}) podem ser removidas, então
+    dados de outros clientes na mesma aba ficam intactos. Colunas novas são
+    acrescentadas ao fim do cabeçalho atual.
+
+    Devolve um dicionário com as quantidades inseridas, alteradas e removidas.
+    """
+    atuais = ws.get_all_values()
+    header_atual = atuais[0] if atuais else []
+    header_final = list(header_atual) + [c for c in header if c not in header_atual]
+    largura = len(header_final)
+
+    if header_final != header_atual:
+        if largura > ws.col_count:
+            ws.add_cols(largura - ws.col_count)
+        ws.update(values=[header_final], range_name="A1", value_input_option="RAW")
+
+    # Projeta as linhas novas no cabeçalho final
+    origem = {nome: i for i, nome in enumerate(header)}
+    pos_chave = [header_final.index(c) for c in colunas_chave]
+    pos_escopo = {header_final.index(c): valor_como_texto(v) for c, v in escopo.items()}
+
+    novas = {}
+    for linha in linhas:
+        valores = [linha[origem[nome]] if nome in origem else "" for nome in header_final]
+        valores = ["" if v is None else v for v in valores]
+        texto = [valor_como_texto(v) for v in valores]
+        novas[tuple(texto[p] for p in pos_chave)] = (valores, texto)
+
+    ultima_coluna = rowcol_to_a1(1, largura).rstrip("1")
+    alteracoes, remocoes, vistas = [], [], set()
+    for numero, existente in enumerate(atuais[1:], start=2):
+        existente = list(existente) + [""] * (largura - len(existente))
+        if any(existente[p] != v for p, v in pos_escopo.items()):
+            continue
+        chave = tuple(existente[p] for p in pos_chave)
+        if chave not in novas or chave in vistas:
+            remocoes.append(numero)
+            continue
+        vistas.add(chave)
+        valores, texto = novas[chave]
+        if existente[:largura] != texto:
+            alteracoes.append({"range": f"A{numero}:{ultima_coluna}{numero}", "values": [valores]})
+
+    insercoes = [valores for chave, (valores, _) in novas.items() if chave not in vistas]
+
+    # 1) alterações no lugar, 2) remoções de baixo para cima, 3) inserções ao fim
+    if alteracoes:
+        ws.batch_update(alteracoes, value_input_option="RAW")
+    if remocoes:
+        pedidos = [
+            {"deleteDimension": {"range": {
+                "sheetId": ws.id, "dimension": "ROWS", "startIndex": inicio - 1, "endIndex": fim,
+            }}}
+            for inicio, fim in reversed(_intervalos_consecutivos(remocoes))
+        ]
+        ws.spreadsheet.batch_update({"requests": pedidos})
+        # O batch_update da planilha não atualiza a aba em cache (obter_aba); sem isto o row_count
+        # ficaria maior que a grade e o LeitorDeRegistros pediria linhas que não existem mais
+        ws._properties["gridProperties"]["rowCount"] -= len(remocoes)
+    if insercoes:
+        anexar_linhas(ws, insercoes)
+
+    resumo = {"inseridas": len(insercoes), "alteradas": len(alteracoes), "removidas": len(remocoes)}
+    logging.info(f"🔁 Delta na aba '{ws.title}': {resumo}")
+    return resumo
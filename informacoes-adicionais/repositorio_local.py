@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Repositório local (SQLite) das coletas feitas pelos módulos buscar_*.
+
+Cada coleta grava os itens crus retornados pela LG, identificados por tipo
+("grupos" ou "informacoes"), cliente, conceito, código e instante da coleta.
+Uma coleta gravada em partes (streaming) só é vista pelas consultas depois
+de concluir_coleta. Só as COLETAS_MANTIDAS coletas concluídas mais recentes
+de cada tipo e cliente são guardadas; as anteriores são apagadas ao concluir
+uma nova.
+Comparações, auditorias e reimportações (salvar_* com cliente_origem=...)
+passam a ser consultas locais, sem Sheets nem portal.
+
+Uso:
+    repo = RepositorioLocal()
+    repo.gravar_coleta("informacoes", cliente, lotes)
+    for codigo_conceito, descricao_conceito, item in repo.itens("informacoes", cliente):
+        ...
+"""
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+REPOSITORIO_ARQUIVO = "catalogos_lg.sqlite"
+
+TIPO_GRUPOS = "grupos"
+TIPO_INFORMACOES = "informacoes"
+ITENS_POR_BLOCO = 1000  # itens por leitura em iterar_lotes
+COLETAS_MANTIDAS = 10   # coletas concluídas guardadas por tipo e cliente (None = todas)
+
+
+class RepositorioLocal:
+    def __init__(self, caminho: str = REPOSITORIO_ARQUIVO, coletas_mantidas: int = COLETAS_MANTIDAS):
+        self.coletas_mantidas = coletas_mantidas
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        sem_coletas = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'coletas'").fetchone() is None
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS itens (
+                tipo TEXT NOT NULL,
+                cliente TEXT NOT NULL,
+                codigo_conceito INTEGER NOT NULL,
+                descricao_conceito TEXT,
+                codigo TEXT,
+                buscado_em REAL NOT NULL,
+                dados TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_itens_chave
+                ON itens (tipo, cliente, codigo_conceito, codigo, buscado_em);
+            CREATE INDEX IF NOT EXISTS ix_itens_coleta
+                ON itens (tipo, cliente, buscado_em);
+            CREATE TABLE IF NOT EXISTS coletas (
+                tipo TEXT NOT NULL,
+                cliente TEXT NOT NULL,
+                buscado_em REAL NOT NULL,
+                concluida INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (tipo, cliente, buscado_em)
+            );
+        """)
+        if sem_coletas:
+            # Repositório anterior à tabela de coletas: as coletas parciais já eram descartadas
+            self._conn.execute(
+                "INSERT INTO coletas (tipo, cliente, buscado_em, concluida) "
+                "SELECT DISTINCT tipo, cliente, buscado_em, 1 FROM itens"
+            )
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+        return False
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------
+    # Gravação
+    # ------------------------------
+    def gravar_coleta(self, tipo: str, cliente: str, lotes, buscado_em: float = None, concluir: bool = True) -> float:
+        """
+        Grava uma coleta. `lotes` é o iterável de (codigo_conceito,
+        descricao_conceito, itens) produzido por coletar_conceitos.
+        Com concluir=False (coleta gravada em partes, com o mesmo `buscado_em`)
+        a coleta só passa a valer para as consultas depois de concluir_coleta.
+        Devolve o instante usado como identificador da coleta.
+        """
+        buscado_em = buscado_em or time.time()
+        linhas = (
+            (tipo, cliente, codigo_conceito, descricao_conceito,
+             None if item.get("Codigo") is None else str(item.get("Codigo")),
+             buscado_em, json.dumps(item, ensure_ascii=False))
+            for codigo_conceito, descricao_conceito, data in lotes
+            for item in data
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO coletas (tipo, cliente, buscado_em) VALUES (?, ?, ?)",
+                (tipo, cliente, buscado_em),
+            )
+            self._conn.executemany(
+                "INSERT INTO itens (tipo, cliente, codigo_conceito, descricao_conceito, codigo, buscado_em, dados) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                linhas,
+            )
+            self._conn.commit()
+        if concluir:
+            self.concluir_coleta(tipo, cliente, buscado_em)
+        return buscado_em
+
+    def concluir_coleta(self, tipo: str, cliente: str, buscado_em: float):
+        """
+        Marca a coleta como completa: a partir daqui ela pode ser a mais recente.
+        As concluídas além das `coletas_mantidas` mais recentes são apagadas.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE coletas SET concluida = 1 WHERE tipo = ? AND cliente = ? AND buscado_em = ?",
+                (tipo, cliente, buscado_em),
+            )
+            self._conn.commit()
+        if self.coletas_mantidas is not None:
+            self.podar(tipo, cliente, self.coletas_mantidas)
+
+    def podar(self, tipo: str, cliente: str, manter: int) -> int:
+        """Apaga as coletas concluídas de `tipo`/`cliente` além das `manter` mais recentes; devolve quantas."""
+        with self._lock:
+            antigas = [buscado_em for (buscado_em,) in self._conn.execute(
+                "SELECT buscado_em FROM coletas WHERE tipo = ? AND cliente = ? AND concluida = 1 "
+                "ORDER BY buscado_em DESC LIMIT -1 OFFSET ?",
+                (tipo, cliente, manter),
+            )]
+            for buscado_em in antigas:
+                for tabela in ("itens", "coletas"):
+                    self._conn.execute(
+                        f"DELETE FROM {tabela} WHERE tipo = ? AND cliente = ? AND buscado_em = ?",
+                        (tipo, cliente, buscado_em),
+                    )
+            self._conn.commit()
+        return len(antigas)
+
+    def descartar_coleta(self, tipo: str, cliente: str, buscado_em: float):
+        """Apaga uma coleta (ex.: interrompida no meio)."""
+        with self._lock:
+            for tabela in ("itens", "coletas"):
+                self._conn.execute(
+                    f"DELETE FROM {tabela} WHERE tipo = ? AND cliente = ? AND buscado_em = ?",
+                    (tipo, cliente, buscado_em),
+                )
+            self._conn.commit()
+
+    # ------------------------------
+    # Consultas
+    # ------------------------------
+    def ultima_coleta(self, tipo: str, cliente: str):
+        """Instante da coleta concluída mais recente (coletas ainda em gravação não contam), ou None."""
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT MAX(buscado_em) FROM coletas WHERE tipo = ? AND cliente = ? AND concluida = 1",
+                (tipo, cliente),
+            ).fetchone()
+        return linha[0]
+
+    def itens(self, tipo: str, cliente: str, codigo_conceito: int = None, buscado_em: float = None):
+        """Itens (codigo_conceito, descricao_conceito, item) da coleta pedida (padrão: a mais recente)."""
+        buscado_em = buscado_em or self.ultima_coleta(tipo, cliente)
+        if buscado_em is None:
+            return []
+
+        sql = ("SELECT codigo_conceito, descricao_conceito, dados FROM itens "
+               "WHERE tipo = ? AND cliente = ? AND buscado_em = ?")
+        parametros = [tipo, cliente, buscado_em]
+        if codigo_conceito is not None:
+            sql += " AND codigo_conceito = ?"
+            parametros.append(codigo_conceito)
+        sql += " ORDER BY rowid"
+
+        with self._lock:
+            linhas = self._conn.execute(sql, parametros).fetchall()
+        return [(conceito, descricao, json.loads(dados)) for conceito, descricao, dados in linhas]
+
+    def lotes(self, tipo: str, cliente: str, buscado_em: float = None):
+        """Reagrupa a coleta no mesmo formato de coletar_conceitos (ordem preservada)."""
+        agrupado = {}
+        for codigo_conceito, descricao_conceito, item in self.itens(tipo, cliente, buscado_em=buscado_em):
+            agrupado.setdefault((codigo_conceito, descricao_conceito), []).append(item)
+        return [(conceito, descricao, data) for (conceito, descricao), data in agrupado.items()]
+
+    def iterar_lotes(self, tipo: str, cliente: str, buscado_em: float, tamanho: int = ITENS_POR_BLOCO):
+        """Como lotes(), em blocos de até `tamanho` itens lidos sob demanda (um conceito pode vir em vários)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT codigo_conceito, descricao_conceito, dados FROM itens "
+                "WHERE tipo = ? AND cliente = ? AND buscado_em = ? ORDER BY rowid",
+                (tipo, cliente, buscado_em),
+            )
+        try:
+            while True:
+                with self._lock:
+                    linhas = cursor.fetchmany(tamanho)
+                if not linhas:
+                    return
+                agrupado = {}
+                for conceito, descricao, dados in linhas:
+                    agrupado.setdefault((conceito, descricao), []).append(json.loads(dados))
+                for (conceito, descricao), data in agrupado.items():
+                    yield conceito, descricao, data
+        finally:
+            cursor.close()
+
+    def buscar(self, tipo: str, cliente: str, codigo_conceito: int, codigo):
+        """Versão mais recente de um item específico entre as coletas concluídas, ou None."""
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT i.dados FROM itens i JOIN coletas c "
+                "ON c.tipo = i.tipo AND c.cliente = i.cliente AND c.buscado_em = i.buscado_em "
+                "WHERE i.tipo = ? AND i.cliente = ? AND i.codigo_conceito = ? AND i.codigo = ? AND c.concluida = 1 "
+                "ORDER BY i.buscado_em DESC LIMIT 1",
+                (tipo, cliente, codigo_conceito, str(codigo)),
+            ).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+
+@contextmanager
+def repositorio_de_espera(salvar_local: bool = True):
+    """
+    RepositorioLocal usado como área de espera de uma coleta em streaming: o
+    padrão quando `salvar_local`, senão um arquivo temporário apagado no fim.
+    """
+    if salvar_local:
+        with RepositorioLocal() as repo:
+            yield repo
+        return
+    diretorio = tempfile.mkdtemp(prefix="coleta_lg_")
+    try:
+        with RepositorioLocal(os.path.join(diretorio, REPOSITORIO_ARQUIVO)) as repo:
+            yield repo
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Envio linha a linha aos endpoints Salvar, compartilhado pelos módulos salvar_*.
+
+Cada módulo descreve o próprio cadastro uma única vez (endpoint, campo de
+código, etapa do diário, formulário, lista usada para ler o destino); os
+modos síncrono e async seguem o mesmo caminho: diário, índice do destino,
+cliente_http e gravação do resultado na planilha.
+
+Uso:
+    CADASTRO = Cadastro(ENDPOINT_PATH, "Codigo", DIARIO_ETAPA, codificar_payload, ...)
+    resumo = CADASTRO.executar(session, url_base, cliente, ws, col_resultado, registros)
+    resumo = await CADASTRO.executar_async(session, url_base, cliente, ws, col_resultado, registros)
+"""
+
+import asyncio
+import logging
+from collections import Counter
+
+import metricas
+from cliente_http import ErroLG, json_da_resposta, json_do_corpo, post, post_async
+from diario import DiarioDeExecucao, STATUS_PENDENTE, STATUS_PULADO, chave_registro, classificar_mensagem
+from fluxo_json import em_blocos
+from indice_destino import MENSAGEM_IDENTICO, SITUACAO_IDENTICO
+from planilhas import LINHAS_POR_PAGINA, GravadorDeResultados
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+MAX_CONCORRENCIA = 8  # envios em andamento no modo async (o ritmo continua sendo o do limitador)
+
+
+class Cadastro:
+    """
+    O que distingue um módulo salvar_*:
+      - endpoint_path / campo_codigo / diario_etapa: destino e identidade de cada linha;
+      - codificar(row): corpo do Salvar já codificado;
+      - descrever(row): texto da linha no log;
+      - buscar: módulo buscar_* com ENDPOINT_PATH, coletar_conceitos e
+        coletar_conceitos_async, usado para ler o destino;
+      - indexar(lotes, cliente): IndiceDeExistentes a partir dessas listas;
+      - timeout / taxa_inicial: como em cliente_http.post.
+    """
+
+    def __init__(self, endpoint_path: str, campo_codigo: str, diario_etapa: str, codificar, descrever, buscar,
+                 indexar, timeout, taxa_inicial: float):
+        self.endpoint_path = endpoint_path
+        self.campo_codigo = campo_codigo
+        self.diario_etapa = diario_etapa
+        self.codificar = codificar
+        self.descrever = descrever
+        self.buscar = buscar
+        self.indexar = indexar
+        self.timeout = timeout
+        self.taxa_inicial = taxa_inicial
+
+    def chave(self, row: dict) -> str:
+        return chave_registro(row.get("codigo_conceito"), row.get(self.campo_codigo))
+
+    # ------------------------------
+    # Envio
+    # ------------------------------
+    def enviar_registro(self, session, url: str, form_data) -> str:
+        """Envia o POST (dicionário ou corpo já codificado) e retorna a mensagem da resposta."""
+        try:
+            resp = post(session, url, form_data, timeout=self.timeout, taxa_inicial=self.taxa_inicial)
+            return self._mensagem(json_da_resposta(resp))
+        except ErroLG as e:
+            return str(e)
+        except Exception as e:
+            return f"Erro: {e}"
+
+    async def enviar_registro_async(self, session, url: str, form_data) -> str:
+        """Como enviar_registro, numa sessão aiohttp."""
+        try:
+            corpo = await post_async(session, url, form_data, timeout=self.timeout, taxa_inicial=self.taxa_inicial)
+            return self._mensagem(json_do_corpo(corpo, url))
+        except ErroLG as e:
+            return str(e)
+        except Exception as e:
+            return f"Erro: {e}"
+
+    @staticmethod
+    def _mensagem(result) -> str:
+        return result.get("mensagem", "(sem mensagem)")
+
+    # ------------------------------
+    # Destino
+    # ------------------------------
+    def indice_do_destino(self, session, url_base: str, cliente: str):
+        """
+        Lê o que já existe em `cliente` (um ObtenhaLista* por conceito) e indexa por (conceito, código).
+        Se a leitura falhar, devolve None e todas as linhas são enviadas.
+        """
+        endpoint = url_base.rstrip("/") + self.buscar.ENDPOINT_PATH
+        try:
+            lotes = list(self.buscar.coletar_conceitos(session, endpoint))
+        except ErroLG as e:
+            return self._sem_indice(e)
+        return self.indexar(lotes, cliente)
+
+    async def indice_do_destino_async(self, session, url_base: str, cliente: str):
+        """Como indice_do_destino, numa sessão aiohttp."""
+        endpoint = url_base.rstrip("/") + self.buscar.ENDPOINT_PATH
+        try:
+            lotes = await self.buscar.coletar_conceitos_async(session, endpoint)
+        except ErroLG as e:
+            return self._sem_indice(e)
+        return self.indexar(lotes, cliente)
+
+    @staticmethod
+    def _sem_indice(erro):
+        logging.warning(f"⚠️ Não foi possível ler o destino ({erro}); enviando sem verificação prévia.")
+        return None
+
+    # ------------------------------
+    # Uma página / uma linha
+    # ------------------------------
+    def preparar_pagina(self, cliente: str, pagina, diario, gravador, retomar: bool = False, indice=None):
+        """
+        Primeira etapa do envio de uma página [(idx, row)], com uma única ida ao
+        diário e à planilha. Devolve (situações, envios): as situações das linhas
+        puladas ou dispensadas e os [(idx, row, corpo)] a enviar (já pendentes no diário).
+        """
+        chaves = {idx: self.chave(row) for idx, row in pagina}
+        salvas = diario.salvos(cliente, chaves.values()) if retomar else set()
+        situacoes, envios, no_diario, na_planilha = [], [], [], {}
+        for idx, row in pagina:
+            chave = chaves[idx]
+            if chave in salvas:
+                situacoes.append(STATUS_PULADO)
+            elif indice is not None and indice.identico(row):
+                no_diario.append((chave, classificar_mensagem(MENSAGEM_IDENTICO), MENSAGEM_IDENTICO))
+                na_planilha[idx] = MENSAGEM_IDENTICO
+                situacoes.append(SITUACAO_IDENTICO)
+            else:
+                no_diario.append((chave, STATUS_PENDENTE, None))
+                envios.append((idx, row, self.codificar(row)))
+        diario.registrar_varios(cliente, no_diario)
+        gravador.registrar_varios(na_planilha)
+        return situacoes, envios
+
+    def concluir_pagina(self, cliente: str, respostas, diario, gravador) -> list:
+        """Última etapa: grava as respostas [(idx, row, mensagem)] no diário e na planilha; devolve os status."""
+        status = [classificar_mensagem(mensagem) for _, _, mensagem in respostas]
+        for idx, row, mensagem in respostas:
+            logging.info(f"[{idx - 1}] {self.descrever(row)} → {mensagem}")
+        diario.registrar_varios(cliente, [(self.chave(row), s, mensagem)
+                                          for (_, row, mensagem), s in zip(respostas, status)])
+        gravador.registrar_varios({idx: mensagem for idx, _, mensagem in respostas})
+        return status
+
+    def salvar_registro(self, session, endpoint: str, cliente: str, idx: int, row: dict, diario, gravador,
+                        retomar: bool = False, indice=None) -> str:
+        """
+        Processa uma linha: pula (já salva no diário), dispensa (idêntica ao destino)
+        ou envia ao Salvar. Devolve STATUS_PULADO, SITUACAO_IDENTICO, STATUS_SALVO ou STATUS_FALHA.
+        """
+        situacoes, envios = self.preparar_pagina(cliente, [(idx, row)], diario, gravador, retomar, indice)
+        if situacoes:
+            return situacoes[0]
+        mensagem = self.enviar_registro(session, endpoint, envios[0][2])
+        return self.concluir_pagina(cliente, [(idx, row, mensagem)], diario, gravador)[0]
+
+    async def enviar_pagina_async(self, session, endpoint: str, envios, max_concorrencia: int) -> list:
+        """
+        Envia os corpos de [(idx, row, corpo)] com até `max_concorrencia` POSTs em
+        andamento; devolve as mensagens na mesma ordem. Se um envio levantar, os
+        demais são cancelados antes de propagar o erro.
+        """
+        semaforo = asyncio.Semaphore(max_concorrencia)
+
+        async def enviar(corpo):
+            async with semaforo:
+                return await self.enviar_registro_async(session, endpoint, corpo)
+
+        tarefas = [asyncio.create_task(enviar(corpo)) for _, _, corpo in envios]
+        try:
+            return await asyncio.gather(*tarefas)
+        except BaseException:
+            for tarefa in tarefas:
+                tarefa.cancel()
+            await asyncio.gather(*tarefas, return_exceptions=True)
+            raise
+
+    # ------------------------------
+    # Execução
+    # ------------------------------
+    def executar(self, session, url_base: str, cliente: str, ws, col_resultado, registros, retomar: bool = False,
+                 verificar_destino: bool = True) -> dict:
+        """Laço de run(): lê o destino (opcional) e salva os registros um a um; devolve o resumo do diário."""
+        endpoint = url_base.rstrip("/") + self.endpoint_path
+        indice = None
+        if verificar_destino:
+            indice = self._indice_logado(self.indice_do_destino(session, url_base, cliente))
+
+        situacoes = Counter()
+        with DiarioDeExecucao(self.diario_etapa) as diario, GravadorDeResultados(ws, col_resultado) as gravador:
+            for idx, row in enumerate(registros, start=2):
+                situacoes[self.salvar_registro(session, endpoint, cliente, idx, row, diario, gravador, retomar,
+                                               indice)] += 1
+            return self.resumir(situacoes, diario, cliente)
+
+    async def executar_async(self, session, url_base: str, cliente: str, ws, col_resultado, registros,
+                             retomar: bool = False, verificar_destino: bool = True,
+                             max_concorrencia: int = MAX_CONCORRENCIA) -> dict:
+        """
+        Como executar, página a página: os envios de cada página correm no loop
+        (sessão aiohttp, até `max_concorrencia` em andamento); leitura da planilha,
+        diário e resultados vão para uma thread uma vez por página, não por linha.
+        """
+        endpoint = url_base.rstrip("/") + self.endpoint_path
+        indice = None
+        if verificar_destino:
+            indice = self._indice_logado(await self.indice_do_destino_async(session, url_base, cliente))
+
+        with DiarioDeExecucao(self.diario_etapa) as diario, GravadorDeResultados(ws, col_resultado) as gravador:
+            situacoes = Counter()
+            paginas = em_blocos(enumerate(registros, start=2), LINHAS_POR_PAGINA)
+            # A próxima página é lida numa thread enquanto a atual é enviada
+            proxima = asyncio.ensure_future(asyncio.to_thread(next, paginas, None))
+            try:
+                while True:
+                    pagina = await proxima
+                    if pagina is None:
+                        break
+                    proxima = asyncio.ensure_future(asyncio.to_thread(next, paginas, None))
+                    puladas, envios = await asyncio.to_thread(
+                        self.preparar_pagina, cliente, pagina, diario, gravador, retomar, indice)
+                    mensagens = await self.enviar_pagina_async(session, endpoint, envios, max_concorrencia)
+                    respostas = [(idx, row, mensagem) for (idx, row, _), mensagem in zip(envios, mensagens)]
+                    situacoes.update(puladas)
+                    situacoes.update(await asyncio.to_thread(self.concluir_pagina, cliente, respostas, diario,
+                                                             gravador))
+            finally:
+                proxima.cancel()
+            return self.resumir(situacoes, diario, cliente)
+
+    @staticmethod
+    def _indice_logado(indice):
+        if indice is not None:
+            logging.info(f"🔎 {len(indice)} registros já existentes no destino.")
+        return indice
+
+    @staticmethod
+    def resumir(situacoes: Counter, diario, cliente: str) -> dict:
+        logging.info(f"📄 {sum(situacoes.values())} registros processados.")
+        if situacoes[STATUS_PULADO]:
+            logging.info(f"⏭️ {situacoes[STATUS_PULADO]} registros já salvos em execução anterior foram pulados.")
+        if situacoes[SITUACAO_IDENTICO]:
+            logging.info(f"🟰 {situacoes[SITUACAO_IDENTICO]} registros idênticos aos do destino não foram reenviados.")
+            metricas.contar("salvar.dispensado", situacoes[SITUACAO_IDENTICO])
+        resumo = diario.resumo(cliente)
+        logging.info(f"📒 Diário: {resumo}")
+        return resumo
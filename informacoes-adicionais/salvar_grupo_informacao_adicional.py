@@ -6,14 +6,26 @@ Grava o resultado (mensagem) em uma coluna chamada 'resultado'.
 
 Pode ser chamado com:
     run(url_base, cookies, cliente)
+    run(url_base, cookies, cliente, retomar=True)  # pula o que o diário já confirmou
+    run(url_base, cookies, cliente, cliente_origem="outro")  # lê a última coleta local, sem planilha
+    run(url_base, cookies, cliente, verificar_destino=False)  # envia tudo, sem consultar o destino antes
+    await run_async(url_base, cookies, cliente)  # modo async (aiohttp), vários envios em andamento no loop
 """
 
-import json
-import time
+import asyncio
 import logging
 import requests
-import gspread
-from google.oauth2.service_account import Credentials
+from functools import lru_cache
+from gspread.utils import numericise_all
+
+import buscar_grupo_de_informacao_adicional
+import metricas
+from cliente_http import TAMANHO_DO_POOL, criar_sessao, criar_sessao_async
+from indice_destino import IndiceDeExistentes
+from modelos_de_payload import ModeloDePayload
+from planilhas import LeitorDeRegistros, garantir_coluna, obter_aba, valor_como_texto
+from repositorio_local import RepositorioLocal, TIPO_GRUPOS
+from salvar_comum import Cadastro
 
 # ==============================
 # CONFIGURAÇÕES FIXAS
@@ -24,117 +36,173 @@ IDENTIFICADOR_DA_ABA = "e3eaa866-3fab-4931-bc56-802923127f09"
 SPREADSHEET_ID = "1ijwb6D59j_3KQQaUnMifN88L79qvtuIEJ2Cq-yZv82E"
 WORKSHEET_TITLE = "grupo-informacoes-adicionais"
 COLUNA_RESULTADO = "resultado"
+DIARIO_ETAPA = "salvar_grupo_informacao_adicional"
 
-REQUEST_TIMEOUT = 30
-REQUEST_PAUSE = 0.8
+REQUEST_TIMEOUT = (5, 30)  # segundos: (conexão, leitura)
+REQUEST_PAUSE = 0.8  # ritmo inicial do limitador adaptativo (1 / REQUEST_PAUSE req/s)
+MAX_CONCORRENCIA = 8  # envios em andamento no modo async (o ritmo continua sendo o do limitador)
 
-# Credencial pública do Google Sheets
-url = "https://drive.google.com/uc?export=download&id=15Pzgk8O1bgbIH3cfdiBz6qwrzEbdfQtF"
-r = requests.get(url)
-open("credencial_sheets.json", "wb").write(r.content)
-SERVICE_ACCOUNT_FILE = "credencial_sheets.json"
+# Credencial do Sheets: carregada só no primeiro uso (ver credenciais.py).
+# None → variável LG_SHEETS_CREDENCIAL, cópia em disco ou download do Drive.
+SERVICE_ACCOUNT_FILE = None
 
 # ==============================
 # FUNÇÕES AUXILIARES
 # ==============================
-def build_session(cookie_str: str, base_url: str) -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "Accept": "*/*",
-        "Accept-Language": "pt-BR,pt;q=0.9",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Connection": "keep-alive",
-        "Origin": base_url,
-        "Referer": f"{base_url}/Gente/Produtos/Infraestrutura/InicioPorParametros/Index",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/141.0.0.0 Safari/537.36",
-        "X-Requested-With": "XMLHttpRequest",
-        "Cookie": cookie_str.strip(),
-    })
-    return s
+def build_session(cookie_str: str, base_url: str, tamanho_do_pool: int = TAMANHO_DO_POOL) -> requests.Session:
+    return criar_sessao(cookie_str, base_url, accept="*/*", tamanho_do_pool=tamanho_do_pool)
+
+
+def build_session_async(cookie_str: str, base_url: str, limite: int = MAX_CONCORRENCIA):
+    return criar_sessao_async(cookie_str, base_url, accept="*/*", limite=limite)
 
 
 def open_sheet(creds_path: str, sheet_id: str, worksheet_title: str):
-    scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    credentials = Credentials.from_service_account_file(creds_path, scopes=scopes)
-    gc = gspread.authorize(credentials)
-    sh = gc.open_by_key(sheet_id)
-    ws = sh.worksheet(worksheet_title)
-    return ws
+    return obter_aba(sheet_id, worksheet_title, creds_path)
+
+
+def enviar_registro(session: requests.Session, url: str, form_data):
+    """Envia um POST (dicionário ou corpo já codificado) e retorna a mensagem da resposta."""
+    return CADASTRO.enviar_registro(session, url, form_data)
+
 
+@lru_cache(maxsize=None)
+def modelo_de_payload(identificador_da_aba: str) -> ModeloDePayload:
+    """Formulário do Salvar, compilado uma única vez."""
+    return ModeloDePayload([
+        ("chaveParaExcluirItem", "Codigo"),
+        ("chaveParaConsultarItem", "Codigo"),
+        ("Cadastro_InserindoNovoRegistro", "true"),
+        ("_TxtCodigo", lambda row: row.get("codigo")),
+        ("Codigo", lambda row: row.get("codigo")),
+        ("cboModulo", lambda row: row.get("modulo")),
+        ("cboConceito", lambda row: row.get("codigo_conceito")),
+        ("Descricao", lambda row: row.get("descricao")),
+        ("X-Requested-With", "XMLHttpRequest"),
+        ("identificadorDaAba", identificador_da_aba),
+    ])
 
-def enviar_registro(session: requests.Session, url: str, form_data: dict):
-    """Envia um POST e retorna a mensagem da resposta."""
-    try:
-        resp = session.post(url, data=form_data, timeout=REQUEST_TIMEOUT)
-        if resp.status_code != 200:
-            return f"Erro HTTP {resp.status_code}"
 
-        try:
-            result = resp.json()
-        except json.JSONDecodeError:
-            return "Resposta inválida (não-JSON)"
+def montar_payload(row: dict, identificador_da_aba: str):
+    modelo = modelo_de_payload(identificador_da_aba)
+    return modelo.como_dict(modelo.valores(row))
 
-        return result.get("mensagem", "(sem mensagem)")
 
-    except Exception as e:
-        return f"Erro: {e}"
+def codificar_payload(row: dict, identificador_da_aba: str) -> str:
+    """Corpo x-www-form-urlencoded do Salvar; só os campos variáveis são codificados por linha."""
+    modelo = modelo_de_payload(identificador_da_aba)
+    return modelo.codificar(modelo.valores(row))
 
 
-def garantir_coluna_resultado(ws):
+def garantir_coluna_resultado(ws, nome: str = COLUNA_RESULTADO):
     """Cria a coluna 'resultado' caso não exista e retorna seu índice."""
-    cabecalho = ws.row_values(1)
-    if COLUNA_RESULTADO in cabecalho:
-        return cabecalho.index(COLUNA_RESULTADO) + 1
+    return garantir_coluna(ws, nome)
+
+
+def registros_do_repositorio(cliente_origem: str):
+    """Registros da última coleta local de `cliente_origem`, no formato de ws.get_all_records."""
+    with RepositorioLocal() as repo:
+        lotes = repo.lotes(TIPO_GRUPOS, cliente_origem)
+    return [
+        {k: "" if v is None else v for k, v in registro.items()}
+        for registro in buscar_grupo_de_informacao_adicional.registros_de_lotes(lotes, cliente_origem)
+    ]
+
+
+def _indice_de_lotes(lotes, cliente: str):
+    registros = (
+        {k: "" if v is None else v for k, v in registro.items()}
+        for registro in buscar_grupo_de_informacao_adicional.registros_de_lotes(lotes, cliente)
+    )
+    # Os dois lados passam pelo texto + numericise_all, como a planilha é lida: "001" do destino
+    # e 1 (o "001" da planilha convertido) caem na mesma chave e no mesmo payload. A lista de
+    # grupos não traz Status, então só os campos do payload entram na comparação.
+    return IndiceDeExistentes(registros, "codigo", montar_payload, IDENTIFICADOR_DA_ABA,
+                              normalizar=_normalizado)
+
+
+def _normalizado(row: dict) -> dict:
+    return converter_registro({k: valor_como_texto(v) for k, v in row.items()})
+
+
+def indice_do_destino(session, url_base: str, cliente: str):
+    """Registros já existentes em `cliente`, indexados por (conceito, código); None se a leitura falhar."""
+    return CADASTRO.indice_do_destino(session, url_base, cliente)
+
+
+def ler_registros(coluna_resultado: str = COLUNA_RESULTADO, cliente_origem: str = None, como_texto: bool = False):
+    """
+    (ws, coluna do resultado, registros) da planilha ou, com cliente_origem, do repositório local.
+    Da planilha, `registros` é um LeitorDeRegistros: iterável uma vez, página a página.
+    Com como_texto=True as linhas da planilha vêm sem numericise_all ("001" continua "001");
+    converter_registro(row) aplica a conversão depois.
+    """
+    if cliente_origem:
+        # Sem planilha: os registros vêm do repositório local e o resultado fica só no diário
+        return None, None, registros_do_repositorio(cliente_origem)
+    ws = open_sheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_ID, WORKSHEET_TITLE)
+    col_resultado = garantir_coluna_resultado(ws, coluna_resultado)
+    # Lida em páginas; valores numéricos convertidos como no get_all_records
+    registros = LeitorDeRegistros(ws, converter=None if como_texto else numericise_all)
+    return ws, col_resultado, registros
+
+
+def converter_registro(row: dict) -> dict:
+    """Linha lida com como_texto=True → valores numéricos convertidos, como no get_all_records."""
+    return dict(zip(row, numericise_all(list(row.values()))))
+
+
+def salvar_registro(session, endpoint: str, cliente: str, idx: int, row: dict, diario, gravador,
+                    retomar: bool = False, indice=None) -> str:
+    """
+    Processa uma linha: pula (já salva no diário), dispensa (idêntica ao destino)
+    ou envia ao Salvar. Devolve STATUS_PULADO, SITUACAO_IDENTICO, STATUS_SALVO ou STATUS_FALHA.
+    """
+    return CADASTRO.salvar_registro(session, endpoint, cliente, idx, row, diario, gravador, retomar, indice)
 
-    nova_coluna = len(cabecalho) + 1
-    ws.add_cols(1)
-    ws.update_cell(1, nova_coluna, COLUNA_RESULTADO)
-    return nova_coluna
+
+# Envio, leitura do destino e laço de run()/run_async() ficam em salvar_comum
+CADASTRO = Cadastro(
+    ENDPOINT_PATH, "codigo", DIARIO_ETAPA,
+    codificar=lambda row: codificar_payload(row, IDENTIFICADOR_DA_ABA),
+    descrever=lambda row: f"{row.get('codigo')}",
+    buscar=buscar_grupo_de_informacao_adicional,
+    indexar=_indice_de_lotes,
+    timeout=REQUEST_TIMEOUT,
+    taxa_inicial=1 / REQUEST_PAUSE,
+)
 
 
 # ==============================
 # EXECUÇÃO PRINCIPAL
 # ==============================
-def run(url_base: str, cookies: str, cliente: str):
+@metricas.execucao_medida("salvar_grupo_informacao_adicional")
+def run(url_base: str, cookies: str, cliente: str, retomar: bool = False,
+        coluna_resultado: str = COLUNA_RESULTADO, cliente_origem: str = None,
+        verificar_destino: bool = True):
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
     logging.info(f"🔹 Iniciando cadastro de grupos de informação adicional para o cliente: {cliente}")
 
-    endpoint = url_base.rstrip("/") + ENDPOINT_PATH
     session = build_session(cookies, url_base)
-    ws = open_sheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_ID, WORKSHEET_TITLE)
-    col_resultado = garantir_coluna_resultado(ws)
-
-    registros = ws.get_all_records()
-    total = len(registros)
-    logging.info(f"📄 {total} registros lidos da planilha.")
-
-    for idx, row in enumerate(registros, start=2):
-        codigo = row.get("codigo")
-        descricao = row.get("descricao")
-        conceito = row.get("codigo_conceito")
-        modulo = row.get("modulo")
-
-        form_data = {
-            "chaveParaExcluirItem": "Codigo",
-            "chaveParaConsultarItem": "Codigo",
-            "Cadastro_InserindoNovoRegistro": "true",
-            "_TxtCodigo": codigo,
-            "Codigo": codigo,
-            "cboModulo": modulo,
-            "cboConceito": conceito,
-            "Descricao": descricao,
-            "X-Requested-With": "XMLHttpRequest",
-            "identificadorDaAba": IDENTIFICADOR_DA_ABA,
-        }
-
-        mensagem = enviar_registro(session, endpoint, form_data)
-        logging.info(f"[{idx - 1}/{total}] {codigo} → {mensagem}")
-
-        try:
-            ws.update_cell(idx, col_resultado, mensagem)
-        except Exception as e:
-            logging.warning(f"⚠️ Falha ao atualizar linha {idx}: {e}")
-
-        time.sleep(REQUEST_PAUSE)
+    ws, col_resultado, registros = ler_registros(coluna_resultado, cliente_origem)
+    resumo = CADASTRO.executar(session, url_base, cliente, ws, col_resultado, registros, retomar, verificar_destino)
+
+    logging.info("✅ Processo concluído com sucesso!")
+    return resumo
+
+
+@metricas.execucao_medida("salvar_grupo_informacao_adicional")
+async def run_async(url_base: str, cookies: str, cliente: str, retomar: bool = False,
+                    coluna_resultado: str = COLUNA_RESULTADO, cliente_origem: str = None,
+                    verificar_destino: bool = True, max_concorrencia: int = MAX_CONCORRENCIA):
+    """Como run(), com até `max_concorrencia` envios em andamento num único loop (aiohttp)."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    logging.info(f"🔹 Iniciando cadastro de grupos de informação adicional para o cliente: {cliente}")
+
+    ws, col_resultado, registros = await asyncio.to_thread(ler_registros, coluna_resultado, cliente_origem)
+    async with build_session_async(cookies, url_base, max_concorrencia) as session:
+        resumo = await CADASTRO.executar_async(session, url_base, cliente, ws, col_resultado, registros, retomar,
+                                               verificar_destino, max_concorrencia)
 
     logging.info("✅ Processo concluído com sucesso!")
+    return resumo
@@ -6,14 +6,25 @@ Grava o resultado (mensagem) em uma nova coluna chamada 'resultado'.
 
 Pode ser chamada com:
     run(url_base, cookies, cliente)
+    run(url_base, cookies, cliente, retomar=True)  # pula o que o diário já confirmou
+    run(url_base, cookies, cliente, cliente_origem="outro")  # lê a última coleta local, sem planilha
+    run(url_base, cookies, cliente, verificar_destino=False)  # envia tudo, sem consultar o destino antes
+    await run_async(url_base, cookies, cliente)  # modo async (aiohttp), vários envios em andamento no loop
 """
 
-import json
-import time
+import asyncio
 import logging
 import requests
-import gspread
-from google.oauth2.service_account import Credentials
+from functools import lru_cache
+
+import buscar_informacoes_adicionais
+import metricas
+from cliente_http import TAMANHO_DO_POOL, criar_sessao, criar_sessao_async
+from indice_destino import IndiceDeExistentes
+from modelos_de_payload import ModeloDePayload
+from planilhas import LeitorDeRegistros, garantir_coluna, obter_aba, valor_como_texto
+from repositorio_local import RepositorioLocal, TIPO_INFORMACOES
+from salvar_comum import Cadastro
 
 # ==============================
 # CONFIGURAÇÕES FIXAS
@@ -24,75 +35,49 @@ IDENTIFICADOR_DA_ABA = "1357cb4d-919b-4f17-ac76-800cd42ecc71"
 SPREADSHEET_ID = "1ijwb6D59j_3KQQaUnMifN88L79qvtuIEJ2Cq-yZv82E"
 WORKSHEET_TITLE = "informacoes-adicionais"
 COLUNA_RESULTADO = "resultado"
+DIARIO_ETAPA = "salvar_informacao_adicional"
+STATUS_ATIVOS = {"", "1", "ATIVO"}  # Status de um item ativo na lista do destino
 
-REQUEST_TIMEOUT = 30
-REQUEST_PAUSE = 0.8
+REQUEST_TIMEOUT = (5, 30)  # segundos: (conexão, leitura)
+REQUEST_PAUSE = 0.8  # ritmo inicial do limitador adaptativo (1 / REQUEST_PAUSE req/s)
+MAX_CONCORRENCIA = 8  # envios em andamento no modo async (o ritmo continua sendo o do limitador)
 
-# Credencial pública do Google Sheets
-url = "https://drive.google.com/uc?export=download&id=15Pzgk8O1bgbIH3cfdiBz6qwrzEbdfQtF"
-r = requests.get(url)
-open("credencial_sheets.json", "wb").write(r.content)
-SERVICE_ACCOUNT_FILE = "credencial_sheets.json"
+# Credencial do Sheets: carregada só no primeiro uso (ver credenciais.py).
+# None → variável LG_SHEETS_CREDENCIAL, cópia em disco ou download do Drive.
+SERVICE_ACCOUNT_FILE = None
 
 # ==============================
 # FUNÇÕES AUXILIARES
 # ==============================
-def build_session(cookie_str: str, base_url: str) -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "Accept": "*/*",
-        "Accept-Language": "pt-BR,pt;q=0.9",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Connection": "keep-alive",
-        "Origin": base_url,
-        "Referer": f"{base_url}/Gente/Produtos/Infraestrutura/InicioPorParametros/Index",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/141.0.0.0 Safari/537.36",
-        "X-Requested-With": "XMLHttpRequest",
-        "Cookie": cookie_str.strip(),
-    })
-    return s
+def build_session(cookie_str: str, base_url: str, tamanho_do_pool: int = TAMANHO_DO_POOL) -> requests.Session:
+    return criar_sessao(cookie_str, base_url, accept="*/*", tamanho_do_pool=tamanho_do_pool)
+
+
+def build_session_async(cookie_str: str, base_url: str, limite: int = MAX_CONCORRENCIA):
+    return criar_sessao_async(cookie_str, base_url, accept="*/*", limite=limite)
 
 
 def open_sheet(creds_path: str, sheet_id: str, worksheet_title: str):
-    scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    credentials = Credentials.from_service_account_file(creds_path, scopes=scopes)
-    gc = gspread.authorize(credentials)
-    sh = gc.open_by_key(sheet_id)
-    ws = sh.worksheet(worksheet_title)
-    return ws
+    return obter_aba(sheet_id, worksheet_title, creds_path)
 
 
 def get_rows_as_text(ws):
-    """Lê todas as linhas preservando o formato textual"""
-    data = ws.get_all_values()
-    headers = data[0]
-    return [dict(zip(headers, row)) for row in data[1:]]
+    """
+    Registros da aba, lidos em páginas, preservando o formato textual.
+    Devolve um LeitorDeRegistros, não uma lista: iterável uma única vez, sem len()
+    nem índice; quem precisar da lista inteira usa list(get_rows_as_text(ws)).
+    """
+    return LeitorDeRegistros(ws)
 
 
-def garantir_coluna_resultado(ws):
+def garantir_coluna_resultado(ws, nome: str = COLUNA_RESULTADO):
     """Cria a coluna 'resultado' caso não exista e retorna o índice"""
-    cabecalho = ws.row_values(1)
-    if COLUNA_RESULTADO in cabecalho:
-        return cabecalho.index(COLUNA_RESULTADO) + 1
-    nova_coluna = len(cabecalho) + 1
-    ws.add_cols(1)
-    ws.update_cell(1, nova_coluna, COLUNA_RESULTADO)
-    return nova_coluna
-
-
-def enviar_registro(session: requests.Session, url: str, form_data: dict):
-    """Envia o POST e retorna mensagem"""
-    try:
-        resp = session.post(url, data=form_data, timeout=REQUEST_TIMEOUT)
-        if resp.status_code != 200:
-            return f"Erro HTTP {resp.status_code}"
-        try:
-            result = resp.json()
-            return result.get("mensagem", "(sem mensagem)")
-        except json.JSONDecodeError:
-            return "Resposta inválida"
-    except Exception as e:
-        return str(e)
+    return garantir_coluna(ws, nome)
+
+
+def enviar_registro(session: requests.Session, url: str, form_data):
+    """Envia o POST (dicionário ou corpo já codificado) e retorna mensagem"""
+    return CADASTRO.enviar_registro(session, url, form_data)
 
 
 def safe_str(value):
@@ -107,89 +92,172 @@ def safe_str(value):
     return value.strip()
 
 
+def _da_linha(coluna: str, padrao=""):
+    return lambda row: row.get(coluna, padrao)
+
+
+# Campos adicionais por tipo, acrescentados ao fim do formulário
+CAMPOS_POR_TIPO = {
+    0: [
+        ("Comprimento", _da_linha("Comprimento")),
+        ("NumeroDeLinhasVisiveis", _da_linha("NumeroDeLinhasVisiveis")),
+        ("Mascara", lambda row: safe_str(row.get("Mascara", ""))),
+        ("ValorPadrao", _da_linha("ValorPadrao")),
+    ],
+    1: [("ValorPadrao", _da_linha("ValorPadrao"))],
+    2: [
+        ("Mascara", lambda row: safe_str(row.get("Mascara", ""))),
+        ("PreenchimentoExclusivo", lambda row: str(row.get("PreenchimentoExclusivo", "False")).capitalize()),
+        ("ValorPadrao", _da_linha("ValorPadrao")),
+    ],
+    3: [
+        ("Comprimento", _da_linha("Comprimento")),
+        ("QuantidadeCasasDecimais", _da_linha("QuantidadeCasasDecimais")),
+    ],
+    4: [("MascaraDeData.Codigo", _da_linha("MascaraDeData"))],
+    5: [
+        ("OpcoesSelecaoUnica", _da_linha("Opcoes", "[]")),
+        ("OpcoesSelecaoUnicaRemovidos", "[]"),
+        ("FormaDeApresentacaoSelUnica", _da_linha("FormaDeApresentacaoSelUnica", 0)),
+        ("NumeroDeLinhasVisiveis", _da_linha("NumeroDeLinhasVisiveis", 1)),
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def modelo_de_payload(tipo: int, identificador_da_aba: str) -> ModeloDePayload:
+    """Formulário do Salvar para um tipo, compilado uma única vez."""
+    return ModeloDePayload([
+        ("chaveParaExcluirItem", "Codigo"),
+        ("chaveParaConsultarItem", "Codigo"),
+        ("Status", "ATIVO"),
+        ("Cadastro_InserindoNovoRegistro", "True"),
+        ("cboModulo", _da_linha("modulo")),
+        ("cboConceito", _da_linha("codigo_conceito")),
+        ("Ordem", _da_linha("Ordem")),
+        ("DtoGrupoDeInformacoesAdicionais.Codigo", _da_linha("codigo_informacao_adicional")),
+        ("Codigo", _da_linha("Codigo")),
+        ("_TxtCodigo", _da_linha("Codigo")),
+        ("Descricao", _da_linha("Descricao")),
+        ("Observacao", _da_linha("Observacao")),
+        ("Tipo", tipo),
+        ("Obrigatorio", lambda row: str(row.get("Obrigatorio", "False")).capitalize()),
+        ("InserirValorPadraoEmRegistrosAtivos",
+         lambda row: str(row.get("InserirValorPadraoEmRegistrosAtivos", "false")).lower()),
+        ("APartirDe", _da_linha("APartirDe")),
+        ("identificadorDaAba", identificador_da_aba),
+        ("X-Requested-With", "XMLHttpRequest"),
+    ] + CAMPOS_POR_TIPO.get(tipo, []))
+
+
+def _modelo_da_linha(row: dict, identificador_da_aba: str) -> ModeloDePayload:
+    return modelo_de_payload(int(row.get("Tipo", 0) or 0), identificador_da_aba)
+
+
 def montar_payload(row: dict, identificador_da_aba: str):
-    tipo = int(row.get("Tipo", 0) or 0)
-
-    base = {
-        "chaveParaExcluirItem": "Codigo",
-        "chaveParaConsultarItem": "Codigo",
-        "Status": "ATIVO",
-        "Cadastro_InserindoNovoRegistro": "True",
-        "cboModulo": row.get("modulo", ""),
-        "cboConceito": row.get("codigo_conceito", ""),
-        "Ordem": row.get("Ordem", ""),
-        "DtoGrupoDeInformacoesAdicionais.Codigo": row.get("codigo_informacao_adicional", ""),
-        "Codigo": row.get("Codigo", ""),
-        "_TxtCodigo": row.get("Codigo", ""),
-        "Descricao": row.get("Descricao", ""),
-        "Observacao": row.get("Observacao", ""),
-        "Tipo": tipo,
-        "Obrigatorio": str(row.get("Obrigatorio", "False")).capitalize(),
-        "InserirValorPadraoEmRegistrosAtivos": str(row.get("InserirValorPadraoEmRegistrosAtivos", "false")).lower(),
-        "APartirDe": row.get("APartirDe", ""),
-        "identificadorDaAba": identificador_da_aba,
-        "X-Requested-With": "XMLHttpRequest"
-    }
-
-    # Campos adicionais por tipo
-    if tipo == 0:
-        base.update({
-            "Comprimento": row.get("Comprimento", ""),
-            "NumeroDeLinhasVisiveis": row.get("NumeroDeLinhasVisiveis", ""),
-            "Mascara": safe_str(row.get("Mascara", "")),
-            "ValorPadrao": row.get("ValorPadrao", "")
-        })
-    elif tipo == 1:
-        base.update({"ValorPadrao": row.get("ValorPadrao", "")})
-    elif tipo == 2:
-        base.update({
-            "Mascara": safe_str(row.get("Mascara", "")),
-            "PreenchimentoExclusivo": str(row.get("PreenchimentoExclusivo", "False")).capitalize(),
-            "ValorPadrao": row.get("ValorPadrao", "")
-        })
-    elif tipo == 3:
-        base.update({
-            "Comprimento": row.get("Comprimento", ""),
-            "QuantidadeCasasDecimais": row.get("QuantidadeCasasDecimais", "")
-        })
-    elif tipo == 4:
-        base.update({"MascaraDeData.Codigo": row.get("MascaraDeData", "")})
-    elif tipo == 5:
-        base.update({
-            "OpcoesSelecaoUnica": row.get("Opcoes", "[]"),
-            "OpcoesSelecaoUnicaRemovidos": "[]",
-            "FormaDeApresentacaoSelUnica": row.get("FormaDeApresentacaoSelUnica", 0),
-            "NumeroDeLinhasVisiveis": row.get("NumeroDeLinhasVisiveis", 1)
-        })
-
-    return base
+    modelo = _modelo_da_linha(row, identificador_da_aba)
+    return modelo.como_dict(modelo.valores(row))
+
+
+def codificar_payload(row: dict, identificador_da_aba: str) -> str:
+    """Corpo x-www-form-urlencoded do Salvar; só os campos variáveis são codificados por linha."""
+    modelo = _modelo_da_linha(row, identificador_da_aba)
+    return modelo.codificar(modelo.valores(row))
+
+
+def registros_do_repositorio(cliente_origem: str):
+    """Registros da última coleta local de `cliente_origem`, no formato de get_rows_as_text."""
+    with RepositorioLocal() as repo:
+        lotes = repo.lotes(TIPO_INFORMACOES, cliente_origem)
+    return [
+        {k: valor_como_texto(v) for k, v in registro.items()}
+        for registro in buscar_informacoes_adicionais.registros_de_lotes(lotes, cliente_origem)
+    ]
+
+
+def _indice_de_lotes(lotes, cliente: str):
+    registros = (
+        {k: valor_como_texto(v) for k, v in registro.items()}
+        for registro in buscar_informacoes_adicionais.registros_de_lotes(lotes, cliente)
+    )
+    return IndiceDeExistentes(registros, "Codigo", montar_payload, IDENTIFICADOR_DA_ABA, ativo=_ativo_no_destino)
+
+
+def _ativo_no_destino(registro: dict) -> bool:
+    # Status da lista do destino; vazio quando a coleta não traz a coluna
+    return registro.get("Status", "").upper() in STATUS_ATIVOS
+
+
+def indice_do_destino(session, url_base: str, cliente: str):
+    """Registros já existentes em `cliente`, indexados por (conceito, código); None se a leitura falhar."""
+    return CADASTRO.indice_do_destino(session, url_base, cliente)
+
+
+def ler_registros(coluna_resultado: str = COLUNA_RESULTADO, cliente_origem: str = None):
+    """
+    (ws, coluna do resultado, registros) da planilha ou, com cliente_origem, do repositório local.
+    Da planilha, `registros` é um LeitorDeRegistros: iterável uma vez, página a página.
+    """
+    if cliente_origem:
+        # Sem planilha: os registros vêm do repositório local e o resultado fica só no diário
+        return None, None, registros_do_repositorio(cliente_origem)
+    ws = open_sheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_ID, WORKSHEET_TITLE)
+    col_resultado = garantir_coluna_resultado(ws, coluna_resultado)
+    registros = get_rows_as_text(ws)
+    return ws, col_resultado, registros
+
+
+def salvar_registro(session, endpoint: str, cliente: str, idx: int, row: dict, diario, gravador,
+                    retomar: bool = False, indice=None) -> str:
+    """
+    Processa uma linha: pula (já salva no diário), dispensa (idêntica ao destino)
+    ou envia ao Salvar. Devolve STATUS_PULADO, SITUACAO_IDENTICO, STATUS_SALVO ou STATUS_FALHA.
+    """
+    return CADASTRO.salvar_registro(session, endpoint, cliente, idx, row, diario, gravador, retomar, indice)
+
+
+# Envio, leitura do destino e laço de run()/run_async() ficam em salvar_comum
+CADASTRO = Cadastro(
+    ENDPOINT_PATH, "Codigo", DIARIO_ETAPA,
+    codificar=lambda row: codificar_payload(row, IDENTIFICADOR_DA_ABA),
+    descrever=lambda row: f"Código={row.get('Codigo')} Tipo={row.get('Tipo')}",
+    buscar=buscar_informacoes_adicionais,
+    indexar=_indice_de_lotes,
+    timeout=REQUEST_TIMEOUT,
+    taxa_inicial=1 / REQUEST_PAUSE,
+)
 
 
 # ==============================
 # EXECUÇÃO PRINCIPAL
 # ==============================
-def run(url_base: str, cookies: str, cliente: str):
+@metricas.execucao_medida("salvar_informacao_adicional")
+def run(url_base: str, cookies: str, cliente: str, retomar: bool = False,
+        coluna_resultado: str = COLUNA_RESULTADO, cliente_origem: str = None,
+        verificar_destino: bool = True):
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
     logging.info(f"🔹 Iniciando envio de informações adicionais para {cliente}")
 
-    endpoint = url_base.rstrip("/") + ENDPOINT_PATH
     session = build_session(cookies, url_base)
-    ws = open_sheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_ID, WORKSHEET_TITLE)
-    col_resultado = garantir_coluna_resultado(ws)
+    ws, col_resultado, registros = ler_registros(coluna_resultado, cliente_origem)
+    resumo = CADASTRO.executar(session, url_base, cliente, ws, col_resultado, registros, retomar, verificar_destino)
 
-    rows = get_rows_as_text(ws)
-    logging.info(f"📄 {len(rows)} registros lidos da planilha.")
+    logging.info("✅ Processo concluído com sucesso!")
+    return resumo
 
-    for idx, row in enumerate(rows, start=2):
-        payload = montar_payload(row, IDENTIFICADOR_DA_ABA)
-        mensagem = enviar_registro(session, endpoint, payload)
-        logging.info(f"[{idx - 1}] Código={row.get('Codigo')} Tipo={row.get('Tipo')} → {mensagem}")
 
-        try:
-            ws.update_cell(idx, col_resultado, mensagem)
-        except Exception as e:
-            logging.warning(f"⚠️ Falha ao atualizar linha {idx}: {e}")
+@metricas.execucao_medida("salvar_informacao_adicional")
+async def run_async(url_base: str, cookies: str, cliente: str, retomar: bool = False,
+                    coluna_resultado: str = COLUNA_RESULTADO, cliente_origem: str = None,
+                    verificar_destino: bool = True, max_concorrencia: int = MAX_CONCORRENCIA):
+    """Como run(), com até `max_concorrencia` envios em andamento num único loop (aiohttp)."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    logging.info(f"🔹 Iniciando envio de informações adicionais para {cliente}")
 
-        time.sleep(REQUEST_PAUSE)
+    ws, col_resultado, registros = await asyncio.to_thread(ler_registros, coluna_resultado, cliente_origem)
+    async with build_session_async(cookies, url_base, max_concorrencia) as session:
+        resumo = await CADASTRO.executar_async(session, url_base, cliente, ws, col_resultado, registros, retomar,
+                                               verificar_destino, max_concorrencia)
 
     logging.info("✅ Processo concluído com sucesso!")
+    return resumo
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Cache persistente das sessões do portal LG ({"url", "cookies"}) por cliente.
+
+Antes de reaproveitar uma sessão salva, uma única requisição autenticada e
+barata (a página inicial do portal, sem seguir redirecionamentos nem ler o
+corpo) confirma que os cookies ainda são aceitos. O login completo no
+navegador só acontece quando não há sessão salva ou quando o portal a recusa
+(redirecionamento para o login ou 401); uma falha de rede no teste não
+descarta a sessão.
+
+Uso:
+    sessao = obter_sessao_valida(cliente)   # None → fazer login
+    salvar_sessao(cliente, sessao)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+import requests
+
+import metricas
+from cliente_http import criar_sessao
+
+# ==============================
+# CONFIGURAÇÕES
+# ==============================
+CACHE_ARQUIVO = "sessoes_lg.json"
+VALIDADE_MAXIMA = 12 * 3600  # segundos; sessões mais antigas nem são testadas
+PROBE_TIMEOUT = (5, 15)  # segundos: (conexão, leitura)
+
+# Página inicial do portal (o Referer de cliente_http): só o status da resposta interessa
+PROBE_PATH = "/Gente/Produtos/Infraestrutura/InicioPorParametros/Index"
+ACCEPT_HTML = "text/html,application/xhtml+xml,*/*;q=0.8"
+# Respostas que recusam os cookies: redirecionamento para o login ou 401
+STATUS_DE_SESSAO_RECUSADA = {301, 302, 303, 307, 308, 401}
+
+SESSAO_VALIDA = "valida"
+SESSAO_RECUSADA = "recusada"
+SESSAO_INDETERMINADA = "indeterminada"  # rede ou servidor com problema: nada se sabe dos cookies
+
+_lock = threading.Lock()
+
+
+# ==============================
+# ARQUIVO DE CACHE
+# ==============================
+def _ler_cache() -> dict:
+    try:
+        with open(CACHE_ARQUIVO, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_cache(cache: dict):
+    temporario = CACHE_ARQUIVO + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.chmod(temporario, 0o600)  # os cookies dão acesso ao portal
+    os.replace(temporario, CACHE_ARQUIVO)
+
+
+def salvar_sessao(cliente: str, sessao: dict):
+    with _lock:
+        cache = _ler_cache()
+        cache[cliente] = {"url": sessao["url"], "cookies": sessao["cookies"], "capturado_em": time.time()}
+        _gravar_cache(cache)
+
+
+def invalidar_sessao(cliente: str):
+    with _lock:
+        cache = _ler_cache()
+        if cache.pop(cliente, None) is not None:
+            _gravar_cache(cache)
+
+
+# ==============================
+# TESTE DE VIDA
+# ==============================
+def situacao_da_sessao(sessao: dict) -> str:
+    """
+    Uma única requisição GET, sem novas tentativas e sem seguir redirecionamentos.
+    Devolve SESSAO_VALIDA (200), SESSAO_RECUSADA (STATUS_DE_SESSAO_RECUSADA) ou
+    SESSAO_INDETERMINADA (falha de rede ou qualquer outro status).
+    """
+    base_url = sessao["url"].rstrip("/")
+    url = base_url + PROBE_PATH
+    with criar_sessao(sessao["cookies"], base_url, accept=ACCEPT_HTML, tamanho_do_pool=1) as session:
+        try:
+            with metricas.medir("http.get", "http", endpoint=metricas.rotulo_endpoint(url),
+                                etapa="teste_de_sessao") as medidos:
+                # stream=True: o corpo da página nem é baixado
+                with session.get(url, timeout=PROBE_TIMEOUT, allow_redirects=False, stream=True) as resp:
+                    status = medidos["resultado"] = resp.status_code
+        except (requests.ConnectionError, requests.Timeout) as e:
+            logging.warning(f"🍪 Não foi possível testar a sessão: {e}")
+            return SESSAO_INDETERMINADA
+
+    if status == 200:
+        return SESSAO_VALIDA
+    if status in STATUS_DE_SESSAO_RECUSADA:
+        logging.info(f"🍪 Sessão recusada pelo portal: HTTP {status}")
+        return SESSAO_RECUSADA
+    logging.warning(f"🍪 Teste de sessão inconclusivo: HTTP {status}")
+    return SESSAO_INDETERMINADA
+
+
+def sessao_ativa(sessao: dict) -> bool:
+    return situacao_da_sessao(sessao) == SESSAO_VALIDA
+
+
+def obter_sessao_valida(cliente: str):
+    """
+    Devolve {"url", "cookies"} do cache se não estiver vencida nem for recusada
+    pelo portal; senão None. Se o teste não for conclusivo (rede, 5xx), a sessão
+    em cache é devolvida e mantida.
+    """
+    with _lock:
+        registro = _ler_cache().get(cliente)
+    if not registro:
+        return None
+
+    idade = time.time() - registro.get("capturado_em", 0)
+    situacao = SESSAO_RECUSADA if idade > VALIDADE_MAXIMA else situacao_da_sessao(registro)
+    if situacao == SESSAO_RECUSADA:
+        logging.info(f"🍪 Sessão em cache de {cliente} expirada ({idade / 60:.0f} min).")
+        invalidar_sessao(cliente)
+        return None
+
+    if situacao == SESSAO_INDETERMINADA:
+        logging.warning(f"⚠️ Sessão em cache de {cliente} não pôde ser confirmada; reutilizando assim mesmo.")
+    else:
+        logging.info(f"🍪 Reutilizando sessão em cache de {cliente} ({idade / 60:.0f} min).")
+    return {"url": registro["url"], "cookies": registro["cookies"]}
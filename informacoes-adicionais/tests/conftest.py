@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pytest
+
+# Os scripts ficam soltos em informacoes-adicionais/ e se importam pelo nome
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import planilhas  # noqa: E402
+from benchmark import COOKIES, Cenario, ClienteEmMemoria, PortalLocal  # noqa: E402
+from controle_de_taxa import LimitadorAdaptativo, definir_limitador  # noqa: E402
+
+
+@pytest.fixture
+def cliente():
+    """Sheets em memória (o mesmo dublê do benchmark) registrado no lugar do gspread."""
+    cliente = ClienteEmMemoria()
+    planilhas.definir_cliente(cliente)
+    yield cliente
+    planilhas.definir_cliente(None)
+
+
+@pytest.fixture
+def aba(cliente):
+    return cliente.open_by_key("planilha").add_worksheet("dados", rows=1000, cols=26)
+
+
+@pytest.fixture
+def portal(tmp_path, monkeypatch):
+    """Portal LG local (o do benchmark), sem o ritmo do limitador; diário e repositório em tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    with PortalLocal(Cenario(itens_por_conceito=12, grupos_por_conceito=3)) as portal:
+        definir_limitador(portal.url, LimitadorAdaptativo(taxa_inicial=1000, taxa_minima=1000,
+                                                          taxa_maxima=1000, capacidade=100))
+        yield portal
+        definir_limitador(portal.url, None)
+
+
+@pytest.fixture
+def cookies():
+    return COOKIES
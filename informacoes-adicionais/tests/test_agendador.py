@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import agendador
+import salvar_grupo_informacao_adicional as salvar_grupos
+import salvar_informacao_adicional as salvar_informacoes
+from diario import STATUS_FALHA, STATUS_SALVO
+
+
+def _grupo(codigo):
+    return {"codigo_conceito": 1000, "codigo": codigo}
+
+
+def _item(codigo, grupo):
+    return {"codigo_conceito": 1000, "Codigo": codigo, "codigo_informacao_adicional": grupo}
+
+
+def test_itens_sem_grupo_no_lote_saem_junto_com_os_grupos(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # diário
+    grupos = [_grupo("G1"), _grupo("G2"), _grupo("G3")]
+    itens = [_item("I1", "G1"), _item("L1", "EXISTENTE"), _item("L2", "EXISTENTE"), _item("L3", "EXISTENTE")]
+    monkeypatch.setattr(salvar_grupos, "ler_registros", lambda *a, **k: (None, None, grupos))
+    monkeypatch.setattr(salvar_informacoes, "ler_registros", lambda *a, **k: (None, None, itens))
+
+    enviados = []
+
+    def salvar(campo):
+        def salvar_registro(session, endpoint, cliente, idx, row, *args):
+            enviados.append(row[campo])
+            return STATUS_SALVO
+        return salvar_registro
+
+    monkeypatch.setattr(salvar_grupos, "salvar_registro", salvar("codigo"))
+    monkeypatch.setattr(salvar_informacoes, "salvar_registro", salvar("Codigo"))
+
+    agendador.importar("http://portal", "cookie", "c1", max_workers=1, verificar_destino=False)
+
+    # Um envio por vez: grupos e itens livres intercalados; I1 entra na frente assim que G1 é salvo
+    assert enviados == ["G1", "I1", "L1", "G2", "L2", "G3", "L3"]
+
+
+def test_grupo_com_zero_a_esquerda_segura_os_seus_itens(cliente, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # diário
+    planilha = cliente.open_by_key(salvar_grupos.SPREADSHEET_ID)
+    planilha.add_worksheet(salvar_grupos.WORKSHEET_TITLE, rows=10, cols=8).update(
+        [["codigo_conceito", "modulo", "codigo", "descricao"], ["1000", "1", "001", "Grupo"]], "A1")
+    aba_itens = planilha.add_worksheet(salvar_informacoes.WORKSHEET_TITLE, rows=10, cols=8)
+    aba_itens.update([["codigo_conceito", "codigo_informacao_adicional", "Codigo", "Tipo"],
+                      ["1000", "001", "I1", "0"]], "A1")
+
+    enviados = []
+
+    def salvar_grupo(session, endpoint, cliente, idx, row, *args):
+        enviados.append(row["codigo"])
+        return STATUS_FALHA
+
+    def salvar_item(session, endpoint, cliente, idx, row, *args):
+        enviados.append(row["Codigo"])
+        return STATUS_SALVO
+
+    monkeypatch.setattr(salvar_grupos, "salvar_registro", salvar_grupo)
+    monkeypatch.setattr(salvar_informacoes, "salvar_registro", salvar_item)
+
+    agendador.importar("http://portal", "cookie", "c1", max_workers=1, verificar_destino=False)
+
+    # O grupo vai convertido como no run() (1); o item, que dependia dele, não é enviado
+    assert enviados == [1]
+    assert aba_itens.get_all_values()[1][-1] == agendador.MENSAGEM_GRUPO_FALHOU.format(codigo="001")
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+import buscar_informacoes_adicionais as buscar
+
+
+@pytest.mark.parametrize("valor", [
+    {"Codigo": 1, "Descricao": "Opção", "Opcoes": [{"Codigo": 0, "Valor": 1.0}, {"Codigo": 1, "Valor": 0.1}]},
+    [1e20, -0.0, float("nan"), float("inf"), None, True, 'aspas " e\nquebra'],
+    [],
+    {},
+])
+def test_serializar_json_no_formato_das_exportacoes_existentes(valor):
+    # As células exportadas antes usavam json.dumps(v, ensure_ascii=False); o delta compara texto
+    assert buscar.serializar_json(valor) == json.dumps(valor, ensure_ascii=False)
+
+
+def test_parse_rows_serializa_so_as_colunas_aninhadas():
+    item = {"Codigo": "A", "Opcoes": [{"Codigo": 1}], "Ordem": 2}
+    codificador = buscar.CodificadorDeLinhas(["Codigo", "Opcoes", "Ordem"], {"Opcoes"})
+
+    [linha] = buscar.parse_rows([item], "c1", 1000, "Centro de Custos", codificador=codificador)
+
+    assert linha[len(buscar.HEADER_PREFIX):] == ["A", '[{"Codigo": 1}]', 2]
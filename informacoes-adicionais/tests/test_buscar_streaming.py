@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import buscar_grupo_de_informacao_adicional as buscar_grupos
+import buscar_informacoes_adicionais as buscar_informacoes
+import planilhas
+from cliente_http import RespostaInvalida
+from repositorio_local import RepositorioLocal, TIPO_GRUPOS, TIPO_INFORMACOES
+
+
+def _aba(modulo):
+    return planilhas.obter_aba(modulo.SPREADSHEET_ID, modulo.WORKSHEET_TITLE)
+
+
+def _quebrar_conceito(portal, monkeypatch, conceito):
+    """A partir de agora o portal responde algo que não é uma lista JSON para `conceito`."""
+    responder = portal.responder
+
+    def responder_com_falha(caminho, form):
+        if int(form.get("conceito", 0)) == conceito:
+            return 200, {"mensagem": "Sessão expirada"}
+        return responder(caminho, form)
+
+    monkeypatch.setattr(portal, "responder", responder_com_falha)
+
+
+@pytest.mark.parametrize("modulo", [buscar_informacoes, buscar_grupos])
+def test_streaming_grava_a_mesma_aba_que_run(modulo, portal, cliente, cookies):
+    modulo.run(portal.url, cookies, "c1")
+    esperado = _aba(modulo).get_all_values()
+
+    total = modulo.run(portal.url, cookies, "c1", streaming=True)
+
+    assert _aba(modulo).get_all_values() == esperado
+    assert total == len(esperado) - 1
+
+
+@pytest.mark.parametrize("modulo, tipo", [(buscar_informacoes, TIPO_INFORMACOES), (buscar_grupos, TIPO_GRUPOS)])
+def test_streaming_com_falha_mantem_a_exportacao_anterior(modulo, tipo, portal, cliente, cookies, monkeypatch):
+    modulo.run(portal.url, cookies, "c1", streaming=True)
+    anterior = _aba(modulo).get_all_values()
+    with RepositorioLocal() as repo:
+        coleta_anterior = repo.ultima_coleta(tipo, "c1")
+
+    _quebrar_conceito(portal, monkeypatch, list(modulo.CONCEITOS)[-1])
+    with pytest.raises(RespostaInvalida):
+        modulo.run(portal.url, cookies, "c1", streaming=True)
+
+    assert _aba(modulo).get_all_values() == anterior
+    with RepositorioLocal() as repo:
+        assert repo.ultima_coleta(tipo, "c1") == coleta_anterior
+
+
+@pytest.mark.parametrize("modulo, tipo", [(buscar_informacoes, TIPO_INFORMACOES), (buscar_grupos, TIPO_GRUPOS)])
+def test_coleta_em_andamento_nao_e_a_ultima(modulo, tipo, portal, cliente, cookies, monkeypatch):
+    modulo.run(portal.url, cookies, "c1", streaming=True)
+    with RepositorioLocal() as repo:
+        coleta_anterior = repo.ultima_coleta(tipo, "c1")
+
+    # Consultada no meio da coleta seguinte, quando o último conceito é pedido
+    vistas, responder, ultimo = [], portal.responder, list(modulo.CONCEITOS)[-1]
+
+    def responder_e_consultar(caminho, form):
+        if int(form.get("conceito", 0)) == ultimo:
+            with RepositorioLocal() as repo:
+                vistas.append(repo.ultima_coleta(tipo, "c1"))
+        return responder(caminho, form)
+
+    monkeypatch.setattr(portal, "responder", responder_e_consultar)
+    modulo.run(portal.url, cookies, "c1", streaming=True)
+
+    assert vistas == [coleta_anterior]
+    with RepositorioLocal() as repo:
+        assert repo.ultima_coleta(tipo, "c1") > coleta_anterior
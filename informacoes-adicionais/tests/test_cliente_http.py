@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import socket
+import time
+from email.utils import formatdate
+
+import pytest
+
+import cliente_http
+from cliente_http import ErroDeConexao, ErroHTTP, criar_sessao, criar_sessao_async, post, post_async
+
+ENDPOINT = "/Gente/Produtos/FolhaDePagamento/InformacaoAdicional/Salvar"
+
+
+class _Resposta:
+    def __init__(self, retry_after=None):
+        self.headers = {} if retry_after is None else {"Retry-After": retry_after}
+
+
+@pytest.fixture
+def pausas(monkeypatch):
+    """Esperas pedidas entre as tentativas, sem dormir de fato."""
+    esperas = []
+
+    async def pausar_async(segundos, *args, **kwargs):
+        esperas.append(segundos)
+
+    monkeypatch.setattr(cliente_http.metricas, "pausar", lambda segundos, *a, **k: esperas.append(segundos))
+    monkeypatch.setattr(cliente_http.metricas, "pausar_async", pausar_async)
+    return esperas
+
+
+def _roteiro(portal, monkeypatch, *respostas):
+    """O portal devolve `respostas` em sequência e depois volta ao normal."""
+    responder, fila, chamadas = portal.responder, list(respostas), []
+
+    def responder_roteirizado(caminho, form):
+        chamadas.append(caminho)
+        return fila.pop(0) if fila else responder(caminho, form)
+
+    monkeypatch.setattr(portal, "responder", responder_roteirizado)
+    return chamadas
+
+
+def test_retry_after_em_segundos_ou_data_http():
+    assert cliente_http.espera_retry_after(_Resposta("7")) == 7.0
+    assert 55 <= cliente_http.espera_retry_after(_Resposta(formatdate(time.time() + 60, usegmt=True))) <= 60
+    assert cliente_http.espera_retry_after(_Resposta(formatdate(time.time() - 60, usegmt=True))) == 0.0
+    assert cliente_http.espera_retry_after(_Resposta("amanhã")) is None
+    assert cliente_http.espera_retry_after(_Resposta()) is None
+    assert cliente_http.espera_retry_after(None) is None
+
+
+def test_espera_da_tentativa():
+    assert cliente_http.espera_da_tentativa(1, _Resposta("3")) == 3.0
+    assert cliente_http.espera_da_tentativa(1, _Resposta("3600")) == cliente_http.ESPERA_MAXIMA
+    for tentativa in range(1, 10):
+        teto = min(cliente_http.ESPERA_MAXIMA, cliente_http.ESPERA_BASE * 2 ** (tentativa - 1))
+        assert 0 <= cliente_http.espera_da_tentativa(tentativa) <= teto
+
+
+def test_post_refaz_a_tentativa_respeitando_o_retry_after(portal, cookies, pausas, monkeypatch):
+    chamadas = _roteiro(portal, monkeypatch, (429, {}, {"Retry-After": "2"}), (503, {}))
+
+    with criar_sessao(cookies, portal.url) as session:
+        resp = post(session, portal.url + ENDPOINT, {"a": 1})
+
+    assert resp.status_code == 200
+    assert len(chamadas) == 3
+    assert pausas[0] == 2.0
+    assert 0 <= pausas[1] <= cliente_http.ESPERA_BASE * 2
+
+
+def test_post_nao_repete_status_definitivo(portal, cookies, pausas, monkeypatch):
+    chamadas = _roteiro(portal, monkeypatch, (404, {}))
+
+    with criar_sessao(cookies, portal.url) as session, pytest.raises(ErroHTTP) as erro:
+        post(session, portal.url + ENDPOINT)
+
+    assert erro.value.status == 404
+    assert len(chamadas) == 1 and pausas == []
+
+
+def test_post_esgota_as_tentativas(portal, cookies, pausas, monkeypatch):
+    chamadas = _roteiro(portal, monkeypatch, *[(500, {})] * 5)
+
+    with criar_sessao(cookies, portal.url) as session, pytest.raises(ErroHTTP) as erro:
+        post(session, portal.url + ENDPOINT, tentativas=3)
+
+    assert erro.value.status == 500
+    assert len(chamadas) == 3 and len(pausas) == 2
+
+
+def test_post_falha_de_rede_vira_erro_de_conexao(cookies, pausas):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        url = f"http://127.0.0.1:{s.getsockname()[1]}"
+
+    with criar_sessao(cookies, url) as session, pytest.raises(ErroDeConexao):
+        post(session, url + ENDPOINT, tentativas=2, taxa_inicial=1000)
+    assert len(pausas) == 1
+
+
+def test_post_async_refaz_a_tentativa_respeitando_o_retry_after(portal, cookies, pausas, monkeypatch):
+    chamadas = _roteiro(portal, monkeypatch, (503, {}, {"Retry-After": "4"}))
+
+    async def enviar():
+        async with criar_sessao_async(cookies, portal.url) as session:
+            return await post_async(session, portal.url + ENDPOINT, {"a": 1})
+
+    assert cliente_http.json_do_corpo(asyncio.run(enviar()), ENDPOINT) == {"mensagem": "Registro salvo com sucesso."}
+    assert len(chamadas) == 2
+    assert pausas == [4.0]
+
+
+def test_post_async_nao_repete_status_definitivo(portal, cookies, pausas, monkeypatch):
+    _roteiro(portal, monkeypatch, (401, {}))
+
+    async def enviar():
+        async with criar_sessao_async(cookies, portal.url) as session:
+            return await post_async(session, portal.url + ENDPOINT)
+
+    with pytest.raises(ErroHTTP) as erro:
+        asyncio.run(enviar())
+    assert erro.value.status == 401 and pausas == []
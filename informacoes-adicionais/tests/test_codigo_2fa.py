@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+
+from codigo_2fa import CaixaPostalLocal, ProvedorDeCodigo2FA
+
+
+def test_caixa_local_lista_do_mais_novo_para_o_mais_antigo():
+    caixa = CaixaPostalLocal()
+    caixa.entregar("primeiro")
+    caixa.entregar("segundo")
+
+    assert caixa.listar_ids() == ["2", "1"]
+    assert caixa.ler_texto("1") == "primeiro"
+
+
+def test_codigo_de_email_anterior_a_marca_dagua_e_ignorado():
+    caixa = CaixaPostalLocal()
+    caixa.entregar("Seu código de acesso é 111111")
+    provedor = ProvedorDeCodigo2FA(caixa)
+    provedor.preparar()
+
+    threading.Timer(0.05, caixa.entregar, ["Seu código de acesso é 222222"]).start()
+
+    assert provedor.aguardar_codigo(tempo_maximo=2, intervalo_inicial=0.01) == "222222"
+
+
+def test_email_novo_sem_codigo_nao_encerra_a_espera():
+    caixa = CaixaPostalLocal()
+    provedor = ProvedorDeCodigo2FA(caixa)
+    provedor.preparar()
+    caixa.entregar("Bem-vindo ao portal")
+    caixa.entregar("Código: 333333")
+
+    assert provedor.aguardar_codigo(tempo_maximo=1, intervalo_inicial=0.01) == "333333"
+
+
+def test_sem_email_devolve_none_no_tempo_maximo():
+    provedor = ProvedorDeCodigo2FA(CaixaPostalLocal())
+
+    assert provedor.aguardar_codigo(tempo_maximo=0.05, intervalo_inicial=0.01) is None
+
+
+def test_erro_do_backend_e_registrado_e_a_consulta_continua(caplog):
+    caixa = CaixaPostalLocal()
+    provedor = ProvedorDeCodigo2FA(caixa)
+    provedor.preparar()
+    listar, falhas = caixa.listar_ids, iter([True])
+
+    def listar_com_falha():
+        if next(falhas, False):
+            raise ConnectionError("Gmail indisponível")
+        return listar()
+
+    caixa.listar_ids = listar_com_falha
+    caixa.entregar("Código: 444444")
+
+    with caplog.at_level(logging.WARNING):
+        assert provedor.aguardar_codigo(tempo_maximo=1, intervalo_inicial=0.01) == "444444"
+    assert "Gmail indisponível" in caplog.text
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import controle_de_taxa
+from controle_de_taxa import CAPACIDADE, LimitadorAdaptativo, definir_limitador, obter_limitador
+
+
+def test_balde_permite_uma_pequena_rajada():
+    limitador = LimitadorAdaptativo(taxa_inicial=1.0)
+
+    rajada = [limitador._consumir() for _ in range(int(CAPACIDADE))]
+
+    assert rajada == [0.0] * int(CAPACIDADE)
+    assert limitador._consumir() > 0
+
+
+def test_taxa_inicial_de_quem_chega_depois_nao_e_ignorada():
+    url = "http://portal-taxa.local/Salvar"
+    try:
+        leitura = obter_limitador(url, taxa_inicial=2.0)
+        escrita = obter_limitador(url, taxa_inicial=1.25)
+
+        assert escrita is not leitura
+        assert (leitura.taxa, escrita.taxa) == (2.0, 1.25)
+        assert obter_limitador("http://portal-taxa.local/Outro", taxa_inicial=1.25) is escrita
+    finally:
+        definir_limitador(url, None)
+    assert not [c for c in controle_de_taxa._limitadores if c[0] == "portal-taxa.local"]
+
+
+def test_limitador_definido_vale_para_qualquer_taxa():
+    url = "http://portal-definido.local"
+    fixo = LimitadorAdaptativo(taxa_inicial=1000, taxa_minima=1000, taxa_maxima=1000)
+    definir_limitador(url, fixo)
+    try:
+        assert obter_limitador(url, taxa_inicial=2.0) is fixo
+        assert obter_limitador(url, taxa_inicial=1.25) is fixo
+    finally:
+        definir_limitador(url, None)
+
+
+def test_aimd():
+    limitador = LimitadorAdaptativo(taxa_inicial=4.0)
+
+    limitador.registrar(200, 0.1)
+    assert limitador.taxa == 4.0 + controle_de_taxa.INCREMENTO_ADITIVO
+    limitador.registrar(429, 0.1)
+    assert limitador.taxa == (4.0 + controle_de_taxa.INCREMENTO_ADITIVO) * controle_de_taxa.FATOR_REDUCAO
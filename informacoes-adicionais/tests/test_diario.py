@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from diario import (DiarioDeExecucao, STATUS_FALHA, STATUS_PENDENTE, STATUS_SALVO, chave_registro,
+                    classificar_mensagem)
+from indice_destino import MENSAGEM_IDENTICO
+
+
+@pytest.mark.parametrize("mensagem", [
+    "Registro salvo com sucesso.",
+    "Operação realizada com SUCESSO",
+    "Código já existe para este conceito",
+    "Codigo ja existe",
+    "Grupo já cadastrado",
+    MENSAGEM_IDENTICO,
+])
+def test_mensagens_que_confirmam_o_registro_no_destino(mensagem):
+    assert classificar_mensagem(mensagem) == STATUS_SALVO
+
+
+@pytest.mark.parametrize("mensagem", [
+    "Erro HTTP 500",
+    "Erro: Read timed out",
+    "Resposta inválida (não-JSON)",
+    "(sem mensagem)",
+    "",
+    None,
+])
+def test_demais_mensagens_sao_falha(mensagem):
+    assert classificar_mensagem(mensagem) == STATUS_FALHA
+
+
+def test_chave_registro():
+    assert chave_registro(1000, " ABC ") == "1000|ABC"
+    assert chave_registro(1000, None) == "1000|"
+
+
+def test_diario_por_etapa_e_cliente(tmp_path):
+    caminho = str(tmp_path / "diario.sqlite")
+    with DiarioDeExecucao("grupos", caminho) as grupos, DiarioDeExecucao("itens", caminho) as itens:
+        grupos.registrar("c1", "1000|A", STATUS_PENDENTE)
+        grupos.registrar("c1", "1000|A", STATUS_SALVO, "Registro salvo com sucesso.")
+        grupos.registrar_varios("c1", [("1000|B", STATUS_FALHA, "Erro HTTP 500"), ("1000|C", STATUS_SALVO, None)])
+        itens.registrar("c1", "1000|A", STATUS_FALHA, "Erro HTTP 500")
+
+        assert grupos.ja_salvo("c1", "1000|A")
+        assert not grupos.ja_salvo("c2", "1000|A")
+        assert not itens.ja_salvo("c1", "1000|A")
+        assert grupos.salvos("c1", ["1000|A", "1000|B", "1000|C", "1000|X"]) == {"1000|A", "1000|C"}
+        assert grupos.resumo("c1") == {STATUS_SALVO: 2, STATUS_FALHA: 1}
+
+    # O diário sobrevive ao processo: uma nova execução retoma de onde parou
+    with DiarioDeExecucao("grupos", caminho) as grupos:
+        assert grupos.status("c1", "1000|B") == STATUS_FALHA
+
+
+def test_salvos_com_mais_chaves_que_o_limite_do_sqlite(tmp_path):
+    with DiarioDeExecucao("itens", str(tmp_path / "diario.sqlite")) as diario:
+        chaves = [f"1000|{i}" for i in range(1500)]
+        diario.registrar_varios("c1", [(c, STATUS_SALVO, None) for c in chaves[::2]])
+
+        assert diario.salvos("c1", chaves) == set(chaves[::2])
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+
+import pytest
+
+import fluxo_json
+from cliente_http import RespostaInvalida
+
+
+class RespostaFalsa:
+    """O que itens_da_resposta usa de requests.Response (stream=True)."""
+
+    url = "http://portal/ObtenhaLista"
+
+    def __init__(self, corpo: bytes):
+        self.raw = io.BytesIO(corpo)
+        self._corpo = corpo
+
+    def json(self):
+        return json.loads(self._corpo)
+
+
+@pytest.fixture(params=["ijson", "stdlib"])
+def leitura(request, monkeypatch):
+    if request.param == "ijson":
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr(fluxo_json, "ijson", None)
+
+
+@pytest.mark.parametrize("corpo, itens", [
+    (b'[{"Codigo": "A"}, {"Codigo": "B", "Ordem": 1.5}]', [{"Codigo": "A"}, {"Codigo": "B", "Ordem": 1.5}]),
+    (b"[]", []),
+    (b"null", []),
+])
+def test_itens_da_lista(leitura, corpo, itens):
+    assert list(fluxo_json.itens_da_resposta(RespostaFalsa(corpo))) == itens
+
+
+@pytest.mark.parametrize("corpo", [b"<html>login</html>", b'[{"Codigo": "A"', b"", b'{"Codigo": "A"}', b'"texto"'])
+def test_corpo_que_nao_e_lista_json(leitura, corpo):
+    with pytest.raises(RespostaInvalida):
+        list(fluxo_json.itens_da_resposta(RespostaFalsa(corpo)))
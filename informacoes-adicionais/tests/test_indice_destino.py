@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import buscar_informacoes_adicionais
+import salvar_grupo_informacao_adicional as salvar_grupos
+import salvar_informacao_adicional as salvar_informacoes
+from indice_destino import (IndiceDeExistentes, SITUACAO_AUSENTE, SITUACAO_DIFERENTE, SITUACAO_IDENTICO,
+                            assinatura)
+from planilhas import valor_como_texto
+
+
+def _payload(row, identificador_da_aba):
+    return {"Codigo": row.get("codigo"), "Descricao": row.get("descricao"), "aba": identificador_da_aba}
+
+
+def test_situacoes_do_indice():
+    indice = IndiceDeExistentes([{"codigo_conceito": 1000, "codigo": "A", "descricao": "a"}],
+                                "codigo", _payload, "aba")
+
+    assert len(indice) == 1
+    assert indice.situacao({"codigo_conceito": "1000", "codigo": "A", "descricao": "a"}) == SITUACAO_IDENTICO
+    assert indice.situacao({"codigo_conceito": "1000", "codigo": "A", "descricao": "b"}) == SITUACAO_DIFERENTE
+    assert indice.situacao({"codigo_conceito": "1000", "codigo": "B", "descricao": "a"}) == SITUACAO_AUSENTE
+
+
+def test_assinatura_ignora_ordem_e_tipo():
+    assert assinatura({"a": 1, "b": True}) == assinatura({"b": "TRUE", "a": "1"})
+
+
+def test_registro_inativo_no_destino_e_reenviado():
+    indice = IndiceDeExistentes([{"codigo_conceito": 1000, "codigo": "A", "descricao": "a", "Status": "2"}],
+                                "codigo", _payload, "aba", ativo=lambda r: r["Status"] == "1")
+
+    assert indice.situacao({"codigo_conceito": 1000, "codigo": "A", "descricao": "a"}) == SITUACAO_DIFERENTE
+
+
+def test_grupo_com_zero_a_esquerda_casa_com_o_destino():
+    lotes = [(1000, "Centro de Custos", [
+        {"Codigo": "001", "Descricao": "Grupo", "Ordem": 1, "DtoEntidadeInformacaoAdicional": {"Modulo": 1}},
+    ])]
+    indice = salvar_grupos._indice_de_lotes(lotes, "c1")
+    # Como ler_registros entrega a linha da planilha: "001" convertido para 1
+    linha = {"codigo_conceito": 1000, "modulo": 1, "codigo": 1, "descricao": "Grupo", "resultado": ""}
+
+    assert indice.identico(linha)
+
+
+def test_item_inativo_no_destino_nao_e_dispensado():
+    item = {"Codigo": "I1", "Descricao": "Item", "Tipo": 1, "Status": 1, "Observacao": "",
+            "DtoGrupoDeInformacoesAdicionais": {"Codigo": "001", "Descricao": "Grupo"}}
+    lotes = [(1000, "Centro de Custos", [item])]
+    inativos = [(1000, "Centro de Custos", [dict(item, Status=2)])]
+    # A mesma linha, como a planilha exportada do destino a entrega ao salvar_*
+    linha = {k: valor_como_texto(v) for k, v in next(buscar_informacoes_adicionais.registros_de_lotes(lotes, "c1")).items()}
+
+    assert salvar_informacoes._indice_de_lotes(lotes, "c1").situacao(linha) == SITUACAO_IDENTICO
+    assert salvar_informacoes._indice_de_lotes(inativos, "c1").situacao(linha) == SITUACAO_DIFERENTE
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import metricas
+
+
+@pytest.fixture
+def diretorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(metricas, "DIRETORIO", str(tmp_path))
+    return tmp_path
+
+
+def _operacoes(coletor):
+    return set(coletor.resumo()["operacoes"])
+
+
+def test_execucoes_simultaneas_em_threads_tem_coletores_proprios(diretorio):
+    coletores = {}
+    ambas_abertas = threading.Barrier(2)
+
+    def executar(nome):
+        with metricas.execucao(nome) as coletor:
+            coletores[nome] = coletor
+            ambas_abertas.wait()  # sobrepostas, mas nenhuma dentro da outra
+            metricas.contar(f"evento.{nome}")
+            with metricas.medir(f"passo.{nome}"):
+                pass
+
+    threads = [threading.Thread(target=executar, args=(nome,)) for nome in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert coletores["a"] is not coletores["b"]
+    assert _operacoes(coletores["a"]) == {"a", "passo.a"}
+    assert coletores["b"].contadores == {"evento.b": 1}
+    assert len(list(diretorio.glob("*.trace.json"))) == 2
+
+
+def test_execucoes_simultaneas_no_loop_tem_coletores_proprios(diretorio):
+    @metricas.execucao_medida("tarefa")
+    async def tarefa(nome):
+        await asyncio.sleep(0.01)
+        metricas.contar(nome)
+        return metricas._ativo.get()
+
+    async def principal():
+        return await asyncio.gather(tarefa("a"), tarefa("b"))
+
+    a, b = asyncio.run(principal())
+    assert a is not b
+    assert (a.contadores, b.contadores) == ({"a": 1}, {"b": 1})
+
+
+def test_propagar_leva_o_coletor_para_o_pool(diretorio):
+    with metricas.execucao("pai") as coletor:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(metricas.propagar(lambda i: metricas.contar("filho")), range(4)))
+            list(pool.map(lambda i: metricas.contar("sem_propagar"), range(4)))
+
+    assert coletor.contadores == {"filho": 4}
+
+
+def test_execucao_aninhada_usa_o_coletor_externo(diretorio):
+    with metricas.execucao("externa") as externa:
+        with metricas.execucao("interna") as interna:
+            metricas.contar("evento")
+
+    assert interna is externa
+    assert externa.contadores == {"evento": 1}
+    assert len(list(diretorio.glob("*.trace.json"))) == 1
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import migracao
+import salvar_grupo_informacao_adicional as salvar_grupos
+import salvar_informacao_adicional as salvar_informacoes
+from agendador import MENSAGEM_GRUPO_FALHOU
+from diario import DiarioDeExecucao, STATUS_FALHA, chave_registro
+
+SALVO = "Registro salvo com sucesso."
+
+
+def _enviar(enviados, falhar=()):
+    def enviar_registro(session, url, registro):
+        codigo = registro.get("Codigo", registro.get("codigo"))
+        enviados.append(codigo)
+        return "Erro: grupo inválido" if codigo in falhar else SALVO
+    return enviar_registro
+
+
+def _preparar(monkeypatch, grupos, itens, falhar=()):
+    for modulo, enviados in ((salvar_grupos, grupos), (salvar_informacoes, itens)):
+        monkeypatch.setattr(modulo, "codificar_payload", lambda registro, aba: registro)
+        monkeypatch.setattr(modulo, "enviar_registro", _enviar(enviados, falhar))
+
+
+def test_itens_de_grupo_que_falhou_nao_sao_enviados(portal, cookies, monkeypatch):
+    grupos, itens = [], []
+    _preparar(monkeypatch, grupos, itens, falhar={"G1000-1"})
+
+    resumo = migracao.migrar(portal.url, cookies, "origem", portal.url, cookies, "destino")
+
+    assert "G1000-1" in grupos
+    # 12 itens por conceito, um em cada três no grupo 1
+    assert [i for i in itens if i.startswith("I1000-")] == [f"I1000-{n}" for n in range(12) if n % 3 != 1]
+    assert "I1016-1" in itens
+    assert resumo["informacoes"][STATUS_FALHA] == 4
+
+    etapa = migracao._etapa_do_diario(salvar_informacoes, "origem")
+    with DiarioDeExecucao(etapa) as diario:
+        assert diario.status("destino", chave_registro(1000, "I1000-1")) == STATUS_FALHA
+
+
+def test_migracao_so_retoma_quando_pedido(portal, cookies, monkeypatch):
+    grupos, itens = [], []
+    _preparar(monkeypatch, grupos, itens, falhar={"G1000-1"})
+    migracao.migrar(portal.url, cookies, "origem", portal.url, cookies, "destino")
+    primeira = len(itens)
+
+    # Padrão (retomar=False): tudo é reenviado, como nos run() dos módulos salvar_*
+    migracao.migrar(portal.url, cookies, "origem", portal.url, cookies, "destino")
+    assert len(itens) == 2 * primeira
+
+    # Com retomar=True e o grupo corrigido, só o grupo e os seus itens voltam ao destino
+    del grupos[:], itens[:]
+    _preparar(monkeypatch, grupos, itens)
+    migracao.migrar(portal.url, cookies, "origem", portal.url, cookies, "destino", retomar=True)
+
+    assert grupos == ["G1000-1"]
+    assert itens == ["I1000-1", "I1000-4", "I1000-7", "I1000-10"]
+
+
+def test_mensagem_do_item_bloqueado():
+    bloqueio = migracao._bloqueio_por_grupo({chave_registro(1000, "001")})
+
+    assert bloqueio({"codigo_conceito": 1000, "codigo_informacao_adicional": "001"}) == \
+        MENSAGEM_GRUPO_FALHOU.format(codigo="001")
+    assert bloqueio({"codigo_conceito": 1002, "codigo_informacao_adicional": "001"}) is None
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import planilhas
+
+
+def test_valor_como_texto_como_o_sheets_devolve():
+    assert planilhas.valor_como_texto(1.0) == "1"
+    assert planilhas.valor_como_texto(-3.0) == "-3"
+    assert planilhas.valor_como_texto(1.5) == "1.5"
+    assert planilhas.valor_como_texto(7) == "7"
+    assert planilhas.valor_como_texto(True) == "TRUE"
+    assert planilhas.valor_como_texto(None) == ""
+
+
+def test_delta_nao_regrava_floats_inteiros(aba, cliente):
+    header = ["cliente", "codigo", "ordem", "peso"]
+    linhas = [["c1", "A", 1.0, 2.5], ["c1", "B", 2.0, 3.0]]
+    planilhas.sincronizar_delta(aba, header, linhas, ["cliente", "codigo"], {"cliente": "c1"})
+
+    resumo = planilhas.sincronizar_delta(aba, header, linhas, ["cliente", "codigo"], {"cliente": "c1"})
+
+    assert resumo == {"inseridas": 0, "alteradas": 0, "removidas": 0}
+
+
+def _aba_com(cliente, linhas, rows):
+    aba = cliente.open_by_key("planilha").add_worksheet("leitura", rows=rows, cols=2)
+    aba.update(linhas, "A1")
+    return aba
+
+
+def test_leitor_para_no_fim_da_grade(cliente):
+    aba = _aba_com(cliente, [["codigo", "descricao"], ["A", "a"], ["B", "b"]], rows=3)
+
+    registros = list(planilhas.LeitorDeRegistros(aba, linhas_por_pagina=5))
+
+    assert registros == [{"codigo": "A", "descricao": "a"}, {"codigo": "B", "descricao": "b"}]
+
+
+def test_leitor_mantem_linhas_em_branco_como_o_get_all_values(cliente):
+    linhas = [["codigo", "descricao"], ["A", "a"], ["", ""], ["C", "c"], ["", ""], ["", ""], ["", ""], ["H", "h"]]
+    aba = _aba_com(cliente, linhas, rows=10)
+
+    registros = list(planilhas.LeitorDeRegistros(aba, linhas_por_pagina=2))
+
+    # A página A6:B7 vem inteira em branco e não encerra a leitura
+    vazio = {"codigo": "", "descricao": ""}
+    assert registros == [{"codigo": "A", "descricao": "a"}, vazio, {"codigo": "C", "descricao": "c"},
+                         vazio, vazio, vazio, {"codigo": "H", "descricao": "h"}]
+    assert len(registros) == len(aba.get_all_values()) - 1
+    # A2:B3, A4:B5, A6:B7, A8:B9 e A10:B10, até o fim da grade
+    assert cliente.chamadas["get"] == 5
+
+
+def test_delta_com_remocoes_e_depois_leitura_na_mesma_aba(cliente):
+    header = ["cliente", "codigo"]
+    criar = {"rows": 4, "cols": 2}
+    aba = planilhas.obter_aba("planilha", "exportada", criar=criar)
+    planilhas.sincronizar_delta(aba, header, [["c1", "A"], ["c1", "B"], ["c1", "C"]], ["codigo"], {"cliente": "c1"})
+
+    # Exportação por delta que remove linhas; a importação reaproveita a aba em cache
+    planilhas.sincronizar_delta(aba, header, [["c1", "A"]], ["codigo"], {"cliente": "c1"})
+    aba = planilhas.obter_aba("planilha", "exportada", criar=criar)
+
+    assert list(planilhas.LeitorDeRegistros(aba, linhas_por_pagina=5)) == [{"cliente": "c1", "codigo": "A"}]
+
+
+def test_blocos_por_carga_respeitam_celulas_e_bytes():
+    linhas = [["a", "b"]] * 5
+
+    assert [len(b) for b in planilhas.blocos_por_carga(linhas, max_celulas=4)] == [2, 2, 1]
+    # Cada linha ["a", "b"] estima 10 bytes
+    assert [len(b) for b in planilhas.blocos_por_carga(linhas, max_bytes=25)] == [2, 2, 1]
+    # Uma linha maior que o limite segue sozinha, sem ser descartada
+    assert list(planilhas.blocos_por_carga([["x" * 50], ["y"]], max_bytes=10)) == [[["x" * 50]], [["y"]]]
+    assert list(planilhas.blocos_por_carga([])) == []
+
+
+def test_gravar_tabela_substitui_o_conteudo_e_a_grade(aba, monkeypatch):
+    aba.update([["velho", "x", "y"]] * 8, "A1")
+    monkeypatch.setattr(planilhas, "blocos_por_carga",
+                        lambda linhas, f=planilhas.blocos_por_carga: f(linhas, max_celulas=4))
+
+    gravadas = planilhas.gravar_tabela(aba, ["codigo", "ordem"], iter([["A", 1], ["B", 2], ["C", 3]]), total=3)
+
+    assert gravadas == 3
+    assert aba.get_all_values() == [["codigo", "ordem"], ["A", "1"], ["B", "2"], ["C", "3"]]
+    assert (aba.row_count, aba.col_count) == (4, 2)
+    # Só a aba de destino sobra na planilha
+    assert [ws.title for ws in aba.spreadsheet.worksheets()] == ["dados"]
+
+
+def test_gravar_tabela_com_falha_mantem_a_aba_como_estava(aba, monkeypatch):
+    anterior = [["codigo", "ordem"], ["X", "9"]]
+    aba.update(anterior, "A1")
+    planilha = aba.spreadsheet
+    enviar = planilha.values_batch_update
+    envios = []
+
+    def falhar_no_segundo(corpo):
+        envios.append(corpo)
+        if len(envios) == 2:
+            raise RuntimeError("quota")
+        return enviar(corpo)
+
+    monkeypatch.setattr(planilha, "values_batch_update", falhar_no_segundo)
+    monkeypatch.setattr(planilhas, "blocos_por_carga",
+                        lambda linhas, f=planilhas.blocos_por_carga: f(linhas, max_celulas=2))
+
+    with pytest.raises(RuntimeError):
+        planilhas.gravar_tabela(aba, ["codigo", "ordem"], [["A", 1], ["B", 2], ["C", 3]], envios_paralelos=1)
+
+    assert aba.get_all_values() == anterior
+    assert [ws.title for ws in planilha.worksheets()] == ["dados"]
+
+
+def _coluna(aba, coluna):
+    return [linha[coluna - 1] if len(linha) >= coluna else "" for linha in aba.get_all_values()]
+
+
+def test_gravador_agrupa_linhas_consecutivas_num_so_envio(aba, monkeypatch):
+    enviar, intervalos = aba.batch_update, []
+
+    def batch_update(dados, **kwargs):
+        intervalos.append([d["range"] for d in dados])
+        return enviar(dados, **kwargs)
+
+    monkeypatch.setattr(aba, "batch_update", batch_update)
+    with planilhas.GravadorDeResultados(aba, 2, lote=100, intervalo=3600) as gravador:
+        for linha in (7, 2, 3, 8, 4):
+            gravador.registrar(linha, f"ok {linha}")
+        assert intervalos == []
+
+    assert intervalos == [["B2:B4", "B7:B8"]]
+    assert _coluna(aba, 2) == ["", "ok 2", "ok 3", "ok 4", "", "", "ok 7", "ok 8"]
+
+
+def test_gravador_descarrega_ao_completar_o_lote(aba, cliente):
+    gravador = planilhas.GravadorDeResultados(aba, 1, lote=2, intervalo=3600)
+    gravador.registrar(2, "a")
+    gravador.registrar(3, "b")
+    gravador.registrar(4, "c")
+
+    assert cliente.chamadas["batch_update"] == 1
+    gravador.flush()
+    assert cliente.chamadas["batch_update"] == 2
+    assert _coluna(aba, 1) == ["", "a", "b", "c"]
+
+
+def test_gravador_descarrega_no_fim_mesmo_com_excecao(aba):
+    with pytest.raises(RuntimeError):
+        with planilhas.GravadorDeResultados(aba, 1, lote=100, intervalo=3600) as gravador:
+            gravador.registrar(2, "antes da falha")
+            raise RuntimeError("falha no laço")
+
+    assert _coluna(aba, 1) == ["", "antes da falha"]
+
+
+def test_gravador_falha_do_sheets_nao_interrompe_o_envio(aba, monkeypatch):
+    def falhar(*args, **kwargs):
+        raise ConnectionError("quota")
+
+    monkeypatch.setattr(aba, "batch_update", falhar)
+    gravador = planilhas.GravadorDeResultados(aba, 1, lote=1)
+
+    gravador.registrar(2, "perdido")
+    gravador.flush()
+    assert gravador._pendentes == {}
+
+
+def test_gravador_sem_aba_descarta_as_mensagens():
+    with planilhas.GravadorDeResultados(None, 1, lote=1) as gravador:
+        gravador.registrar_varios({2: "a", 3: "b"})
+    assert gravador._pendentes == {}
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+
+from repositorio_local import RepositorioLocal, TIPO_INFORMACOES
+
+
+def _lotes(*codigos):
+    return [(1000, "Centro de Custos", [{"Codigo": c, "Descricao": c.lower()} for c in codigos])]
+
+
+def test_coleta_em_partes_so_vale_depois_de_concluida(tmp_path):
+    with RepositorioLocal(str(tmp_path / "repo.sqlite")) as repo:
+        anterior = repo.gravar_coleta(TIPO_INFORMACOES, "c1", _lotes("A"), buscado_em=1.0)
+        repo.gravar_coleta(TIPO_INFORMACOES, "c1", _lotes("A"), buscado_em=2.0, concluir=False)
+        repo.gravar_coleta(TIPO_INFORMACOES, "c1", _lotes("B"), buscado_em=2.0, concluir=False)
+
+        assert repo.ultima_coleta(TIPO_INFORMACOES, "c1") == anterior
+        assert [item["Codigo"] for _, _, item in repo.itens(TIPO_INFORMACOES, "c1")] == ["A"]
+        assert repo.buscar(TIPO_INFORMACOES, "c1", 1000, "B") is None
+
+        repo.concluir_coleta(TIPO_INFORMACOES, "c1", 2.0)
+
+        assert repo.ultima_coleta(TIPO_INFORMACOES, "c1") == 2.0
+        assert [item["Codigo"] for _, _, item in repo.itens(TIPO_INFORMACOES, "c1")] == ["A", "B"]
+        assert repo.buscar(TIPO_INFORMACOES, "c1", 1000, "B") == {"Codigo": "B", "Descricao": "b"}
+
+
+def test_coleta_descartada_nao_deixa_rastro(tmp_path):
+    with RepositorioLocal(str(tmp_path / "repo.sqlite")) as repo:
+        repo.gravar_coleta(TIPO_INFORMACOES, "c1", _lotes("A"), buscado_em=1.0, concluir=False)
+        repo.descartar_coleta(TIPO_INFORMACOES, "c1", 1.0)
+
+        assert repo.ultima_coleta(TIPO_INFORMACOES, "c1") is None
+        assert repo.itens(TIPO_INFORMACOES, "c1") == []
+
+
+def test_repositorio_sem_tabela_de_coletas_e_aproveitado(tmp_path):
+    caminho = str(tmp_path / "repo.sqlite")
+    conn = sqlite3.connect(caminho)
+    conn.execute("CREATE TABLE itens (tipo TEXT NOT NULL, cliente TEXT NOT NULL, codigo_conceito INTEGER NOT NULL, "
+                 "descricao_conceito TEXT, codigo TEXT, buscado_em REAL NOT NULL, dados TEXT NOT NULL)")
+    conn.execute("INSERT INTO itens VALUES ('informacoes', 'c1', 1000, 'Centro de Custos', 'A', 5.0, '{\"Codigo\": \"A\"}')")
+    conn.commit()
+    conn.close()
+
+    with RepositorioLocal(caminho) as repo:
+        assert repo.ultima_coleta(TIPO_INFORMACOES, "c1") == 5.0
+        assert repo.buscar(TIPO_INFORMACOES, "c1", 1000, "A") == {"Codigo": "A"}
+
+
+def test_lotes_e_iterar_lotes_preservam_a_ordem_da_coleta(tmp_path):
+    lotes = [(1000, "Centro de Custos", [{"Codigo": "B"}, {"Codigo": "A"}]), (1002, "Órgão", [{"Codigo": "C"}])]
+    with RepositorioLocal(str(tmp_path / "repo.sqlite")) as repo:
+        buscado_em = repo.gravar_coleta(TIPO_INFORMACOES, "c1", lotes)
+
+        assert repo.lotes(TIPO_INFORMACOES, "c1") == lotes
+        assert list(repo.iterar_lotes(TIPO_INFORMACOES, "c1", buscado_em, tamanho=2)) == [
+            (1000, "Centro de Custos", [{"Codigo": "B"}, {"Codigo": "A"}]), (1002, "Órgão", [{"Codigo": "C"}])]
+        assert list(repo.iterar_lotes(TIPO_INFORMACOES, "c1", buscado_em, tamanho=1)) == [
+            (1000, "Centro de Custos", [{"Codigo": "B"}]), (1000, "Centro de Custos", [{"Codigo": "A"}]),
+            (1002, "Órgão", [{"Codigo": "C"}])]
+        assert [item for _, _, item in repo.itens(TIPO_INFORMACOES, "c1", codigo_conceito=1002)] == [{"Codigo": "C"}]
+
+
+def test_buscar_devolve_a_versao_mais_recente(tmp_path):
+    with RepositorioLocal(str(tmp_path / "repo.sqlite")) as repo:
+        repo.gravar_coleta(TIPO_INFORMACOES, "c1", [(1000, "CC", [{"Codigo": 7, "Descricao": "antiga"}])], 1.0)
+        repo.gravar_coleta(TIPO_INFORMACOES, "c1", [(1000, "CC", [{"Codigo": 7, "Descricao": "nova"}])], 2.0)
+
+        assert repo.buscar(TIPO_INFORMACOES, "c1", 1000, 7)["Descricao"] == "nova"
+        assert repo.buscar(TIPO_INFORMACOES, "c2", 1000, 7) is None
+
+
+def test_so_as_coletas_mais_recentes_sao_mantidas(tmp_path):
+    with RepositorioLocal(str(tmp_path / "repo.sqlite"), coletas_mantidas=2) as repo:
+        repo.gravar_coleta(TIPO_INFORMACOES, "c2", _lotes("Z"), buscado_em=1.0)
+        for buscado_em in (1.0, 2.0, 3.0):
+            repo.gravar_coleta(TIPO_INFORMACOES, "c1", _lotes("A"), buscado_em=buscado_em)
+        # Coleta em andamento: não conta nem é podada
+        repo.gravar_coleta(TIPO_INFORMACOES, "c1", _lotes("A"), buscado_em=4.0, concluir=False)
+
+        assert repo.itens(TIPO_INFORMACOES, "c1", buscado_em=1.0) == []
+        assert len(repo.itens(TIPO_INFORMACOES, "c1", buscado_em=2.0)) == 1
+        assert len(repo.itens(TIPO_INFORMACOES, "c1", buscado_em=4.0)) == 1
+        # Outro cliente tem a sua própria contagem
+        assert repo.ultima_coleta(TIPO_INFORMACOES, "c2") == 1.0
+
+        repo.concluir_coleta(TIPO_INFORMACOES, "c1", 4.0)
+        assert repo.itens(TIPO_INFORMACOES, "c1", buscado_em=2.0) == []
+        assert repo.ultima_coleta(TIPO_INFORMACOES, "c1") == 4.0
+
+
+def test_sem_limite_todas_as_coletas_ficam(tmp_path):
+    with RepositorioLocal(str(tmp_path / "repo.sqlite"), coletas_mantidas=None) as repo:
+        for buscado_em in range(1, 15):
+            repo.gravar_coleta(TIPO_INFORMACOES, "c1", _lotes("A"), buscado_em=float(buscado_em))
+
+        assert len(repo.itens(TIPO_INFORMACOES, "c1", buscado_em=1.0)) == 1
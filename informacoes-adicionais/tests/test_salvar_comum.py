@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+import salvar_comum
+from diario import STATUS_SALVO
+from salvar_comum import Cadastro
+
+
+def _cadastro():
+    return Cadastro("/Salvar", "codigo", "teste", codificar=lambda row: row, descrever=lambda row: row["codigo"],
+                    buscar=None, indexar=None, timeout=5, taxa_inicial=1000)
+
+
+def _registros(n):
+    return [{"codigo_conceito": 1000, "codigo": f"C{i}"} for i in range(n)]
+
+
+def test_async_vai_a_thread_uma_vez_por_pagina(aba, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # diário
+    monkeypatch.setattr(salvar_comum, "LINHAS_POR_PAGINA", 10)
+    cadastro = _cadastro()
+
+    async def enviar(session, url, corpo):
+        return "Salvo com sucesso"
+
+    hops = []
+    to_thread = asyncio.to_thread
+
+    async def contar(funcao, *args):
+        hops.append(getattr(funcao, "__name__", funcao))
+        return await to_thread(funcao, *args)
+
+    monkeypatch.setattr(cadastro, "enviar_registro_async", enviar)
+    monkeypatch.setattr(salvar_comum.asyncio, "to_thread", contar)
+
+    resumo = asyncio.run(cadastro.executar_async(None, "http://portal", "c1", aba, 3, _registros(25),
+                                                 verificar_destino=False))
+
+    assert resumo[STATUS_SALVO] == 25
+    # 3 páginas (+ a leitura que encerra): preparar e concluir uma vez por página
+    assert hops.count("preparar_pagina") == 3
+    assert hops.count("concluir_pagina") == 3
+    assert hops.count("next") == 4
+    assert [linha[2] for linha in aba.get_all_values()[1:26]] == ["Salvo com sucesso"] * 25
+
+
+def test_falha_num_envio_cancela_os_demais(aba, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # diário
+    cadastro = _cadastro()
+    cancelados = []
+
+    async def enviar(session, url, corpo):
+        if corpo["codigo"] == "C0":
+            await asyncio.sleep(0.01)
+            raise RuntimeError("sessão perdida")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelados.append(corpo["codigo"])
+            raise
+
+    monkeypatch.setattr(cadastro, "enviar_registro_async", enviar)
+
+    async def principal():
+        with pytest.raises(RuntimeError):
+            await cadastro.executar_async(None, "http://portal", "c1", aba, 3, _registros(5),
+                                          verificar_destino=False, max_concorrencia=8)
+        # Já cancelados quando o erro chega a quem chamou, não só no fim do asyncio.run
+        return sorted(cancelados)
+
+    assert asyncio.run(principal()) == ["C1", "C2", "C3", "C4"]
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import socket
+
+import pytest
+
+import sessoes
+
+
+def test_sessao_ativa_quando_o_portal_responde(portal, cookies):
+    assert sessoes.sessao_ativa({"url": portal.url, "cookies": cookies})
+    # Um único GET à página inicial, não a lista de grupos
+    assert portal.chamadas == {"InicioPorParametros/Index 200": 1}
+
+
+@pytest.mark.parametrize("status", [302, 401])
+def test_sessao_recusada_sem_seguir_o_redirecionamento(status, portal, cookies, monkeypatch):
+    def recusar(caminho, form):
+        portal.chamadas[f"login {status}"] += 1
+        return status, {"mensagem": "Sessão expirada"}
+
+    monkeypatch.setattr(portal, "responder", recusar)
+
+    assert sessoes.situacao_da_sessao({"url": portal.url, "cookies": cookies}) == sessoes.SESSAO_RECUSADA
+    assert portal.chamadas[f"login {status}"] == 1
+
+
+def test_erro_do_servidor_nao_e_repetido_nem_recusa_a_sessao(portal, cookies, monkeypatch):
+    def indisponivel(caminho, form):
+        portal.chamadas["503"] += 1
+        return 503, {"mensagem": "Indisponível"}
+
+    monkeypatch.setattr(portal, "responder", indisponivel)
+
+    assert sessoes.situacao_da_sessao({"url": portal.url, "cookies": cookies}) == sessoes.SESSAO_INDETERMINADA
+    assert portal.chamadas["503"] == 1
+
+
+def _porta_fechada() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def test_falha_de_rede_mantem_a_sessao_em_cache(tmp_path, monkeypatch, cookies):
+    monkeypatch.chdir(tmp_path)
+    sessoes.salvar_sessao("c1", {"url": _porta_fechada(), "cookies": cookies})
+
+    assert sessoes.obter_sessao_valida("c1") is not None
+    assert "c1" in sessoes._ler_cache()
+
+
+def test_sessao_recusada_sai_do_cache(portal, cookies, monkeypatch):
+    sessoes.salvar_sessao("c1", {"url": portal.url, "cookies": cookies})
+    monkeypatch.setattr(portal, "responder", lambda caminho, form: (302, {}))
+
+    assert sessoes.obter_sessao_valida("c1") is None
+    assert "c1" not in sessoes._ler_cache()